@@ -2,7 +2,8 @@
 Session Management with LangGraph Checkpointing
 Based on LangGraph 0.6.0 MemorySaver patterns
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
+import time
 import logging
 from .graph import agent_graph
 
@@ -41,8 +42,30 @@ class SessionManager:
             Updated agent state
         """
         config = {"configurable": {"thread_id": session_id}}
+        input_state = self._build_input(
+            session_id, user_message, user_command, selected_repositories, user_profile
+        )
         
-        # Build input with required initial values
+        try:
+            # Invoke with automatic checkpointing
+            result = await self.graph.ainvoke(input_state, config)
+            
+            logger.info(f"[{session_id}] Agent invoked successfully")
+            return result
+        
+        except Exception as e:
+            logger.error(f"[{session_id}] Agent invocation failed: {e}")
+            raise
+    
+    def _build_input(
+        self,
+        session_id: str,
+        user_message: str,
+        user_command: Optional[str],
+        selected_repositories: Optional[list],
+        user_profile: str
+    ) -> Dict[str, Any]:
+        """Graph input with required initial values"""
         input_state = {
             "session_id": session_id,
             "user_profile": user_profile,
@@ -63,15 +86,56 @@ class SessionManager:
         if user_command:
             input_state["last_user_command"] = user_command
         
+        return input_state
+    
+    async def stream_agent(
+        self,
+        session_id: str,
+        user_message: str,
+        user_command: Optional[str] = None,
+        selected_repositories: Optional[list] = None,
+        user_profile: str = "technical"
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run the agent like `invoke_agent`, yielding progress as it happens.
+        
+        Yields (event, data) pairs:
+        - ("node_start", {"node"}) when a node begins
+        - ("token", {"node", "content"}) for LLM output written by nodes
+          through the LangGraph stream writer
+        - ("node_end", {"node", "elapsed_ms", "error"}) when a node finishes
+        - ("state", <final state>) once the run stops (end or interrupt)
+        """
+        config = {"configurable": {"thread_id": session_id}}
+        input_state = self._build_input(
+            session_id, user_message, user_command, selected_repositories, user_profile
+        )
+        started: Dict[str, float] = {}
+        
         try:
-            # Invoke with automatic checkpointing
-            result = await self.graph.ainvoke(input_state, config)
+            async for mode, chunk in self.graph.astream(
+                input_state, config, stream_mode=["tasks", "custom"]
+            ):
+                if mode == "custom":
+                    chunk = dict(chunk)
+                    yield chunk.pop("type", "custom"), chunk
+                elif "result" in chunk or "error" in chunk:
+                    elapsed = time.perf_counter() - started.pop(chunk["id"], time.perf_counter())
+                    yield "node_end", {
+                        "node": chunk["name"],
+                        "elapsed_ms": round(elapsed * 1000, 1),
+                        "error": str(chunk["error"]) if chunk.get("error") else None,
+                    }
+                else:
+                    started[chunk["id"]] = time.perf_counter()
+                    yield "node_start", {"node": chunk["name"]}
             
-            logger.info(f"[{session_id}] Agent invoked successfully")
-            return result
+            state = await self.graph.aget_state(config)
+            logger.info(f"[{session_id}] Agent stream finished")
+            yield "state", state.values
         
         except Exception as e:
-            logger.error(f"[{session_id}] Agent invocation failed: {e}")
+            logger.error(f"[{session_id}] Agent stream failed: {e}")
             raise
     
     async def get_session_state(self, session_id: str) -> Optional[Dict[str, Any]]:
@@ -11,6 +11,7 @@ from .nodes.core import (
     analyze_feature_node,
     search_codebase_node,
     llm_response_node,
+    compact_history_node,
     update_spec_node,
     check_completion_node,
     wait_user_input_node,
@@ -45,6 +46,7 @@ def create_agent_graph():
     builder.add_node("search", search_codebase_node)
     builder.add_node("llm_response", llm_response_node)
     builder.add_node("update_spec", update_spec_node)
+    builder.add_node("compact_history", compact_history_node)
     builder.add_node("check_completion", check_completion_node)
     builder.add_node("wait_input", wait_user_input_node)
     
@@ -59,7 +61,8 @@ def create_agent_graph():
     builder.add_edge("analyze", "search")
     builder.add_edge("search", "llm_response")
     builder.add_edge("llm_response", "update_spec")
-    builder.add_edge("update_spec", "check_completion")
+    builder.add_edge("llm_response", "compact_history")  # In parallel with update_spec
+    builder.add_edge(["update_spec", "compact_history"], "check_completion")
     
     # ===== CONDITIONAL EDGE: Should loop or finish? =====
     builder.add_conditional_edges(
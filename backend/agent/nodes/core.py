@@ -3,16 +3,31 @@ Core Graph Nodes - Main Conversation Loop
 Based on LangGraph 0.6.0 async node patterns
 """
 import json
+import asyncio
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional, Callable
+
+from langgraph.config import get_stream_writer
 
 from ..state import AgentState, StateUpdate
 from services.llm import get_llm_service
-from services.mcp import get_mcp_service
+from services.search_scheduler import get_search_scheduler
+from services.query_router import get_query_router
+from services.context_packer import get_context_packer, merge_search_results, render_snippet
+from services.snippet_expander import get_snippet_expander
+from services.repo_profile import get_repository_profiler
+from services.conversation_history import get_history_compactor, get_transcript_renderer, message_content
+from services.export import MarkdownExporter
 from services.langsmith import traceable
 
 logger = logging.getLogger(__name__)
 
+# Incremental spec extraction (update_spec_node)
+SPEC_MAX_NEW_MESSAGES = 10  # Backlog cap if extraction kept failing
+SPEC_DIGEST_CHARS = 160  # Per filled section in the prompt digest
+SPEC_BASE_TOKENS = 600  # Output budget for additions to filled sections
+SPEC_TOKENS_PER_SECTION = 300  # Plus this per empty section
+
 
 @traceable(name="analyze_feature", run_type="chain", tags=["agent", "analysis"])
 async def analyze_feature_node(state: AgentState) -> StateUpdate:
@@ -23,16 +38,11 @@ async def analyze_feature_node(state: AgentState) -> StateUpdate:
     """
     llm_service = get_llm_service()
     
-    # Get last user message
-    if state["messages"]:
-        last_msg = state["messages"][-1]
-        # Handle both dict and LangChain message objects
-        if isinstance(last_msg, dict):
-            last_message = last_msg.get("content", "")
-        else:
-            last_message = last_msg.content if hasattr(last_msg, 'content') else ""
-    else:
-        last_message = ""
+    # Get last user message (dict or LangChain message object)
+    last_message = message_content(state["messages"][-1]) if state["messages"] else ""
+    
+    # Stack/layout summary per repository (cached per HEAD commit)
+    repository_profiles = await get_repository_profiler().describe(state["selected_repositories"])
     
     # Análise com LLM
     prompt = f"""
@@ -45,7 +55,8 @@ async def analyze_feature_node(state: AgentState) -> StateUpdate:
     Feature request: {last_message}
     
     Context available:
-    - Repositories: {state["selected_repositories"]}
+    - Repositories:
+{repository_profiles}
     - User profile: {state["user_profile"]}
     
     Respond in JSON format.
@@ -86,7 +97,7 @@ async def search_codebase_node(state: AgentState) -> StateUpdate:
     
     Generates search queries based on feature summary and executes them.
     """
-    mcp_service = get_mcp_service()
+    router = get_query_router()
     
     # Generate search queries
     queries = [
@@ -95,24 +106,38 @@ async def search_codebase_node(state: AgentState) -> StateUpdate:
         "similar features or patterns",
     ]
     
-    all_results = []
-    for repo in state["selected_repositories"]:
-        for query in queries:
-            try:
-                results = await mcp_service.search_code(
-                    path=repo,
-                    query=query,
-                    limit=5
-                )
-                all_results.extend([r.dict() for r in results])
-            except Exception as e:
-                logger.warning(f"MCP search failed for {repo}: {e}")
-                continue
+    async def search(repo: str, query: str):
+        # Routed per query shape: identifiers/paths to exact indexes, prose to vectors
+        return await router.search(path=repo, query=query, limit=5)
+    
+    # Fan out repo × query concurrently; results come back merged by score
+    batch = await get_search_scheduler().run(
+        search,
+        [(repo, query) for repo in state["selected_repositories"] for query in queries]
+    )
+    
+    # Widen hits to whole functions/classes, then drop duplicates and fold
+    # overlapping ranges before truncating
+    results = batch.results
+    expander = get_snippet_expander()
+    if expander is not None:
+        results = await asyncio.to_thread(expander.expand, results)
+    report = merge_search_results(results)
+    all_results = report.results
     
-    logger.info(f"Found {len(all_results)} code snippets from codebase")
+    logger.info(
+        f"Found {len(batch.results)} code snippets from codebase: {report.duplicates} duplicates, "
+        f"{report.merged} merged, ~{report.tokens_saved} tokens saved"
+    )
     
     return {
         "codebase_context": all_results[:15],  # Top 15 results
+        "context_stats": {
+            "results": len(batch.results),
+            "duplicates": report.duplicates,
+            "merged": report.merged,
+            "tokens_saved": report.tokens_saved,
+        },
         "current_node": "search"
     }
 
@@ -130,39 +155,43 @@ async def llm_response_node(state: AgentState) -> StateUpdate:
     from ..prompts.profiles import get_system_prompt
     system_prompt = get_system_prompt(state["user_profile"])
     
-    # Build context
-    context_summary = format_codebase_context(state.get("codebase_context", [])[:5])
-    
-    # Convert messages to dict format for LLM
-    messages_for_llm = []
-    for msg in state["messages"]:
-        if isinstance(msg, dict):
-            # Already a dict
-            messages_for_llm.append(msg)
-        elif hasattr(msg, 'type') and hasattr(msg, 'content'):
-            # LangChain message object
-            messages_for_llm.append({
-                "role": "user" if msg.type == "human" else "assistant",
-                "content": msg.content
-            })
+    # Build context (packed into the context token budget)
+    context_summary = format_codebase_context(state.get("codebase_context", []))
+    repository_profiles = await get_repository_profiler().describe(state["selected_repositories"])
+    
+    # Rolling summary of older turns + recent turns verbatim (bounded prompt size)
+    messages_for_llm = get_history_compactor().prompt_messages(
+        state["messages"],
+        state.get("history_summary", ""),
+        state.get("summarized_count", 0)
+    )
     
     try:
-        # Generate response
-        response = await llm_service.chat_completion(
+        # Generate response, forwarding tokens to streaming clients as they arrive
+        write = stream_writer()
+        parts = []
+        async for chunk in llm_service.stream_completion(
+            # Persona and context are system messages: Gemini sends them as the
+            # system instruction, so the session's converted turns stay reusable
             messages=[
                 {"role": "system", "content": system_prompt},
-                *messages_for_llm,
-                {"role": "system", "content": f"Relevant code context:\n{context_summary}"}
+                {"role": "system", "content": f"Repositories:\n{repository_profiles}\n\nRelevant code context:\n{context_summary}"},
+                *messages_for_llm
             ],
-            model="google/gemini-2.5-pro"
-        )
+            model="google/gemini-2.5-pro",
+            session_id=state["session_id"]
+        ):
+            if chunk.delta:
+                parts.append(chunk.delta)
+                write({"type": "token", "node": "llm_response", "content": chunk.delta})
         
+        content = "".join(parts)
         logger.info("LLM response generated")
         
         return {
             "messages": [{
                 "role": "assistant",
-                "content": response.choices[0]["message"]["content"]
+                "content": content
             }],
             "iteration_count": 1,
             "current_node": "llm_response"
@@ -178,56 +207,88 @@ async def llm_response_node(state: AgentState) -> StateUpdate:
         }
 
 
+@traceable(name="compact_history", run_type="chain", tags=["agent", "history"])
+async def compact_history_node(state: AgentState) -> StateUpdate:
+    """
+    Fold turns that left the verbatim window into the rolling summary.
+    
+    Runs alongside update_spec, after the response was streamed, so the
+    summary call never delays the user; the next turn's prompt uses it.
+    Writes only the history fields (parallel branches must not share keys).
+    """
+    update = await get_history_compactor().fold(
+        get_llm_service(),
+        state["messages"],
+        state.get("history_summary", ""),
+        state.get("summarized_count", 0)
+    )
+    return update or {}
+
+
 @traceable(name="update_spec", run_type="chain", tags=["agent", "spec"])
 async def update_spec_node(state: AgentState) -> StateUpdate:
     """
     Update spec sections progressively based on conversation.
     
     Fills company-task-template.md sections as information becomes available.
+    Extraction is incremental: only messages since the last extraction are
+    sent, with a short digest of the filled sections, and the LLM returns
+    only the sections those messages fill or change.
     """
     llm_service = get_llm_service()
     
+    sections = state["spec_sections"]
+    messages = state["messages"]
+    extracted = min(state.get("spec_extracted_count", 0), len(messages))
+    new_messages = messages[extracted:][-SPEC_MAX_NEW_MESSAGES:]
+    if not new_messages:
+        return {"current_node": "update_spec"}
+    
+    pending = [key for key in MarkdownExporter.REQUIRED_SECTIONS if not sections.get(key)]
+    
     # Extract info for spec sections
     prompt = f"""
-    Based on this conversation, extract information to fill these spec sections:
-    
-    Current sections filled: {list(state["spec_sections"].keys())}
-    Recent conversation: {state["messages"][-5:]}
-    
-    For each section, provide content if enough information is available.
-    Return JSON: {{"section_name": "content or null"}}
-    
-    Sections to fill:
-    1. Descrição / Contexto
-    2. User Story
-    3. Resultado Esperado
-    4. Detalhes Técnicos / Escopo
-    5. Checklist de Tarefas
-    6. Critérios de Aceite
-    7. Definição de Done
-    8. Observações Adicionais
-    9. Referências / Links Úteis
-    10. Riscos ou Limitações
+    Update a feature spec from the newest messages of a conversation.
+    
+    Sections already filled (digest):
+{format_spec_digest(sections)}
+    
+    Sections still empty:
+{chr(10).join(f"    - {key}: {_section_title(key)}" for key in pending) or "    (none)"}
+    
+    New messages since the last update:
+{get_transcript_renderer().render(new_messages)}
+    
+    Return JSON with only the sections these messages change, using the keys above:
+    {{"replace": {{"section_key": "full content"}}, "append": {{"section_key": "new information only"}}}}
+    - replace: empty sections, and filled ones the messages correct or revise (full revised content)
+    - append: filled sections that only gain new information
+    Omit unchanged sections; return {{"replace": {{}}, "append": {{}}}} if nothing changed.
     """
     
     try:
         response = await llm_service.chat_completion(
             messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
+            max_tokens=SPEC_BASE_TOKENS + SPEC_TOKENS_PER_SECTION * len(pending)
         )
         
         updates = json.loads(response.choices[0]["message"]["content"])
+        updated_sections = merge_spec_updates(sections, updates)
         
-        # Merge with existing sections
-        updated_sections = {**state["spec_sections"], **{k: v for k, v in updates.items() if v}}
-        
-        logger.info(f"Spec updated: {len(updated_sections)}/10 sections filled")
+        changed = sorted(k for k in updated_sections if updated_sections[k] != sections.get(k))
+        logger.info(
+            f"Spec updated from {len(new_messages)} new messages: changed {changed or 'nothing'}, "
+            f"{sum(1 for v in updated_sections.values() if v)}/10 sections filled"
+        )
         
         return {
             "spec_sections": updated_sections,
+            "spec_extracted_count": len(messages),
             "current_node": "update_spec"
         }
     except Exception as e:
+        # Messages stay pending and are retried with the next turn's
         logger.error(f"update_spec_node error: {e}")
         return {
             "current_node": "update_spec"
@@ -265,14 +326,79 @@ async def wait_user_input_node(state: AgentState) -> StateUpdate:
     }
 
 
-def format_codebase_context(results: List[Dict]) -> str:
-    """Helper to format MCP search results"""
-    if not results:
-        return "No code context available."
+def format_spec_digest(sections: Dict[str, str], chars: int = SPEC_DIGEST_CHARS) -> str:
+    """
+    Helper to summarize filled spec sections for extraction prompts
     
+    One line per section, cut at `chars`, so the prompt carries what is
+    already known without resending the whole spec.
+    """
     lines = []
-    for r in results[:5]:  # Limit to 5 for context window
-        lines.append(f"File: {r.get('file', 'unknown')}:{r.get('line', 0)}")
-        lines.append(f"```\n{r.get('content', '')}\n```\n")
-    return "\n".join(lines)
+    for key, content in sections.items():
+        if not content:
+            continue
+        text = " ".join(content.split())
+        if len(text) > chars:
+            text = text[:chars].rstrip() + "..."
+        lines.append(f"    - {key}: {text}")
+    return "\n".join(lines) or "    (none)"
+
+
+def merge_spec_updates(sections: Dict[str, str], updates: Dict) -> Dict[str, str]:
+    """
+    Helper to apply a {"replace": {...}, "append": {...}} extraction result
+    
+    Only template sections are accepted; replacements overwrite a section,
+    additions are appended unless the section already contains them.
+    """
+    merged = dict(sections)
+    for mode in ("replace", "append"):
+        entries = updates.get(mode) if isinstance(updates, dict) else None
+        if not isinstance(entries, dict):
+            continue
+        for key, value in entries.items():
+            if key not in MarkdownExporter.REQUIRED_SECTIONS or not isinstance(value, str) or not value.strip():
+                continue
+            value = value.strip()
+            current = merged.get(key)
+            if mode == "replace" or not current:
+                merged[key] = value
+            elif value not in current:
+                merged[key] = f"{current}\n{value}"
+    return merged
+
+
+def _section_title(key: str) -> str:
+    """Spec section title without its emoji"""
+    return MarkdownExporter.SECTION_TITLES.get(key, key).split(" ", 1)[-1]
+
 
+def stream_writer() -> Callable[[Dict], None]:
+    """
+    LangGraph custom stream writer for the running node.
+    
+    Chunks reach `SessionManager.stream_agent` as events named after their
+    "type"; outside a graph run (direct node calls, tests) this is a no-op.
+    """
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+def format_codebase_context(results: List[Dict], token_budget: Optional[int] = None) -> str:
+    """
+    Helper to format MCP search results
+    
+    Snippets are packed into a token budget (CONTEXT_TOKEN_BUDGET) by
+    relevance and diversity instead of taking a fixed number of them.
+    """
+    if not results:
+        return "No code context available."
+    
+    packed = get_context_packer().pack(results, token_budget)
+    logger.info(
+        f"Code context: {len(packed.snippets)}/{len(results)} snippets, "
+        f"{packed.tokens_used} tokens ({packed.dropped} dropped)"
+    )
+    return "\n".join(render_snippet(s) for s in packed.snippets)
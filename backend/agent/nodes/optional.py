@@ -6,7 +6,8 @@ import json
 import logging
 from ..state import AgentState, StateUpdate
 from services.llm import get_llm_service
-from services.mcp import get_mcp_service
+from services.search_scheduler import get_search_scheduler
+from services.query_router import get_query_router
 from services.langsmith import traceable
 
 logger = logging.getLogger(__name__)
@@ -91,7 +92,7 @@ async def tech_debt_node(state: AgentState) -> StateUpdate:
     """
     logger.info("Tech debt analysis triggered")
     llm_service = get_llm_service()
-    mcp_service = get_mcp_service()
+    router = get_query_router()
     
     # Search for potential tech debt in codebase
     search_queries = [
@@ -104,14 +105,14 @@ async def tech_debt_node(state: AgentState) -> StateUpdate:
         "coupling and dependencies issues"
     ]
     
-    code_snippets = []
-    for repo in state['selected_repositories']:
-        for query in search_queries[:3]:  # Limit queries
-            try:
-                results = await mcp_service.search_code(repo, query, limit=2)
-                code_snippets.extend([r.dict() for r in results])
-            except:
-                continue
+    async def search(repo: str, query: str):
+        return await router.search(repo, query, limit=2)
+    
+    batch = await get_search_scheduler().run(
+        search,
+        [(repo, query) for repo in state['selected_repositories'] for query in search_queries[:3]]  # Limit queries
+    )
+    code_snippets = batch.results
     
     prompt = f"""
 Analise dívida técnica neste contexto de código.
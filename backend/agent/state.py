@@ -43,6 +43,8 @@ class AgentState(TypedDict):
     # ===== CONVERSATION =====
     # Using add_messages reducer from langgraph.graph.message
     messages: Annotated[List[Dict[str, str]], add_messages]  # Chat history
+    history_summary: NotRequired[str]  # Rolling summary of the first `summarized_count` messages
+    summarized_count: NotRequired[int]  # Messages folded into history_summary (prompts send the rest verbatim)
     
     # ===== FEATURE ANALYSIS =====
     feature_summary: str  # Extracted feature description
@@ -50,6 +52,7 @@ class AgentState(TypedDict):
     
     # ===== SPEC GENERATION =====
     spec_sections: Dict[str, str]  # 10 sections from company-task-template.md
+    spec_extracted_count: NotRequired[int]  # Messages already processed by update_spec
     completion_percentage: int  # 0-100 (threshold: 80%)
     
     # ===== OPTIONAL FEATURES =====
@@ -73,6 +76,7 @@ class AgentState(TypedDict):
     # ===== METADATA =====
     iteration_count: Annotated[int, add]  # Number of conversation turns
     current_node: NotRequired[str]  # Current graph node (for debugging)
+    context_stats: NotRequired[Dict]  # Search result dedup/merge counts and tokens saved
 
 
 # Helper type for node return values
@@ -83,9 +87,12 @@ class StateUpdate(TypedDict, total=False):
     selected_repositories: List[str]
     codebase_context: List[Dict]
     messages: List[Dict[str, str]]
+    history_summary: str
+    summarized_count: int
     feature_summary: str
     feature_complexity: int
     spec_sections: Dict[str, str]
+    spec_extracted_count: int
     completion_percentage: int
     tech_debt_report: Dict
     security_report: Dict
@@ -99,5 +106,6 @@ class StateUpdate(TypedDict, total=False):
     last_user_command: UserCommand
     iteration_count: int
     current_node: str
+    context_stats: Dict
 
 
@@ -2,13 +2,18 @@
 Agent API Endpoints - FastAPI Integration
 Based on FastAPI 0.116.1 async patterns
 """
+import json
+import logging
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 
 from agent.checkpointing import get_session_manager
 from agent.state import UserCommand
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api", tags=["agent"])
 
 
@@ -39,6 +44,36 @@ class SessionStateResponse(BaseModel):
     iteration_count: int
 
 
+# ===== HELPERS =====
+
+def build_chat_response(result: Dict[str, Any]) -> ChatResponse:
+    """Build the chat response from an agent state"""
+    messages = result.get("messages", [])
+    ai_messages = []
+    for m in messages:
+        # Handle both dict and LangChain message objects
+        if hasattr(m, 'type'):
+            # LangChain message object
+            if m.type == "ai":
+                ai_messages.append(m)
+        elif isinstance(m, dict) and m.get("role") == "assistant":
+            ai_messages.append(m)
+    
+    if ai_messages:
+        last_ai = ai_messages[-1]
+        ai_response = last_ai.content if hasattr(last_ai, 'content') else last_ai.get("content", "")
+    else:
+        ai_response = ""
+    
+    return ChatResponse(
+        session_id=result["session_id"],
+        ai_response=ai_response,
+        completion_percentage=result.get("completion_percentage", 0),
+        spec_sections=result.get("spec_sections", {}),
+        is_complete=result.get("completion_percentage", 0) >= 80
+    )
+
+
 # ===== ENDPOINTS =====
 
 @router.post("/chat", response_model=ChatResponse)
@@ -59,31 +94,7 @@ async def chat(request: ChatRequest):
             user_profile=request.user_profile
         )
         
-        # Extract AI response
-        messages = result.get("messages", [])
-        ai_messages = []
-        for m in messages:
-            # Handle both dict and LangChain message objects
-            if hasattr(m, 'type'):
-                # LangChain message object
-                if m.type == "ai":
-                    ai_messages.append(m)
-            elif isinstance(m, dict) and m.get("role") == "assistant":
-                ai_messages.append(m)
-        
-        if ai_messages:
-            last_ai = ai_messages[-1]
-            ai_response = last_ai.content if hasattr(last_ai, 'content') else last_ai.get("content", "")
-        else:
-            ai_response = ""
-        
-        return ChatResponse(
-            session_id=result["session_id"],
-            ai_response=ai_response,
-            completion_percentage=result.get("completion_percentage", 0),
-            spec_sections=result.get("spec_sections", {}),
-            is_complete=result.get("completion_percentage", 0) >= 80
-        )
+        return build_chat_response(result)
     
     except Exception as e:
         raise HTTPException(
@@ -92,6 +103,44 @@ async def chat(request: ChatRequest):
         )
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint - same turn as `/chat`, as Server-Sent Events.
+    
+    Events:
+    - node_start / node_end: graph progress (node_end carries elapsed_ms)
+    - token: LLM output as it is generated
+    - done: final ChatResponse
+    - error: {"detail"} if the turn fails (the stream then closes)
+    """
+    session_manager = get_session_manager()
+    
+    async def event_stream():
+        try:
+            async for event, data in session_manager.stream_agent(
+                session_id=request.session_id,
+                user_message=request.message,
+                user_command=request.command.value if request.command else None,
+                selected_repositories=request.selected_repositories,
+                user_profile=request.user_profile
+            ):
+                if event == "state":
+                    yield f"event: done\ndata: {build_chat_response(data).model_dump_json()}\n\n"
+                else:
+                    yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"[{request.session_id}] Streaming chat failed: {e}")
+            detail = json.dumps({"detail": f"Agent invocation failed: {str(e)}"})
+            yield f"event: error\ndata: {detail}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/command/{session_id}/{command}")
 async def execute_command(session_id: str, command: UserCommand):
     """
@@ -3,14 +3,18 @@ Repository Discovery API Endpoints
 Discover and manage repositories for MCP integration
 """
 import os
+import time
 import asyncio
 import logging
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from services.mcp import get_mcp_service
+from services.mcp import CodeSearchResult, get_mcp_service
+from services.repository_status import get_repository_status_cache
+from services.indexing_jobs import IndexingJob, get_indexing_queue
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/repositories", tags=["repositories"])
@@ -39,6 +43,7 @@ class IndexRepositoryRequest(BaseModel):
     """Request to index a repository"""
     path: str
     force: bool = False
+    priority: int = 0  # Higher runs first
 
 
 class IndexRepositoryResponse(BaseModel):
@@ -47,6 +52,26 @@ class IndexRepositoryResponse(BaseModel):
     status: str
     message: str
     file_count: Optional[int] = None
+    job_id: Optional[str] = None
+
+
+class GrepRequest(BaseModel):
+    """Request for an exact or regex code search"""
+    path: str
+    pattern: str
+    regex: bool = False
+    case_sensitive: bool = True
+    limit: int = 50
+    extensions: Optional[List[str]] = None
+
+
+class GrepResponse(BaseModel):
+    """Matching lines for an exact or regex code search"""
+    path: str
+    pattern: str
+    matches: List[CodeSearchResult]
+    total: int
+    took_ms: float
 
 
 # ===== HELPER FUNCTIONS =====
@@ -104,24 +129,26 @@ async def scan_directory_for_repos(base_path: Path) -> List[Path]:
     return repositories
 
 
-async def check_repository_indexing_status(mcp_service, repo_path: str) -> Dict[str, Any]:
-    """Check if repository is indexed in MCP"""
-    try:
-        status = await mcp_service.get_indexing_status(repo_path)
-        return {
+async def find_repositories() -> List[str]:
+    """Scan the common directories for git repositories (sorted, unique paths)"""
+    all_repos = []
+    for base_path in get_common_repo_paths():
+        all_repos.extend(await scan_directory_for_repos(base_path))
+    return sorted({str(p) for p in all_repos})
+
+
+async def check_repository_indexing_statuses(repo_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Check MCP indexing status for many repositories (served from the status cache)"""
+    statuses = await get_repository_status_cache().get_statuses(repo_paths)
+    return {
+        path: {
             'is_indexed': status.status == 'indexed',
             'status': status.status,
             'file_count': status.file_count,
             'progress': status.progress
         }
-    except Exception as e:
-        logger.warning(f"Could not check indexing status for {repo_path}: {e}")
-        return {
-            'is_indexed': False,
-            'status': 'unknown',
-            'file_count': None,
-            'progress': None
-        }
+        for path, status in statuses.items()
+    }
 
 
 # ===== ENDPOINTS =====
@@ -135,40 +162,21 @@ async def discover_repositories():
     which ones are already indexed in the MCP system.
     """
     try:
-        # Get common repository paths
-        common_paths = get_common_repo_paths()
-        
-        if not common_paths:
-            return DiscoverRepositoriesResponse(
-                repositories=[],
-                total_found=0,
-                indexed_count=0
-            )
-        
-        # Scan all common paths for repositories
-        all_repos = []
-        for base_path in common_paths:
-            repos = await scan_directory_for_repos(base_path)
-            all_repos.extend(repos)
+        # Discovered paths are cached (REPO_DISCOVERY_TTL) instead of rescanned per request
+        repo_paths = await get_repository_status_cache().get_discovered(find_repositories)
         
-        # Remove duplicates and sort
-        unique_repos = list(set(all_repos))
-        unique_repos.sort(key=lambda p: str(p))
+        # Check indexing status for all repositories in one bulk lookup
+        statuses = await check_repository_indexing_statuses(repo_paths)
         
-        # Get MCP service
-        mcp_service = get_mcp_service()
-        
-        # Check indexing status for each repository
         repositories = []
         indexed_count = 0
         
-        for repo_path in unique_repos:
-            repo_str = str(repo_path)
-            indexing_info = await check_repository_indexing_status(mcp_service, repo_str)
+        for repo_str in repo_paths:
+            indexing_info = statuses[repo_str]
             
             repo_info = RepositoryInfo(
                 path=repo_str,
-                name=repo_path.name,
+                name=Path(repo_str).name,
                 is_indexed=indexing_info['is_indexed'],
                 indexing_status=indexing_info['status'],
                 file_count=indexing_info['file_count']
@@ -199,12 +207,10 @@ async def get_available_repositories():
     """
     Get list of repositories that are already indexed in MCP.
     
-    This is a simplified version that returns repositories from discovery
-    that are already indexed. In a full implementation, you might want
-    to query MCP directly for indexed repositories.
+    Filters the discovery results, which come from the cached repository
+    list and status cache (no filesystem scan or MCP call per request).
     """
     try:
-        # For now, use discovery and filter indexed ones
         discover_response = await discover_repositories()
         indexed_repos = [repo for repo in discover_response.repositories if repo.is_indexed]
         
@@ -219,13 +225,14 @@ async def get_available_repositories():
         )
 
 
-@router.post("/index", response_model=IndexRepositoryResponse)
+@router.post("/index", response_model=IndexRepositoryResponse, status_code=status.HTTP_202_ACCEPTED)
 async def index_repository(request: IndexRepositoryRequest):
     """
-    Index a repository using MCP.
+    Queue a repository for indexing using MCP.
     
-    This will index the specified repository path using the MCP service,
-    making it available for semantic search.
+    Indexing runs in the background job queue; the response carries a job_id
+    to poll (`/index/jobs/{job_id}`) or stream (`/index/jobs/{job_id}/events`).
+    A request for a path that is already queued/running returns that job.
     """
     try:
         # Validate path exists
@@ -242,27 +249,18 @@ async def index_repository(request: IndexRepositoryRequest):
                 detail=f"Path is not a git repository: {request.path}"
             )
         
-        # Get MCP service and index repository
-        mcp_service = get_mcp_service()
-        
-        logger.info(f"Starting indexing for repository: {request.path}")
-        
-        # Index the repository
-        result = await mcp_service.index_codebase(
+        job = await get_indexing_queue().submit(
             path=request.path,
-            force=request.force
+            force=request.force,
+            priority=request.priority
         )
         
-        # Get file count from result
-        file_count = result.get('file_count', 0)
-        
-        logger.info(f"Successfully indexed repository: {request.path} ({file_count} files)")
-        
         return IndexRepositoryResponse(
             path=request.path,
-            status="success",
-            message=f"Repository indexed successfully with {file_count} files",
-            file_count=file_count
+            status=job.status.value,
+            message=f"Indexing job {job.status.value}",
+            file_count=job.file_count,
+            job_id=job.job_id
         )
     
     except HTTPException:
@@ -275,6 +273,106 @@ async def index_repository(request: IndexRepositoryRequest):
         )
 
 
+@router.get("/index/jobs", response_model=List[IndexingJob])
+async def list_indexing_jobs():
+    """List active and recently finished indexing jobs (newest first)."""
+    return get_indexing_queue().list_jobs()
+
+
+@router.get("/index/jobs/{job_id}", response_model=IndexingJob)
+async def get_indexing_job(job_id: str):
+    """Poll an indexing job's status and progress."""
+    job = get_indexing_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Indexing job {job_id} not found"
+        )
+    return job
+
+
+@router.delete("/index/jobs/{job_id}", response_model=IndexingJob)
+async def cancel_indexing_job(job_id: str):
+    """Cancel a queued or running indexing job."""
+    job = await get_indexing_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Indexing job {job_id} not found"
+        )
+    return job
+
+
+@router.get("/index/jobs/{job_id}/events")
+async def stream_indexing_job(job_id: str):
+    """
+    Stream indexing job updates as Server-Sent Events.
+    
+    Each event is named after the job status and carries the job snapshot as
+    JSON; the stream closes once the job completes, fails or is cancelled.
+    """
+    queue = get_indexing_queue()
+    if queue.get(job_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Indexing job {job_id} not found"
+        )
+    
+    async def event_stream():
+        async for job in queue.subscribe(job_id):
+            yield f"event: {job.status.value}\ndata: {job.model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/grep", response_model=GrepResponse)
+async def grep_repository(request: GrepRequest):
+    """
+    Exact or regex search in a repository.
+    
+    Served from the local trigram index (built on first use and kept up to
+    date by indexing), so lookups for a function name or config key do not
+    go through embeddings.
+    """
+    if not Path(request.path).exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Repository path does not exist: {request.path}"
+        )
+    
+    try:
+        started = time.perf_counter()
+        matches = await get_mcp_service().grep_code(
+            path=request.path,
+            pattern=request.pattern,
+            regex=request.regex,
+            case_sensitive=request.case_sensitive,
+            limit=request.limit,
+            extension_filter=request.extensions
+        )
+        
+        return GrepResponse(
+            path=request.path,
+            pattern=request.pattern,
+            matches=matches,
+            total=len(matches),
+            took_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+    
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching repository {request.path}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search repository: {str(e)}"
+        )
+
+
 @router.get("/status/{path:path}")
 async def get_repository_status(path: str):
     """
@@ -286,6 +384,7 @@ async def get_repository_status(path: str):
     try:
         mcp_service = get_mcp_service()
         status = await mcp_service.get_indexing_status(path)
+        get_repository_status_cache().set_status(status)
         
         return {
             "path": path,
@@ -37,6 +37,13 @@ async def lifespan(app: FastAPI):
                    os.getenv("LANGCHAIN_PROJECT", "context-coder"))
     
     yield
+    
+    # Stop background indexing and persistent MCP workers (only if ever used)
+    from services.indexing_jobs import close_indexing_queue
+    from services.mcp import close_mcp_service
+    await close_indexing_queue()
+    await close_mcp_service()
+    
     logger.info("application_shutdown")
 
 
@@ -77,13 +84,24 @@ async def health_check():
     elif os.getenv("OPENROUTER_API_KEY"):
         llm_provider = f"OpenRouter ({os.getenv('OPENROUTER_MODEL', 'gemini-flash-1.5')})"
     
+    from services.mcp import get_mcp_stats
+    from services.repository_status import get_repository_status_cache
+    from services.query_router import get_query_router_stats
+    from services.llm import get_llm_service_stats
+    from services.llm_cache import get_llm_response_cache_stats
+    
     return {
         "status": "healthy",
         "service": "context2task-backend",
         "version": "1.0.0",
         "environment": os.getenv("ENVIRONMENT", "development"),
         "llm_provider": llm_provider,
-        "mcp_status": "connected"
+        "mcp_status": "connected",
+        "mcp": get_mcp_stats(),
+        "repository_status_cache": get_repository_status_cache().stats(),
+        "query_router": get_query_router_stats(),
+        "llm": get_llm_service_stats(),
+        "llm_cache": get_llm_response_cache_stats()
     }
 
 # Root endpoint
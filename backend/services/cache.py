@@ -0,0 +1,131 @@
+"""
+Caching Utilities
+Bounded TTL + LRU cache with hit/miss counters, and the on-disk cache location
+"""
+import os
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU cache bounded by size and entry age
+
+    - `maxsize` entries at most; least recently used entries are evicted first
+    - Entries older than `ttl` seconds are treated as misses and dropped
+    - Counters (hits, misses, evictions, expirations) exposed via `stats()`
+
+    Not thread-safe; intended for use from a single asyncio event loop.
+
+    Example:
+        ```python
+        cache = TTLCache(maxsize=512, ttl=600)
+        cache.set(("repo", "query"), results)
+        cached = cache.get(("repo", "query"))
+        ```
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return cached value (refreshing its LRU position) or `default`"""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value, evicting least recently used entries beyond `maxsize`"""
+        if not self.enabled:
+            return
+
+        self._data[key] = (value, time.monotonic() + (ttl if ttl is not None else self.ttl))
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches `predicate`; returns count removed"""
+        stale = [key for key in self._data if predicate(key)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key, _MISSING)
+        return entry is not _MISSING and entry[1] > time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def get_cache_dir(*parts: str) -> Path:
+    """
+    On-disk cache directory for local indexes, manifests and profiles
+
+    Root comes from CONTEXT2TASK_CACHE_DIR (default ~/.cache/context2task);
+    the sub-directory is created on first use.
+    """
+    root = Path(os.getenv("CONTEXT2TASK_CACHE_DIR", str(Path.home() / ".cache" / "context2task")))
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def repo_index_dir(kind: str, repo_path: str) -> Path:
+    """Per-repository cache directory for a local index kind (vectors, bm25, trigram, ...)"""
+    key = hashlib.sha1(os.path.abspath(repo_path).encode()).hexdigest()[:16]
+    return get_cache_dir(kind, key)
@@ -0,0 +1,59 @@
+"""
+Code Text Utilities - Tokenizing, chunking and reading source files
+Shared by the local vector, BM25 and trigram indexes
+"""
+import os
+import re
+from typing import List, Optional, Tuple
+
+CHUNK_LINES = 40
+CHUNK_OVERLAP = 5
+MAX_FILE_BYTES = 1_000_000  # Skip generated/minified blobs
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize_code(text: str) -> List[str]:
+    """
+    Split text into lowercase search tokens
+
+    Identifiers are kept whole and also split on snake_case/camelCase, so
+    `getUserById` matches both `getuserbyid` and `user`.
+    """
+    tokens = []
+    for ident in _IDENTIFIER.findall(text):
+        lower = ident.lower()
+        tokens.append(lower)
+        parts = [p.lower() for piece in ident.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def chunk_text(text: str, chunk_lines: int = CHUNK_LINES, overlap: int = CHUNK_OVERLAP) -> List[Tuple[int, str]]:
+    """Split file content into overlapping line windows as (1-based start line, content)"""
+    lines = text.splitlines()
+    chunks = []
+    step = max(1, chunk_lines - overlap)
+    for start in range(0, len(lines), step):
+        content = "\n".join(lines[start:start + chunk_lines])
+        if content.strip():
+            chunks.append((start + 1, content))
+        if start + chunk_lines >= len(lines):
+            break
+    return chunks
+
+
+def read_text_file(path: str) -> Optional[str]:
+    """Read a source file as text, skipping huge or binary files"""
+    try:
+        if os.path.getsize(path) > MAX_FILE_BYTES:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\x00" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
@@ -0,0 +1,273 @@
+"""
+Context Packer - Fit code snippets into a prompt token budget
+Merges overlapping ranges, compacts snippets and selects them by relevance and diversity
+"""
+import os
+import re
+import math
+import hashlib
+import textwrap
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel
+
+from services.chunking import tokenize_code
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # Rough average for code with Gemini/OpenAI tokenizers
+
+# Full-line comment prefixes per extension (block comments and docstrings are kept)
+LINE_COMMENT_PREFIXES = {
+    ".py": ("#",), ".rb": ("#",), ".sh": ("#",), ".yaml": ("#",), ".yml": ("#",), ".toml": ("#",),
+    ".ts": ("//",), ".tsx": ("//",), ".js": ("//",), ".jsx": ("//",), ".java": ("//",),
+    ".c": ("//",), ".h": ("//",), ".cpp": ("//",), ".hpp": ("//",), ".cs": ("//",),
+    ".go": ("//",), ".rs": ("//",), ".kt": ("//",), ".scala": ("//",), ".swift": ("//",),
+    ".php": ("//", "#"),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer dependency)"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def render_snippet(snippet: Dict[str, Any]) -> str:
+    """Prompt form of one snippet (the format `format_codebase_context` emits)"""
+    return f"File: {snippet.get('file', 'unknown')}:{snippet.get('line', 0)}\n```\n{snippet.get('content', '')}\n```\n"
+
+
+def merge_line_ranges(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge snippets of the same file whose line ranges overlap or touch
+
+    A snippet covers `line` .. `line + len(content lines) - 1`. Merged
+    snippets keep the best score; the output keeps first-seen order.
+    """
+    groups: Dict[Tuple[Any, str], List[Dict[str, Any]]] = {}
+    for r in results:
+        groups.setdefault((r.get("repository"), r.get("file")), []).append(r)
+
+    merged = []
+    for snippets in groups.values():
+        ordered = sorted(snippets, key=lambda s: s.get("line", 0))
+        current = dict(ordered[0])
+        for nxt in ordered[1:]:
+            current_lines = current.get("content", "").split("\n")
+            current_end = current.get("line", 0) + len(current_lines) - 1
+            if nxt.get("line", 0) > current_end + 1:
+                merged.append(current)
+                current = dict(nxt)
+                continue
+
+            next_lines = nxt.get("content", "").split("\n")
+            overlap = current_end - nxt.get("line", 0) + 1
+            current["content"] = "\n".join(current_lines + next_lines[max(0, overlap):])
+            scores = [s for s in (current.get("score"), nxt.get("score")) if s is not None]
+            current["score"] = max(scores) if scores else None
+        merged.append(current)
+
+    first_seen = {}
+    for i, r in enumerate(results):
+        first_seen.setdefault((r.get("repository"), r.get("file")), i)
+    return sorted(merged, key=lambda s: (first_seen[(s.get("repository"), s.get("file"))], s.get("line", 0)))
+
+
+def content_hash(content: str) -> str:
+    """Hash of snippet content with whitespace differences ignored"""
+    return hashlib.sha1(re.sub(r"\s+", " ", content).strip().encode()).hexdigest()
+
+
+class MergeReport(BaseModel):
+    """Outcome of deduplicating and merging search results"""
+    results: List[Dict[str, Any]]
+    duplicates: int  # Dropped because identical content was already present
+    merged: int  # Absorbed into an overlapping/adjacent range of the same file
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def merge_search_results(results: List[Dict[str, Any]]) -> MergeReport:
+    """
+    Deduplicate by content hash, then merge line ranges per file
+
+    Identical snippets (same chunk hit by several queries, or vendored copies
+    across repositories) keep only their first, i.e. best-ranked, occurrence.
+    The output is ordered by score, highest first.
+    """
+    seen = set()
+    unique = []
+    for r in results:
+        digest = content_hash(r.get("content", ""))
+        if digest not in seen:
+            seen.add(digest)
+            unique.append(r)
+
+    merged = merge_line_ranges(unique)
+    merged.sort(key=lambda r: r.get("score") if r.get("score") is not None else float("-inf"), reverse=True)
+
+    return MergeReport(
+        results=merged,
+        duplicates=len(results) - len(unique),
+        merged=len(unique) - len(merged),
+        tokens_before=sum(estimate_tokens(render_snippet(r)) for r in results),
+        tokens_after=sum(estimate_tokens(render_snippet(r)) for r in merged)
+    )
+
+
+def compact_snippet(content: str, file: str = "", strip_comments: bool = True) -> str:
+    """Drop full-line comments, trailing spaces and blank-line runs; dedent"""
+    prefixes = LINE_COMMENT_PREFIXES.get(os.path.splitext(file)[1], ()) if strip_comments else ()
+    lines = []
+    for line in content.split("\n"):
+        line = line.rstrip()
+        if prefixes and line.lstrip().startswith(prefixes):
+            continue
+        if not line and (not lines or not lines[-1]):
+            continue
+        lines.append(line)
+    return textwrap.dedent("\n".join(lines)).strip("\n")
+
+
+class PackedContext(BaseModel):
+    """Snippets chosen for a prompt and what they cost"""
+    snippets: List[Dict[str, Any]]
+    tokens_used: int
+    tokens_considered: int  # Cost of every candidate after merging/compaction
+    candidates: int
+    dropped: int
+
+
+class ContextPacker:
+    """
+    Token-budgeted snippet selection for prompts
+
+    1. Overlapping/adjacent ranges of the same file are merged
+    2. Snippets are compacted (comments, whitespace) and capped at a share of
+       the budget so one huge hit cannot crowd out the rest
+    3. Greedy budgeted MMR: repeatedly take the snippet with the best
+       (λ·relevance − (1−λ)·max similarity to chosen) per √tokens that still
+       fits; snippets that add nothing new (gain ≤ 0) are skipped
+
+    Configuration via environment variables:
+    - CONTEXT_TOKEN_BUDGET (tokens of code context per prompt, default 2000)
+    - CONTEXT_MMR_LAMBDA (relevance vs diversity, default 0.7)
+    - CONTEXT_STRIP_COMMENTS (default true)
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        mmr_lambda: float = 0.7,
+        max_snippet_share: float = 0.4,
+        strip_comments: bool = True
+    ):
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.max_snippet_share = max_snippet_share
+        self.strip_comments = strip_comments
+
+    def _cap(self, snippet: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+        if estimate_tokens(render_snippet(snippet)) <= max_tokens:
+            return snippet
+        overhead = estimate_tokens(render_snippet({**snippet, "content": "..."}))
+        max_chars = max(0, max_tokens - overhead) * CHARS_PER_TOKEN
+        kept, used = [], 0
+        for line in snippet["content"].split("\n"):
+            if kept and used + len(line) + 1 > max_chars:
+                break
+            kept.append(line)
+            used += len(line) + 1
+        return {**snippet, "content": "\n".join(kept) + "\n..."}
+
+    @staticmethod
+    def _relevance(snippets: List[Dict[str, Any]]) -> List[float]:
+        scores = [s.get("score") for s in snippets]
+        if scores and all(s is not None and s > 0 for s in scores):
+            top = max(scores)
+            return [s / top for s in scores]
+        # Unscored (or mixed-sign) results: trust the incoming order
+        n = len(snippets)
+        return [1.0 - i / (2 * n) for i in range(n)]
+
+    def pack(self, results: List[Dict[str, Any]], token_budget: Optional[int] = None) -> PackedContext:
+        """
+        Choose the snippets to put in a prompt
+
+        Args:
+            results: Search result dicts (file, line, content, score, repository)
+            token_budget: Override for CONTEXT_TOKEN_BUDGET
+
+        Returns:
+            PackedContext with the chosen snippets in selection order
+        """
+        budget = token_budget or self.token_budget
+        merged = merge_line_ranges(results)
+        candidates = [
+            self._cap(
+                {**s, "content": compact_snippet(s.get("content", ""), s.get("file", ""), self.strip_comments)},
+                max(1, int(budget * self.max_snippet_share))
+            )
+            for s in merged
+        ]
+        candidates = [c for c in candidates if c["content"].strip()]
+        candidates.sort(key=lambda c: c.get("score") if c.get("score") is not None else float("-inf"), reverse=True)
+
+        relevance = self._relevance(candidates)
+        costs = [estimate_tokens(render_snippet(c)) for c in candidates]
+        token_sets = [set(tokenize_code(c["content"])) for c in candidates]
+
+        chosen: List[int] = []
+        remaining = budget
+        pending = set(range(len(candidates)))
+        while pending:
+            best, best_utility = None, 0.0
+            for i in pending:
+                if costs[i] > remaining:
+                    continue
+                similarity = max((self._jaccard(token_sets[i], token_sets[j]) for j in chosen), default=0.0)
+                gain = self.mmr_lambda * relevance[i] - (1 - self.mmr_lambda) * similarity
+                utility = gain / math.sqrt(costs[i])
+                if gain > 0 and (best is None or utility > best_utility):
+                    best, best_utility = i, utility
+            if best is None:
+                break
+            chosen.append(best)
+            pending.discard(best)
+            remaining -= costs[best]
+
+        packed = PackedContext(
+            snippets=[candidates[i] for i in chosen],
+            tokens_used=budget - remaining,
+            tokens_considered=sum(costs),
+            candidates=len(candidates),
+            dropped=len(candidates) - len(chosen)
+        )
+        logger.debug(
+            f"Context packed: {len(chosen)}/{len(candidates)} snippets, "
+            f"{packed.tokens_used}/{budget} tokens (from {len(results)} results)"
+        )
+        return packed
+
+    @staticmethod
+    def _jaccard(a: set, b: set) -> float:
+        return len(a & b) / len(a | b) if a and b else 0.0
+
+
+# Global instance (optional pattern)
+_context_packer = None
+
+def get_context_packer() -> ContextPacker:
+    """Get or create ContextPacker singleton"""
+    global _context_packer
+    if _context_packer is None:
+        _context_packer = ContextPacker(
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000")),
+            mmr_lambda=float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7")),
+            strip_comments=os.getenv("CONTEXT_STRIP_COMMENTS", "true").lower() == "true"
+        )
+    return _context_packer
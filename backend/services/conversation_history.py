@@ -0,0 +1,209 @@
+"""
+Conversation History - Compact transcripts and bounded prompt history
+Messages render as cached `role: content` lines; older turns fold into a rolling summary
+"""
+import os
+import re
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """Update the running summary of a conversation about a software feature specification.
+
+Keep everything later turns may rely on: goals, requirements, decisions and their reasons,
+constraints, names of files/APIs/components, and questions still open. Drop greetings and
+repetition. Write in the conversation's language, at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages to fold in:
+{transcript}
+
+Return only the updated summary."""
+
+
+def message_role(msg: Any) -> str:
+    """Chat role of a dict or LangChain message ("user", "assistant" or "system")"""
+    if isinstance(msg, dict):
+        return msg.get("role", "user")
+    return {"human": "user", "system": "system"}.get(getattr(msg, "type", "ai"), "assistant")
+
+
+def message_content(msg: Any) -> str:
+    """Text of a dict or LangChain message (content blocks are joined)"""
+    content = msg.get("content", "") if isinstance(msg, dict) else getattr(msg, "content", "")
+    if isinstance(content, list):
+        return "\n".join(
+            block if isinstance(block, str) else block.get("text", "")
+            for block in content
+        )
+    return content or ""
+
+
+def to_llm_message(msg: Any) -> Dict[str, str]:
+    """Dict or LangChain message as an LLM chat message"""
+    return {"role": message_role(msg), "content": message_content(msg)}
+
+
+class TranscriptRenderer:
+    """
+    Messages as minimal `role: content` lines for prompts
+
+    LangChain message reprs (ids, additional_kwargs, metadata) are pure
+    noise in a prompt; this renders only the role and the text, with
+    whitespace tidied and very long messages elided in the middle.
+    Rendered lines are cached per message id (messages from the
+    `add_messages` reducer all have one) and reused while the content
+    object is unchanged, so re-rendering a growing conversation only
+    formats the new messages.
+
+    Configuration via environment variables:
+    - TRANSCRIPT_MAX_MESSAGE_CHARS (longest message text kept, 0 = no limit, default 4000)
+    """
+
+    def __init__(self, max_message_chars: int = 4000, maxsize: int = 4096):
+        self.max_message_chars = max_message_chars
+        self.cache = TTLCache(maxsize=maxsize, ttl=float("inf"))
+
+    def _compact(self, text: str) -> str:
+        text = "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").split("\n"))
+        text = re.sub(r"\n{3,}", "\n\n", text).strip()
+        limit = self.max_message_chars
+        if limit and len(text) > limit:
+            head = text[:limit * 3 // 4]
+            tail = text[-(limit // 4):]
+            text = f"{head} [... {len(text) - len(head) - len(tail)} chars omitted ...] {tail}"
+        return text
+
+    def line(self, msg: Any) -> str:
+        """One message as `role: content`"""
+        msg_id = msg.get("id") if isinstance(msg, dict) else getattr(msg, "id", None)
+        content = msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", None)
+        if msg_id is not None:
+            cached = self.cache.get(msg_id)
+            if cached is not None and cached[0] is content:
+                return cached[1]
+
+        rendered = f"{message_role(msg)}: {self._compact(message_content(msg))}"
+        if msg_id is not None:
+            self.cache.set(msg_id, (content, rendered))
+        return rendered
+
+    def render(self, messages: List[Any]) -> str:
+        """Messages as a transcript, one `role: content` entry per message"""
+        return "\n".join(self.line(m) for m in messages)
+
+
+class HistoryCompactor:
+    """
+    Keeps per-turn prompt size bounded in long conversations
+
+    The state holds the full message list plus a summary of its first
+    `summarized_count` messages. Prompts are the summary followed by the
+    messages after it verbatim. Once `keep_turns + fold_turns` user
+    turns sit after the summary, the oldest ones (everything before
+    the last `keep_turns` turns) are folded into it with one small LLM
+    call. The summary is only ever extended with the newly evicted
+    messages, never rebuilt from the whole history.
+
+    Configuration via environment variables:
+    - HISTORY_KEEP_TURNS (user turns always sent verbatim, default 4)
+    - HISTORY_FOLD_TURNS (evicted turns batched per summary update, default 2)
+    - HISTORY_SUMMARY_MAX_TOKENS (summary size, default 500)
+    - HISTORY_COMPACTION_ENABLED (default true)
+    """
+
+    def __init__(self, keep_turns: int = 4, fold_turns: int = 2, summary_max_tokens: int = 500, enabled: bool = True):
+        self.keep_turns = max(1, keep_turns)
+        self.fold_turns = max(1, fold_turns)
+        self.summary_max_tokens = summary_max_tokens
+        self.enabled = enabled
+
+    def _turn_starts(self, messages: List[Any], start: int) -> List[int]:
+        return [i for i in range(start, len(messages)) if to_llm_message(messages[i])["role"] == "user"]
+
+    def fold_range(self, messages: List[Any], summarized_count: int) -> Optional[Tuple[int, int]]:
+        """(start, end) of the messages due to be folded into the summary, or None"""
+        start = min(summarized_count, len(messages))
+        turns = self._turn_starts(messages, start)
+        if not self.enabled or len(turns) <= self.keep_turns + self.fold_turns - 1:
+            return None
+        end = turns[-self.keep_turns]
+        return (start, end) if end > start else None
+
+    def prompt_messages(self, messages: List[Any], summary: str = "", summarized_count: int = 0) -> List[Dict[str, str]]:
+        """Summary (as a system message) followed by the unsummarized messages"""
+        start = min(summarized_count, len(messages)) if summary else 0
+        recent = [to_llm_message(m) for m in messages[start:]]
+        if not summary:
+            return recent
+        return [{"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}, *recent]
+
+    async def fold(self, llm_service, messages: List[Any], summary: str = "", summarized_count: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Fold newly evicted turns into the summary
+
+        Returns:
+            State update ({"history_summary", "summarized_count"}), or None
+            when nothing is due or the summary call failed (the turns then
+            stay verbatim and are retried next time)
+        """
+        span = self.fold_range(messages, summarized_count)
+        if span is None:
+            return None
+        start, end = span
+
+        prompt = SUMMARY_PROMPT.format(
+            max_words=int(self.summary_max_tokens * 0.75),
+            summary=summary or "(empty)",
+            transcript=get_transcript_renderer().render(messages[start:end])
+        )
+        try:
+            response = await llm_service.chat_completion(
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+                max_tokens=self.summary_max_tokens,
+                cache=False
+            )
+            updated = (response.choices[0]["message"]["content"] or "").strip()
+        except Exception as e:
+            logger.warning(f"History summary update failed, keeping turns verbatim: {e}")
+            return None
+        if not updated:
+            return None
+
+        logger.info(f"History compacted: folded messages {start}-{end} into a {len(updated)}-char summary")
+        return {"history_summary": updated, "summarized_count": end}
+
+
+# Global instance (optional pattern)
+_transcript_renderer = None
+
+def get_transcript_renderer() -> TranscriptRenderer:
+    """Get or create TranscriptRenderer singleton"""
+    global _transcript_renderer
+    if _transcript_renderer is None:
+        _transcript_renderer = TranscriptRenderer(
+            max_message_chars=int(os.getenv("TRANSCRIPT_MAX_MESSAGE_CHARS", "4000"))
+        )
+    return _transcript_renderer
+
+
+# Global instance (optional pattern)
+_history_compactor = None
+
+def get_history_compactor() -> HistoryCompactor:
+    """Get or create HistoryCompactor singleton"""
+    global _history_compactor
+    if _history_compactor is None:
+        _history_compactor = HistoryCompactor(
+            keep_turns=int(os.getenv("HISTORY_KEEP_TURNS", "4")),
+            fold_turns=int(os.getenv("HISTORY_FOLD_TURNS", "2")),
+            summary_max_tokens=int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "500")),
+            enabled=os.getenv("HISTORY_COMPACTION_ENABLED", "true").lower() == "true"
+        )
+    return _history_compactor
@@ -0,0 +1,302 @@
+"""
+Indexing Job Queue - Background repository indexing
+Job IDs, bounded worker pool, priority, cancellation and per-path dedup
+"""
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timezone
+from enum import Enum
+from typing import List, Dict, Any, Optional, AsyncIterator
+from pydantic import BaseModel
+
+from services.mcp import get_mcp_service
+from services.repository_status import get_repository_status_cache
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of an indexing job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class IndexingJob(BaseModel):
+    """Indexing job snapshot"""
+    job_id: str
+    path: str
+    force: bool = False
+    priority: int = 0  # Higher runs first
+    status: JobStatus = JobStatus.QUEUED
+    progress: Optional[int] = None  # 0-100, as reported by MCP
+    file_count: Optional[int] = None
+    message: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class IndexingJobQueue:
+    """
+    Background indexing with a bounded worker pool
+
+    - `submit()` returns immediately with a job; a request for a path that
+      already has a queued/running job returns that job (dedup)
+    - Higher `priority` jobs are picked first, FIFO within a priority
+    - Running jobs poll MCP indexing status to publish progress
+    - `subscribe()` yields job snapshots on every change (used for SSE)
+
+    Configuration via environment variables:
+    - INDEXING_WORKERS (concurrent indexing jobs, default 2)
+    - INDEXING_PROGRESS_INTERVAL (seconds between progress polls, default 2)
+    - INDEXING_JOB_HISTORY (finished jobs kept for polling, default 200)
+    """
+
+    def __init__(self, workers: int = 2, progress_interval: float = 2.0, history_size: int = 200):
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.history_size = history_size
+
+        self._jobs: Dict[str, IndexingJob] = {}
+        self._active_by_path: Dict[str, str] = {}
+        self._running_tasks: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._seq = 0
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._worker_tasks = [
+                asyncio.create_task(self._worker(i)) for i in range(self.workers)
+            ]
+            logger.info(f"Indexing job queue started with {self.workers} worker(s)")
+
+    def _enqueue(self, job: IndexingJob):
+        self._seq += 1
+        self._queue.put_nowait((-job.priority, self._seq, job.job_id))
+
+    async def submit(self, path: str, force: bool = False, priority: int = 0) -> IndexingJob:
+        """
+        Queue a repository for indexing
+
+        Args:
+            path: Absolute path to repository
+            force: Force full re-indexing
+            priority: Higher values run first
+
+        Returns:
+            The new job, or the already active job for the same path
+        """
+        self._ensure_started()
+        key = os.path.normpath(path)
+
+        active_id = self._active_by_path.get(key)
+        if active_id is not None:
+            job = self._jobs[active_id]
+            if job.status == JobStatus.QUEUED:
+                job.force = job.force or force
+                if priority > job.priority:
+                    job.priority = priority
+                    self._enqueue(job)  # Stale heap entry is skipped by the worker
+            logger.info(f"Indexing already {job.status.value} for {path} (job {job.job_id})")
+            return job.model_copy()
+
+        job = IndexingJob(
+            job_id=uuid.uuid4().hex,
+            path=path,
+            force=force,
+            priority=priority,
+            created_at=_now()
+        )
+        self._jobs[job.job_id] = job
+        self._active_by_path[key] = job.job_id
+        self._enqueue(job)
+        self._trim_history()
+
+        logger.info(f"Queued indexing job {job.job_id} for {path} (priority {priority})")
+        self._publish(job)
+        return job.model_copy()
+
+    def get(self, job_id: str) -> Optional[IndexingJob]:
+        job = self._jobs.get(job_id)
+        return job.model_copy() if job else None
+
+    def list_jobs(self) -> List[IndexingJob]:
+        return [job.model_copy() for job in sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)]
+
+    async def cancel(self, job_id: str) -> Optional[IndexingJob]:
+        """Cancel a queued or running job (no-op for finished jobs)"""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            return job.model_copy() if job else None
+
+        task = self._running_tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        self._finish(job, JobStatus.CANCELLED, message="Cancelled by user")
+        return job.model_copy()
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[IndexingJob]:
+        """Yield the current snapshot, then every update until the job finishes"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            snapshot = job.model_copy()
+            while True:
+                yield snapshot
+                if snapshot.status in TERMINAL_STATUSES:
+                    break
+                snapshot = await queue.get()
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def _publish(self, job: IndexingJob):
+        for queue in self._subscribers.get(job.job_id, []):
+            queue.put_nowait(job.model_copy())
+
+    def _finish(self, job: IndexingJob, status: JobStatus, message: Optional[str] = None, error: Optional[str] = None):
+        job.status = status
+        job.finished_at = _now()
+        job.message = message or job.message
+        job.error = error
+        self._active_by_path.pop(os.path.normpath(job.path), None)
+        get_repository_status_cache().invalidate(job.path)
+        self._publish(job)
+
+    def _trim_history(self):
+        finished = [j for j in self._jobs.values() if j.status in TERMINAL_STATUSES]
+        for job in sorted(finished, key=lambda j: j.created_at)[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job.job_id]
+
+    async def _worker(self, worker_id: int):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                continue  # Cancelled, or a stale entry from a priority bump
+
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Indexing worker {worker_id} error on job {job_id}: {e}")
+                if job.status not in TERMINAL_STATUSES:
+                    self._finish(job, JobStatus.FAILED, message="Indexing failed", error=str(e))
+
+    async def _run(self, job: IndexingJob):
+        mcp_service = get_mcp_service()
+
+        job.status = JobStatus.RUNNING
+        job.started_at = _now()
+        job.message = "Indexing started"
+        self._publish(job)
+        logger.info(f"Indexing job {job.job_id} started: {job.path}")
+
+        task = asyncio.create_task(mcp_service.sync_codebase(path=job.path, force=job.force))
+        self._running_tasks[job.job_id] = task
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self.progress_interval)
+                if done:
+                    break
+                await self._poll_progress(mcp_service, job)
+
+            result = task.result()
+            job.file_count = result.get("file_count", result.get("files_indexed"))
+            job.progress = 100
+            if result.get("status") == "up_to_date":
+                message = "Repository already up to date"
+            else:
+                message = (
+                    f"Repository indexed successfully with {job.file_count or 0} files "
+                    f"(+{result.get('added', 0)} ~{result.get('changed', 0)} -{result.get('deleted', 0)})"
+                )
+            self._finish(job, JobStatus.COMPLETED, message=message)
+            logger.info(f"Indexing job {job.job_id} completed: {job.path}")
+        except asyncio.CancelledError:
+            if job.status != JobStatus.CANCELLED:
+                self._finish(job, JobStatus.CANCELLED, message="Cancelled")
+            if not task.done():
+                # The worker itself is being cancelled (shutdown)
+                task.cancel()
+                raise
+        except Exception as e:
+            logger.error(f"Indexing job {job.job_id} failed: {e}")
+            self._finish(job, JobStatus.FAILED, message="Indexing failed", error=str(e))
+        finally:
+            self._running_tasks.pop(job.job_id, None)
+
+    async def _poll_progress(self, mcp_service, job: IndexingJob):
+        try:
+            status = await mcp_service.get_indexing_status(job.path)
+        except Exception as e:
+            logger.debug(f"Progress poll failed for job {job.job_id}: {e}")
+            return
+
+        if status.progress != job.progress or status.file_count != job.file_count:
+            job.progress = status.progress
+            job.file_count = status.file_count
+            self._publish(job)
+
+    async def close(self):
+        """Cancel running jobs and stop workers"""
+        for job_id in list(self._running_tasks):
+            await self.cancel(job_id)
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "jobs": counts,
+        }
+
+
+# Global instance (optional pattern)
+_indexing_queue = None
+
+def get_indexing_queue() -> IndexingJobQueue:
+    """Get or create IndexingJobQueue singleton"""
+    global _indexing_queue
+    if _indexing_queue is None:
+        _indexing_queue = IndexingJobQueue(
+            workers=int(os.getenv("INDEXING_WORKERS", "2")),
+            progress_interval=float(os.getenv("INDEXING_PROGRESS_INTERVAL", "2")),
+            history_size=int(os.getenv("INDEXING_JOB_HISTORY", "200"))
+        )
+    return _indexing_queue
+
+
+async def close_indexing_queue():
+    """Close the indexing queue singleton if it was created"""
+    global _indexing_queue
+    if _indexing_queue is not None:
+        await _indexing_queue.close()
+        _indexing_queue = None
@@ -0,0 +1,280 @@
+"""
+Lexical Index - Local BM25 search over repository chunks
+Incrementally maintained inverted index persisted on disk, plus rank fusion helpers
+"""
+import os
+import json
+import math
+import asyncio
+import logging
+import shutil
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.cache import repo_index_dir
+from services.chunking import tokenize_code, chunk_text, read_text_file
+from services.manifest import iter_repository_files
+
+logger = logging.getLogger(__name__)
+
+# Natural-language filler that would otherwise match every chunk
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "what", "where", "with",
+}
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over one repository
+
+    Documents are the same line-window chunks as the vector index. Postings
+    are kept per document id so changed/deleted files can be removed and
+    re-added without rebuilding the whole index.
+    """
+
+    def __init__(self, repo_path: str, k1: float = 1.2, b: float = 0.75):
+        self.repo_path = repo_path
+        self.k1 = k1
+        self.b = b
+
+        self.docs: Dict[int, Tuple[str, int, str, int]] = {}  # id -> (file, line, content, length)
+        self.file_docs: Dict[str, List[int]] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}  # token -> {doc id: term frequency}
+        self.total_length = 0
+        self.next_id = 0
+
+    @property
+    def doc_count(self) -> int:
+        return len(self.docs)
+
+    def add_file(self, rel: str, text: str):
+        self.remove_file(rel)
+        ids = []
+        for line, content in chunk_text(text):
+            tokens = tokenize_code(content)
+            doc_id = self.next_id
+            self.next_id += 1
+            self.docs[doc_id] = (rel, line, content, len(tokens))
+            self.total_length += len(tokens)
+            for token, tf in Counter(tokens).items():
+                self.postings.setdefault(token, {})[doc_id] = tf
+            ids.append(doc_id)
+        self.file_docs[rel] = ids
+
+    def remove_file(self, rel: str):
+        for doc_id in self.file_docs.pop(rel, []):
+            _, _, content, length = self.docs.pop(doc_id)
+            self.total_length -= length
+            for token in set(tokenize_code(content)):
+                postings = self.postings.get(token)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[token]
+
+    def update(self, modified: List[str], deleted: List[str]):
+        """Re-read modified files and drop deleted ones"""
+        for rel in deleted:
+            self.remove_file(rel)
+        for rel in modified:
+            text = read_text_file(os.path.join(self.repo_path, rel))
+            if text is None:
+                self.remove_file(rel)
+            else:
+                self.add_file(rel, text)
+
+    def build(self, files: List[str]):
+        self.__init__(self.repo_path, self.k1, self.b)
+        self.update(files, [])
+
+    def copy(self) -> "BM25Index":
+        """Independent copy (postings included) that can be updated while this one is searched"""
+        index = BM25Index(self.repo_path, self.k1, self.b)
+        index.docs = dict(self.docs)
+        index.file_docs = dict(self.file_docs)
+        index.postings = {token: dict(postings) for token, postings in self.postings.items()}
+        index.total_length = self.total_length
+        index.next_id = self.next_id
+        return index
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        extension_filter: Optional[List[str]] = None
+    ) -> List[Tuple[str, int, str, float]]:
+        """Return top (file, line, content, score) chunks for the query"""
+        terms = [t for t in dict.fromkeys(tokenize_code(query)) if t not in STOPWORDS]
+        if not terms or not self.docs:
+            return []
+
+        n = self.doc_count
+        avgdl = self.total_length / n if n else 0.0
+        scores: Dict[int, float] = {}
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = self.docs[doc_id][3]
+                norm = tf + self.k1 * (1 - self.b + self.b * length / (avgdl or 1))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        if extension_filter:
+            allowed = tuple(extension_filter)
+            scores = {d: s for d, s in scores.items() if self.docs[d][0].endswith(allowed)}
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(*self.docs[d][:3], round(s, 4)) for d, s in top]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "next_id": self.next_id,
+            "total_length": self.total_length,
+            "docs": self.docs,
+            "file_docs": self.file_docs,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, repo_path: str, data: Dict[str, Any]) -> "BM25Index":
+        index = cls(repo_path)
+        index.next_id = data["next_id"]
+        index.total_length = data["total_length"]
+        index.docs = {int(k): tuple(v) for k, v in data["docs"].items()}
+        index.file_docs = data["file_docs"]
+        index.postings = {t: {int(d): tf for d, tf in p.items()} for t, p in data["postings"].items()}
+        return index
+
+
+class RepositoryIndexManager:
+    """
+    Loads, builds, updates and persists one local index kind per repository
+
+    Subclasses set `kind` (cache sub-directory), `index_class`, which must
+    provide build(files), update(modified, deleted), copy(), to_dict() and
+    from_dict(repo_path, data), and optionally extra file `extensions` to
+    cover. Indexes live under
+    CONTEXT2TASK_CACHE_DIR/<kind>/<hash>/index.json; a repository without a
+    stored index is built on first use.
+
+    A published index is never mutated: updates are applied to a copy that
+    replaces it once saved, so searches running in worker threads always
+    read a consistent snapshot without taking the lock.
+    """
+
+    kind: str
+    index_class: type
+    extensions: Optional[List[str]] = None
+
+    def __init__(self):
+        self._indexes: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _key(self, path: str) -> str:
+        return os.path.abspath(path)
+
+    def _lock(self, path: str) -> asyncio.Lock:
+        return self._locks.setdefault(self._key(path), asyncio.Lock())
+
+    def _load_or_build(self, path: str):
+        index_file = repo_index_dir(self.kind, path) / "index.json"
+        if index_file.exists():
+            try:
+                return self.index_class.from_dict(path, json.loads(index_file.read_text()))
+            except Exception as e:
+                logger.warning(f"Rebuilding unreadable {self.kind} index for {path}: {e}")
+
+        index = self.index_class(path)
+        index.build(list(iter_repository_files(path, self.extensions)))
+        self._save(index)
+        logger.info(f"{self.kind} index built for {path}")
+        return index
+
+    def _save(self, index):
+        index_file = repo_index_dir(self.kind, index.repo_path) / "index.json"
+        tmp = index_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index.to_dict()))
+        tmp.replace(index_file)
+
+    async def get(self, path: str):
+        key = self._key(path)
+        if key not in self._indexes:
+            async with self._lock(path):
+                if key not in self._indexes:
+                    self._indexes[key] = await asyncio.to_thread(self._load_or_build, path)
+        return self._indexes[key]
+
+    async def update(self, path: str, modified: List[str], deleted: List[str]):
+        """Apply file changes (e.g. from a manifest diff) to a copy, persist it and swap it in"""
+        await self.get(path)
+        key = self._key(path)
+        async with self._lock(path):
+            index = self._indexes.get(key)
+            if index is None:
+                return  # Cleared meanwhile; rebuilt from the working tree on next use
+
+            def apply():
+                updated = index.copy()
+                updated.update(modified, deleted)
+                self._save(updated)
+                return updated
+
+            self._indexes[key] = await asyncio.to_thread(apply)
+
+    async def rebuild(self, path: str, files: Optional[List[str]] = None):
+        """Build the index from scratch (all repository files unless `files` is given)"""
+        async with self._lock(path):
+            index = self.index_class(path)
+            if files is None:
+                files = await asyncio.to_thread(lambda: list(iter_repository_files(path, self.extensions)))
+            await asyncio.to_thread(index.build, files)
+            await asyncio.to_thread(self._save, index)
+            self._indexes[self._key(path)] = index
+
+    def clear(self, path: str):
+        self._indexes.pop(self._key(path), None)
+        shutil.rmtree(repo_index_dir(self.kind, path), ignore_errors=True)
+
+
+class LexicalIndexManager(RepositoryIndexManager):
+    """BM25 indexes per repository (CONTEXT2TASK_CACHE_DIR/bm25/<hash>/)"""
+
+    kind = "bm25"
+    index_class = BM25Index
+
+    async def search(
+        self,
+        path: str,
+        query: str,
+        limit: int = 10,
+        extension_filter: Optional[List[str]] = None
+    ) -> List[Tuple[str, int, str, float]]:
+        index = await self.get(path)
+        return await asyncio.to_thread(index.search, query, limit, extension_filter)
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Any]], k: int = 60, limit: int = 10) -> List[Tuple[Any, float]]:
+    """
+    Fuse ranked lists with Reciprocal Rank Fusion: score = Σ 1 / (k + rank)
+
+    Items are identified by their (file, line) attributes; the first occurrence
+    is kept as the representative.
+
+    Returns:
+        (item, fused score) pairs, best first
+    """
+    fused: Dict[Tuple[str, int], float] = {}
+    items: Dict[Tuple[str, int], Any] = {}
+
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            key = (item.file, item.line)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(key, item)
+
+    ranked = sorted(fused.items(), key=lambda entry: entry[1], reverse=True)[:limit]
+    return [(items[key], score) for key, score in ranked]
@@ -4,12 +4,23 @@ Primary: Google Gemini (Direct API)
 Fallback: OpenRouter
 """
 import os
+import json
+import time
+import uuid
+import asyncio
 import httpx
 import logging
-from typing import Dict, List, Optional, Any
+from collections import deque
+from typing import Dict, List, Optional, Any, AsyncIterator, Tuple
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 
+from services.cache import TTLCache
+from services.llm_cache import get_llm_response_cache, response_cache_key
+from services.provider_health import ProviderHealthTracker, CircuitOpenError
+from services.rate_limiter import RateLimitExceeded, rate_limiter_from_env
+from services.single_flight import SingleFlight
+
 try:
     import google.generativeai as genai
     GOOGLE_AI_AVAILABLE = True
@@ -32,6 +43,17 @@ class LLMResponse(BaseModel):
     choices: List[Dict[str, Any]]
     model: str
     usage: Optional[Dict[str, Any]] = None
+    cached: bool = False  # Served from the response cache (no provider call)
+
+
+class LLMStreamChunk(BaseModel):
+    """One streamed completion delta (normalized across providers)"""
+    id: str
+    model: str
+    provider: str
+    delta: str = ""
+    finish_reason: Optional[str] = None  # Set on the last chunk only
+    usage: Optional[Dict[str, Any]] = None  # Set on the last chunk only
 
 
 class LLMProvider(ABC):
@@ -44,9 +66,28 @@ class LLMProvider(ABC):
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 4000,
-        response_format: Optional[Dict[str, str]] = None
+        response_format: Optional[Dict[str, str]] = None,
+        session_id: Optional[str] = None
     ) -> LLMResponse:
-        """Create chat completion"""
+        """
+        Create chat completion
+        
+        `session_id` lets providers keep per-conversation state between
+        calls; providers without such state ignore it.
+        """
+        pass
+    
+    @abstractmethod
+    def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        response_format: Optional[Dict[str, str]] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Stream chat completion deltas; the last chunk carries finish_reason and usage"""
         pass
     
     @abstractmethod
@@ -55,20 +96,111 @@ class LLMProvider(ABC):
         pass
 
 
+class GeminiSessionHistory:
+    """
+    Converted Gemini history of one conversation
+    
+    Keeps the raw (non-system) messages already converted, their
+    `protos.Content` entries and, after each raw message, the number of
+    entries so far, so a later call only converts the messages past the
+    longest common prefix.
+    """
+    
+    def __init__(self):
+        self.messages: List[Dict[str, str]] = []
+        self.contents: List[Any] = []
+        self.marks: List[int] = []
+    
+    def common_prefix(self, messages: List[Dict[str, str]]) -> int:
+        k = 0
+        for old, new in zip(self.messages, messages):
+            if old != new:
+                break
+            k += 1
+        return k
+    
+    def truncate(self, k: int):
+        entries = self.marks[k - 1] if k else 0
+        del self.messages[k:], self.marks[k:], self.contents[entries:]
+    
+    def append(self, message: Dict[str, str], content: Any):
+        self.messages.append(dict(message))
+        if content is not None:
+            self.contents.append(content)
+        self.marks.append(len(self.contents))
+
+
+def gemini_system_instruction(messages: List[Dict[str, str]]) -> Tuple[Optional[str], List[Dict[str, str]]]:
+    """
+    Split OpenAI-style messages into (system instruction, conversation turns)
+    
+    All system messages (persona, context, history summary) are joined in
+    order; they change from turn to turn, so keeping them out of the turns
+    lets a session reuse its converted history.
+    """
+    system = [m["content"] for m in messages if m["role"] == "system"]
+    turns = [m for m in messages if m["role"] != "system"]
+    return "\n\n".join(system) or None, turns
+
+
+def gemini_turn(message: Dict[str, str], pending_system: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Convert one OpenAI-style message given the pending system prompt
+    
+    Returns (Gemini message or None, new pending system prompt).
+    """
+    role = message["role"]
+    content = message["content"]
+    
+    if role == "system":
+        # Consecutive system messages (persona, context, history summary) are all kept
+        return None, f"{pending_system}\n\n{content}" if pending_system else content
+    if role == "user":
+        # Prepend system prompt to first user message
+        if pending_system:
+            content = f"{pending_system}\n\n{content}"
+        return {"role": "user", "parts": [content]}, None
+    if role == "assistant":
+        return {"role": "model", "parts": [content]}, pending_system
+    return None, pending_system
+
+
 class GoogleGeminiProvider(LLMProvider):
     """
     Google Gemini Direct API Provider
     
     Uses official google-generativeai SDK
     Free tier: https://aistudio.google.com/apikey
+    
+    - System messages go to the model's `system_instruction`
+    - `GenerativeModel` instances are reused per (model, generation config,
+      system instruction)
+    - Calls with a `session_id` reuse that conversation's converted
+      history and only convert the new turns
+    
+    Configuration via environment variables:
+    - GEMINI_MODEL_CACHE_SIZE (model instances kept, default 16)
+    - GEMINI_SESSION_CACHE_SIZE (conversation histories kept, default 128)
+    - GEMINI_SESSION_TTL (seconds an idle history is kept, default 3600)
     """
     
-    def __init__(self, api_key: str, default_model: str = "gemini-1.5-flash"):
+    def __init__(
+        self,
+        api_key: str,
+        default_model: str = "gemini-1.5-flash",
+        model_cache_size: int = 16,
+        session_cache_size: int = 128,
+        session_ttl: float = 3600.0
+    ):
         if not GOOGLE_AI_AVAILABLE:
             raise ImportError("google-generativeai package not installed")
         
         self.api_key = api_key
         self.default_model = default_model
+        self.models = TTLCache(maxsize=model_cache_size, ttl=float("inf"))
+        self.sessions = TTLCache(maxsize=session_cache_size, ttl=session_ttl)
+        self.turns_reused = 0
+        self.turns_converted = 0
         genai.configure(api_key=api_key)
         logger.info(f"GoogleGeminiProvider initialized with model: {default_model}")
     
@@ -84,59 +216,124 @@ class GoogleGeminiProvider(LLMProvider):
         system_prompt = None
         
         for msg in messages:
-            role = msg["role"]
-            content = msg["content"]
-            
-            if role == "system":
-                system_prompt = content
-            elif role == "user":
-                # Prepend system prompt to first user message
-                if system_prompt:
-                    content = f"{system_prompt}\n\n{content}"
-                    system_prompt = None
-                gemini_messages.append({"role": "user", "parts": [content]})
-            elif role == "assistant":
-                gemini_messages.append({"role": "model", "parts": [content]})
+            converted, system_prompt = gemini_turn(msg, system_prompt)
+            if converted:
+                gemini_messages.append(converted)
         
         return gemini_messages
     
+    @staticmethod
+    def _to_content(message: Dict[str, Any]):
+        return genai.protos.Content(
+            role=message["role"],
+            parts=[genai.protos.Part(text=text) for text in message["parts"]]
+        )
+    
+    def _history_contents(
+        self,
+        messages: List[Dict[str, str]],
+        session_id: Optional[str]
+    ) -> Tuple[Optional[str], List[Any], Optional[GeminiSessionHistory]]:
+        """System instruction and Gemini contents for `messages`, converting only turns the session hasn't seen"""
+        system_instruction, turns = gemini_system_instruction(messages)
+        history = self.sessions.get(session_id) if session_id else None
+        if history is None:
+            history = GeminiSessionHistory()
+        
+        reused = history.common_prefix(turns)
+        history.truncate(reused)
+        for msg in turns[reused:]:
+            converted, _ = gemini_turn(msg, None)
+            history.append(msg, self._to_content(converted) if converted else None)
+        
+        self.turns_reused += reused
+        self.turns_converted += len(turns) - reused
+        if session_id:
+            self.sessions.set(session_id, history)
+            return system_instruction, list(history.contents), history
+        return system_instruction, history.contents, None
+    
+    def _get_model(self, model_name: str, generation_config: Dict[str, Any], system_instruction: Optional[str] = None):
+        key = (model_name, tuple(sorted(generation_config.items())), system_instruction)
+        model_instance = self.models.get(key)
+        if model_instance is None:
+            model_instance = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=generation_config,
+                system_instruction=system_instruction
+            )
+            self.models.set(key, model_instance)
+        return model_instance
+    
+    def _start_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+        session_id: Optional[str] = None
+    ):
+        """Build the Gemini chat session; returns (chat, last message, session history)"""
+        system_instruction, contents, history = self._history_contents(messages, session_id)
+        
+        # Configure generation
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+        }
+        
+        # JSON mode support (if requested)
+        if response_format and response_format.get("type") == "json_object":
+            generation_config["response_mime_type"] = "application/json"
+        
+        # Start chat with history (a fresh ChatSession per call: cached state is never mutated by the SDK)
+        chat = self._get_model(model_name, generation_config, system_instruction).start_chat(history=contents[:-1])
+        return chat, contents[-1], history
+    
+    def _record_reply(self, history: Optional[GeminiSessionHistory], text: str):
+        """Add the model's answer to the session so the next turn reuses it"""
+        if history is not None:
+            reply = {"role": "assistant", "content": text}
+            history.append(reply, self._to_content({"role": "model", "parts": [text]}))
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": self.models.stats(),
+            "sessions": self.sessions.stats(),
+            "turns_reused": self.turns_reused,
+            "turns_converted": self.turns_converted,
+        }
+    
+    @staticmethod
+    def _usage(response) -> Dict[str, int]:
+        metadata = getattr(response, "usage_metadata", None)
+        return {
+            "prompt_tokens": metadata.prompt_token_count if metadata else 0,
+            "completion_tokens": metadata.candidates_token_count if metadata else 0,
+            "total_tokens": metadata.total_token_count if metadata else 0,
+        }
+    
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 4000,
-        response_format: Optional[Dict[str, str]] = None
+        response_format: Optional[Dict[str, str]] = None,
+        session_id: Optional[str] = None
     ) -> LLMResponse:
         """Create chat completion using Google Gemini API"""
         model_name = model or self.default_model
         
         try:
-            # Convert messages to Gemini format
-            gemini_messages = self._convert_messages_to_gemini_format(messages)
-            
-            # Configure generation
-            generation_config = {
-                "temperature": temperature,
-                "max_output_tokens": max_tokens,
-            }
-            
-            # JSON mode support (if requested)
-            if response_format and response_format.get("type") == "json_object":
-                generation_config["response_mime_type"] = "application/json"
-            
-            # Create model and generate
-            model_instance = genai.GenerativeModel(
-                model_name=model_name,
-                generation_config=generation_config
+            chat, last_message, history = self._start_chat(
+                messages, model_name, temperature, max_tokens, response_format, session_id
             )
             
-            # Start chat with history
-            chat = model_instance.start_chat(history=gemini_messages[:-1] if len(gemini_messages) > 1 else [])
-            
             # Send last message
-            last_message = gemini_messages[-1]["parts"][0]
             response = await chat.send_message_async(last_message)
+            self._record_reply(history, response.text)
             
             # Normalize response to LLMResponse format
             normalized = LLMResponse(
@@ -149,11 +346,7 @@ class GoogleGeminiProvider(LLMProvider):
                     },
                     "finish_reason": "stop"
                 }],
-                usage={
-                    "prompt_tokens": response.usage_metadata.prompt_token_count if hasattr(response, 'usage_metadata') else 0,
-                    "completion_tokens": response.usage_metadata.candidates_token_count if hasattr(response, 'usage_metadata') else 0,
-                    "total_tokens": response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else 0,
-                }
+                usage=self._usage(response)
             )
             
             logger.info(f"Google Gemini response: {model_name} - {normalized.usage}")
@@ -163,6 +356,46 @@ class GoogleGeminiProvider(LLMProvider):
             logger.error(f"Google Gemini API error: {str(e)}")
             raise
     
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        response_format: Optional[Dict[str, str]] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Stream chat completion using Google Gemini API (stream=True)"""
+        model_name = model or self.default_model
+        stream_id = f"gemini-{uuid.uuid4().hex[:12]}"
+        
+        try:
+            chat, last_message, history = self._start_chat(
+                messages, model_name, temperature, max_tokens, response_format, session_id
+            )
+            response = await chat.send_message_async(last_message, stream=True)
+            
+            parts = []
+            async for part in response:
+                try:
+                    text = part.text
+                except ValueError:
+                    text = ""  # Chunk without text parts (e.g. safety metadata only)
+                if text:
+                    parts.append(text)
+                    yield LLMStreamChunk(id=stream_id, model=model_name, provider="google", delta=text)
+            
+            self._record_reply(history, "".join(parts))
+            usage = self._usage(response)
+            logger.info(f"Google Gemini stream finished: {model_name} - {usage}")
+            yield LLMStreamChunk(
+                id=stream_id, model=model_name, provider="google", finish_reason="stop", usage=usage
+            )
+        
+        except Exception as e:
+            logger.error(f"Google Gemini streaming error: {str(e)}")
+            raise
+    
     async def close(self):
         """No cleanup needed for Google API"""
         pass
@@ -182,24 +415,22 @@ class OpenRouterProvider(LLMProvider):
         self.client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
         logger.info(f"OpenRouterProvider initialized with model: {default_model}")
     
-    async def chat_completion(
-        self,
-        messages: List[Dict[str, str]],
-        model: Optional[str] = None,
-        temperature: float = 0.7,
-        max_tokens: int = 4000,
-        response_format: Optional[Dict[str, str]] = None
-    ) -> LLMResponse:
-        """Create chat completion using OpenRouter API"""
-        model_name = model or self.default_model
-        
-        headers = {
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "https://context2task.local",
             "X-Title": "Context2Task"
         }
-        
+    
+    @staticmethod
+    def _payload(
+        messages: List[Dict[str, str]],
+        model_name: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]]
+    ) -> Dict[str, Any]:
         payload = {
             "model": model_name,
             "messages": messages,
@@ -210,6 +441,23 @@ class OpenRouterProvider(LLMProvider):
         if response_format:
             payload["response_format"] = response_format
         
+        return payload
+    
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        response_format: Optional[Dict[str, str]] = None,
+        session_id: Optional[str] = None
+    ) -> LLMResponse:
+        """Create chat completion using OpenRouter API"""
+        model_name = model or self.default_model
+        
+        headers = self._headers()
+        payload = self._payload(messages, model_name, temperature, max_tokens, response_format)
+        
         try:
             logger.debug(f"OpenRouter request: {model_name} with {len(messages)} messages")
             
@@ -232,11 +480,95 @@ class OpenRouterProvider(LLMProvider):
             logger.error(f"OpenRouter request failed: {str(e)}")
             raise
     
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        response_format: Optional[Dict[str, str]] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """Stream chat completion using OpenRouter SSE (stream=true)"""
+        model_name = model or self.default_model
+        payload = self._payload(messages, model_name, temperature, max_tokens, response_format)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        
+        stream_id = f"openrouter-{uuid.uuid4().hex[:12]}"
+        finish_reason = None
+        usage = None
+        
+        try:
+            logger.debug(f"OpenRouter stream request: {model_name} with {len(messages)} messages")
+            
+            async with self.client.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers=self._headers(),
+                json=payload
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    # Blank separators and ": OPENROUTER PROCESSING" keep-alive comments
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    event = json.loads(data)
+                    if "error" in event:
+                        raise RuntimeError(f"OpenRouter stream error: {event['error']}")
+                    stream_id = event.get("id", stream_id)
+                    model_name = event.get("model", model_name)
+                    usage = event.get("usage") or usage
+                    for choice in event.get("choices", []):
+                        finish_reason = choice.get("finish_reason") or finish_reason
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            yield LLMStreamChunk(id=stream_id, model=model_name, provider="openrouter", delta=delta)
+            
+            logger.info(f"OpenRouter stream finished: {model_name} - {usage}")
+            yield LLMStreamChunk(
+                id=stream_id, model=model_name, provider="openrouter",
+                finish_reason=finish_reason or "stop", usage=usage
+            )
+        
+        except httpx.HTTPStatusError as e:
+            logger.error(f"OpenRouter HTTP error: {e.response.status_code} - {e.response.text}")
+            raise
+        except Exception as e:
+            logger.error(f"OpenRouter stream failed: {str(e)}")
+            raise
+    
     async def close(self):
         """Close HTTP client"""
         await self.client.aclose()
 
 
+class LatencyWindow:
+    """Latencies (seconds) of the most recent successful calls"""
+    
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+    
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
 class LLMService:
     """
     Multi-Provider LLM Service with automatic fallback
@@ -244,9 +576,26 @@ class LLMService:
     Primary: Google Gemini (direct API, free tier available)
     Fallback: OpenRouter (if Google fails or not configured)
     
+    Providers are tried best-first by health (EWMA latency and error rate,
+    see `ProviderHealthTracker`); providers with an open circuit are
+    skipped until a probe succeeds.
+    
+    Optional hedging: when the primary has not answered within its
+    latency percentile, the same request also goes to the next provider;
+    the first answer wins and the other is cancelled. Only the slowest
+    few percent of calls are duplicated.
+    
     Configuration via environment variables:
     - GOOGLE_API_KEY + GOOGLE_MODEL (primary)
     - OPENROUTER_API_KEY + OPENROUTER_MODEL (fallback)
+    - LLM_HEDGE_ENABLED (default false)
+    - LLM_HEDGE_PERCENTILE (primary latency percentile that triggers the hedge, default 0.95)
+    - LLM_HEDGE_MIN_DELAY (never hedge earlier than this, seconds, default 2)
+    - LLM_HEDGE_DEFAULT_DELAY (hedge delay until 20 latencies are known, seconds, default 15)
+    - LLM_HEALTH_EWMA_ALPHA, LLM_BREAKER_FAILURES, LLM_BREAKER_ERROR_RATE,
+      LLM_BREAKER_COOLDOWN, LLM_PROVIDER_REORDER (see `ProviderHealthTracker`)
+    - LLM_RATE_LIMITS, LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_TPM,
+      LLM_RATE_LIMIT_MAX_WAIT (see `ProviderRateLimiter`)
     """
     
     def __init__(self):
@@ -258,7 +607,13 @@ class LLMService:
         
         if google_key and GOOGLE_AI_AVAILABLE:
             try:
-                self.providers.append(GoogleGeminiProvider(google_key, google_model))
+                self.providers.append(GoogleGeminiProvider(
+                    google_key,
+                    google_model,
+                    model_cache_size=int(os.getenv("GEMINI_MODEL_CACHE_SIZE", "16")),
+                    session_cache_size=int(os.getenv("GEMINI_SESSION_CACHE_SIZE", "128")),
+                    session_ttl=float(os.getenv("GEMINI_SESSION_TTL", "3600"))
+                ))
                 logger.info("✅ Google Gemini provider initialized (PRIMARY)")
             except Exception as e:
                 logger.warning(f"Failed to initialize Google Gemini: {e}")
@@ -282,6 +637,31 @@ class LLMService:
                 "No LLM providers available. Set GOOGLE_API_KEY or OPENROUTER_API_KEY"
             )
         
+        # Provider health: EWMA latency/error rate, circuit breaker, ordering
+        self.health = ProviderHealthTracker(
+            alpha=float(os.getenv("LLM_HEALTH_EWMA_ALPHA", "0.2")),
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "3")),
+            error_rate_threshold=float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5")),
+            cooldown=float(os.getenv("LLM_BREAKER_COOLDOWN", "30")),
+            reorder=os.getenv("LLM_PROVIDER_REORDER", "true").lower() == "true"
+        )
+        
+        # Per provider/model RPM + TPM quotas (see `ProviderRateLimiter`)
+        self.rate_limiter = rate_limiter_from_env()
+        
+        # Identical concurrent calls share one request (keyed like the response cache)
+        self.flights = SingleFlight("llm")
+        
+        # Hedged requests (see `_hedged_completion`)
+        self.hedging = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+        self.hedge_min_delay = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2"))
+        self.hedge_default_delay = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "15"))
+        self.hedge_min_samples = 20
+        self.latency: Dict[str, LatencyWindow] = {}
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        
         logger.info(f"LLMService ready with {len(self.providers)} provider(s)")
     
     async def chat_completion(
@@ -291,39 +671,304 @@ class LLMService:
         temperature: float = 0.7,
         max_tokens: int = 4000,
         response_format: Optional[Dict[str, str]] = None,
-        stream: bool = False
+        stream: bool = False,
+        session_id: Optional[str] = None,
+        cache: Optional[bool] = None
     ) -> LLMResponse:
         """
         Create chat completion with automatic provider fallback
         
-        Tries providers in order (Google → OpenRouter) until one succeeds
+        Tries providers in health order (Google → OpenRouter by default)
+        until one succeeds. With `stream=True` the completion is fetched over the streaming API
+        and collected into one response. `session_id` lets providers reuse
+        per-conversation state (Gemini chat history).
+        
+        `cache` controls the response cache: None caches JSON-mode calls
+        only (structured analyses that are re-run on identical input),
+        True/False force it on/off for this call.
         """
+        response_cache = get_llm_response_cache()
+        if cache is None:
+            cache = bool(response_format and response_format.get("type") == "json_object")
+        use_cache = cache and response_cache is not None
+        key = response_cache_key(messages, model, temperature, response_format, max_tokens)
+        if use_cache:
+            cached = await response_cache.get(key)
+            if cached is not None:
+                logger.debug(f"LLM response cache hit ({key[:12]})")
+                return LLMResponse(**{**cached, "cached": True})
+        
+        async def complete() -> LLMResponse:
+            response = await self._complete(
+                messages, model, temperature, max_tokens, response_format, stream, session_id
+            )
+            if use_cache:
+                await response_cache.set(key, response.model_dump(exclude={"cached"}))
+            return response
+        
+        # Identical calls already in flight (double submits, parallel sessions) share one request
+        return await self.flights.do(key, complete)
+    
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+        stream: bool,
+        session_id: Optional[str]
+    ) -> LLMResponse:
+        """Uncached completion with provider fallback"""
+        if stream:
+            return await collect_stream(self.stream_completion(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                session_id=session_id
+            ))
+        
+        call = dict(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+            session_id=session_id
+        )
         last_error = None
+        providers = self._ordered_providers()
         
-        for i, provider in enumerate(self.providers):
+        if self.hedging and len(providers) > 1:
+            try:
+                return await self._hedged_completion(providers[0], providers[1], call)
+            except Exception as e:
+                last_error = e
+                providers = providers[2:]
+        
+        for i, provider in enumerate(providers):
             provider_name = provider.__class__.__name__
             try:
-                logger.debug(f"Trying provider {i+1}/{len(self.providers)}: {provider_name}")
-                response = await provider.chat_completion(
+                logger.debug(f"Trying provider {i+1}/{len(providers)}: {provider_name}")
+                return await self._timed_completion(provider, call)
+            
+            except Exception as e:
+                last_error = e
+                logger.warning(f"{provider_name} failed: {str(e)}")
+                if i < len(providers) - 1:
+                    logger.info(f"Falling back to next provider...")
+                continue
+        
+        # All providers failed
+        logger.error(f"All {len(self.providers)} provider(s) failed")
+        raise last_error or Exception("No providers available")
+    
+    def _ordered_providers(self) -> List[LLMProvider]:
+        """Providers whose circuit allows a call, best first"""
+        providers = self.health.order(self.providers, lambda p: p.__class__.__name__)
+        if not providers:
+            raise CircuitOpenError("All LLM provider circuits are open")
+        return providers
+    
+    async def _admit(self, provider: LLMProvider, call: Dict[str, Any]) -> Tuple[str, Optional[str], int]:
+        """Claim a circuit slot, then wait for rate-limit quota; returns (name, model, estimated tokens)"""
+        name = provider.__class__.__name__
+        model = call.get("model") or getattr(provider, "default_model", None)
+        estimated = self._estimate_usage(call["messages"], "")["prompt_tokens"]
+        self.health.acquire(name)  # CircuitOpenError before any quota is reserved
+        try:
+            await self.rate_limiter.acquire(name, model, estimated)
+        except (RateLimitExceeded, asyncio.CancelledError):
+            self.health.release(name)  # Never called: no verdict
+            raise
+        return name, model, estimated
+    
+    def _record_failure(self, name: str, model: Optional[str], error: Exception):
+        self.health.record_failure(name, error)
+        if _is_rate_limited(error):
+            self.rate_limiter.throttled(name, model)
+    
+    async def _timed_completion(self, provider: LLMProvider, call: Dict[str, Any]) -> LLMResponse:
+        """Provider call gated by the rate limiter, feeding the health tracker"""
+        name, model, estimated = await self._admit(provider, call)
+        started = time.perf_counter()
+        try:
+            response = await provider.chat_completion(**call)
+        except asyncio.CancelledError:
+            self.health.release(name)  # Cancelled (e.g. lost a hedge): no verdict
+            self.rate_limiter.refund(name, model, estimated)
+            raise
+        except Exception as e:
+            self._record_failure(name, model, e)
+            raise
+        
+        latency = time.perf_counter() - started
+        self.health.record_success(name, latency)
+        self.latency.setdefault(name, LatencyWindow()).record(latency)
+        self.rate_limiter.settle(name, model, estimated, (response.usage or {}).get("total_tokens"))
+        return response
+    
+    def _hedge_delay(self, provider: LLMProvider) -> float:
+        """Seconds to wait for `provider` before hedging (its latency percentile once known)"""
+        window = self.latency.get(provider.__class__.__name__)
+        if window is None or len(window) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, window.percentile(self.hedge_percentile))
+    
+    async def _hedged_completion(self, primary: LLMProvider, backup: LLMProvider, call: Dict[str, Any]) -> LLMResponse:
+        """
+        Send to `primary`; if it is slower than its latency percentile, also
+        send to `backup`. The first successful answer wins and the other
+        request is cancelled. A primary that fails before the hedge fires
+        falls back to `backup` as usual.
+        """
+        delay = self._hedge_delay(primary)
+        primary_task = asyncio.create_task(self._timed_completion(primary, call))
+        tasks = [primary_task]
+        
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                if primary_task.exception() is None:
+                    return primary_task.result()
+                logger.warning(f"{primary.__class__.__name__} failed: {str(primary_task.exception())}")
+                logger.info("Falling back to next provider...")
+                return await self._timed_completion(backup, call)
+            
+            self.hedges_sent += 1
+            logger.info(
+                f"{primary.__class__.__name__} slower than {delay:.1f}s, "
+                f"hedging with {backup.__class__.__name__}"
+            )
+            backup_task = asyncio.create_task(self._timed_completion(backup, call))
+            tasks.append(backup_task)
+            
+            last_error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                errors = {task: task.exception() for task in done}
+                for task, error in errors.items():
+                    if error is None:
+                        if task is backup_task:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = error
+                    logger.warning(f"Hedged request failed: {str(error)}")
+            raise last_error
+        
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "providers": [p.__class__.__name__ for p in self.providers],
+            "provider_order": [
+                p.__class__.__name__ for p in self.health.order(self.providers, lambda p: p.__class__.__name__)
+            ],
+            "provider_health": self.health.stats(),
+            "rate_limits": self.rate_limiter.stats(),
+            "single_flight": self.flights.stats(),
+            "hedging": self.hedging,
+            "hedges_sent": self.hedges_sent,
+            "hedge_wins": self.hedge_wins,
+            "latency_p50": {name: round(w.percentile(0.5), 3) for name, w in self.latency.items()},
+            "latency_p95": {name: round(w.percentile(0.95), 3) for name, w in self.latency.items()},
+        }
+    
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        response_format: Optional[Dict[str, str]] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Stream chat completion with automatic provider fallback
+        
+        A provider that fails before yielding its first token is skipped
+        for the next one; once text has been streamed to the caller,
+        errors propagate (the partial answer cannot be retracted). The
+        last chunk always carries usage, estimated when the provider
+        reports none.
+        """
+        last_error = None
+        providers = self._ordered_providers()
+        
+        for i, provider in enumerate(providers):
+            provider_name = provider.__class__.__name__
+            streamed = []
+            acquired = False
+            settled = False
+            model_name = model
+            try:
+                logger.debug(f"Streaming from provider {i+1}/{len(providers)}: {provider_name}")
+                _, model_name, estimated = await self._admit(provider, {"messages": messages, "model": model})
+                acquired = True
+                started = time.perf_counter()
+                async for chunk in provider.stream_completion(
                     messages=messages,
                     model=model,
                     temperature=temperature,
                     max_tokens=max_tokens,
-                    response_format=response_format
-                )
-                return response
+                    response_format=response_format,
+                    session_id=session_id
+                ):
+                    if chunk.finish_reason is not None:
+                        if not chunk.usage:
+                            chunk.usage = self._estimate_usage(messages, "".join(streamed))
+                        self.rate_limiter.settle(provider_name, model_name, estimated, chunk.usage.get("total_tokens"))
+                        settled = True
+                    if chunk.delta:
+                        streamed.append(chunk.delta)
+                    yield chunk
+                self.health.record_success(provider_name, time.perf_counter() - started)
+                return
             
+            except (asyncio.CancelledError, GeneratorExit):
+                if acquired and not settled:
+                    self.rate_limiter.refund(provider_name, model_name, estimated)  # Abandoned before settling
+                raise
+            except (CircuitOpenError, RateLimitExceeded) as e:
+                last_error = e
+                logger.info(f"Skipping {provider_name}: {str(e)}")
+                continue
             except Exception as e:
+                self._record_failure(provider_name, model_name, e)
+                if streamed:
+                    logger.error(f"{provider_name} failed mid-stream after {len(streamed)} chunk(s): {str(e)}")
+                    raise
                 last_error = e
-                logger.warning(f"{provider_name} failed: {str(e)}")
-                if i < len(self.providers) - 1:
-                    logger.info(f"Falling back to next provider...")
+                logger.warning(f"{provider_name} stream failed: {str(e)}")
+                if i < len(providers) - 1:
+                    logger.info("Falling back to next provider...")
                 continue
+            finally:
+                if acquired:
+                    self.health.release(provider_name)  # Abandoned streams leave no probe hanging
         
         # All providers failed
         logger.error(f"All {len(self.providers)} provider(s) failed")
         raise last_error or Exception("No providers available")
     
+    @staticmethod
+    def _estimate_usage(messages: List[Dict[str, str]], completion: str) -> Dict[str, Any]:
+        """Rough usage (4 chars/token) for providers that report none"""
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        completion_tokens = len(completion) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "estimated": True,
+        }
+    
     async def close(self):
         """Close all provider resources"""
         for provider in self.providers:
@@ -334,6 +979,34 @@ class LLMService:
         logger.info("LLMService closed")
 
 
+def _is_rate_limited(error: Exception) -> bool:
+    """Whether a provider error is a quota/429 response"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429
+    text = f"{type(error).__name__} {error}"
+    return "429" in text or "ResourceExhausted" in text or "RESOURCE_EXHAUSTED" in text
+
+
+async def collect_stream(chunks: AsyncIterator[LLMStreamChunk]) -> LLMResponse:
+    """Collect a chunk stream into a normal LLMResponse"""
+    parts = []
+    last = None
+    async for chunk in chunks:
+        parts.append(chunk.delta)
+        last = chunk
+    if last is None:
+        raise ValueError("Empty completion stream")
+    return LLMResponse(
+        id=last.id,
+        model=last.model,
+        choices=[{
+            "message": {"role": "assistant", "content": "".join(parts)},
+            "finish_reason": last.finish_reason or "stop"
+        }],
+        usage=last.usage
+    )
+
+
 # Global instance (optional pattern)
 _llm_service = None
 
@@ -345,4 +1018,6 @@ def get_llm_service() -> LLMService:
     return _llm_service
 
 
-
+def get_llm_service_stats() -> Optional[Dict[str, Any]]:
+    """Service metrics if the service has been created (never creates it)"""
+    return _llm_service.stats() if _llm_service is not None else None
@@ -0,0 +1,160 @@
+"""
+LLM Response Cache - Reuse completions for identical requests
+In-memory LRU with an optional on-disk tier, keyed by a hash of the normalized request
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from services.cache import TTLCache, get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Messages with formatting-only differences removed (line endings, trailing spaces, edge blank lines)"""
+    normalized = []
+    for m in messages:
+        content = (m.get("content") or "").replace("\r\n", "\n")
+        content = "\n".join(line.rstrip() for line in content.split("\n")).strip()
+        normalized.append({"role": m.get("role", "user"), "content": content})
+    return normalized
+
+
+def response_cache_key(
+    messages: List[Dict[str, str]],
+    model: Optional[str],
+    temperature: float,
+    response_format: Optional[Dict[str, str]],
+    max_tokens: Optional[int] = None
+) -> str:
+    """Stable hash of everything that determines a completion"""
+    payload = json.dumps(
+        {
+            "messages": normalize_messages(messages),
+            "model": model,
+            "temperature": round(temperature, 4),
+            "response_format": response_format,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM responses (stored as plain dicts)
+
+    - Memory: LRU + TTL (`services.cache.TTLCache`)
+    - Disk (optional): one JSON file per key under
+      CONTEXT2TASK_CACHE_DIR/llm/, with its own expiry; disk hits are
+      promoted to memory
+
+    Which calls are cached is decided by `LLMService` (JSON-mode calls by
+    default, overridable per call).
+
+    Configuration via environment variables:
+    - LLM_CACHE_ENABLED (default true)
+    - LLM_CACHE_SIZE (responses kept in memory, default 256)
+    - LLM_CACHE_TTL (seconds, default 86400)
+    - LLM_CACHE_DISK (also persist responses on disk, default false)
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 86400.0, disk: bool = False):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk_dir: Optional[Path] = get_cache_dir("llm") if disk else None
+        self.disk_hits = 0
+        self.disk_writes = 0
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable LLM cache entry {path.name}: {e}")
+            return None
+        if entry.get("expires_at", 0) <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _write_disk(self, key: str, response: Dict[str, Any], ttl: float):
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"expires_at": time.time() + ttl, "response": response}))
+        tmp.replace(path)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response for `key`, or None"""
+        response = self.memory.get(key)
+        if response is not None or self.disk_dir is None:
+            return response
+
+        entry = await asyncio.to_thread(self._read_disk, key)
+        if entry is None:
+            return None
+        self.disk_hits += 1
+        self.memory.set(key, entry["response"], ttl=min(self.ttl, entry["expires_at"] - time.time()))
+        return entry["response"]
+
+    async def set(self, key: str, response: Dict[str, Any], ttl: Optional[float] = None):
+        """Store a response in memory (and on disk when enabled)"""
+        ttl = ttl if ttl is not None else self.ttl
+        self.memory.set(key, response, ttl=ttl)
+        if self.disk_dir is None:
+            return
+        try:
+            await asyncio.to_thread(self._write_disk, key, response, ttl)
+            self.disk_writes += 1
+        except OSError as e:
+            logger.warning(f"Could not persist LLM cache entry: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk_dir is not None:
+            for path in self.disk_dir.glob("*/*.json"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "disk_enabled": self.disk_dir is not None,
+            "disk_hits": self.disk_hits,
+            "disk_writes": self.disk_writes,
+        }
+
+
+# Global instance (optional pattern)
+_llm_response_cache = None
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """Get or create LLMResponseCache singleton (None when disabled)"""
+    global _llm_response_cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _llm_response_cache is None:
+        _llm_response_cache = LLMResponseCache(
+            maxsize=int(os.getenv("LLM_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+            disk=os.getenv("LLM_CACHE_DISK", "false").lower() == "true"
+        )
+    return _llm_response_cache
+
+
+def get_llm_response_cache_stats() -> Optional[Dict[str, Any]]:
+    """Cache metrics if the cache has been created (never creates it)"""
+    return _llm_response_cache.stats() if _llm_response_cache is not None else None
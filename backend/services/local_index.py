@@ -0,0 +1,351 @@
+"""
+Local Vector Index - Embedded search backend for MCPService
+Chunk embeddings in a memory-mapped NumPy matrix with vectorized top-k search
+"""
+import os
+import json
+import zlib
+import math
+import asyncio
+import logging
+import shutil
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import httpx
+
+from services.cache import repo_index_dir
+from services.chunking import tokenize_code, chunk_text, read_text_file
+from services.manifest import iter_repository_files
+from services.mcp import SearchBackend, CodeSearchResult, IndexingStatus
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logging.warning("numpy not installed. Local vector index will be unavailable.")
+
+logger = logging.getLogger(__name__)
+
+# ===== EMBEDDERS =====
+
+class Embedder(ABC):
+    """Turns texts into L2-normalized float32 vectors"""
+
+    name: str
+    dim: int
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> "np.ndarray":
+        pass
+
+
+class HashingEmbedder(Embedder):
+    """
+    Credential-free embedder (feature hashing of code tokens)
+
+    Lexical rather than semantic, but deterministic and fast: meant for dev,
+    CI and offline deployments.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _embed_one(self, text: str) -> "np.ndarray":
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token, count in Counter(tokenize_code(text)).items():
+            h = zlib.crc32(token.encode())
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dim] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _embed_many(self, texts: List[str]) -> "np.ndarray":
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._embed_one(t) for t in texts])
+
+    async def embed(self, texts: List[str]) -> "np.ndarray":
+        # Tokenizing and hashing is CPU-bound: keep it off the event loop
+        return await asyncio.to_thread(self._embed_many, texts)
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings API (same model family the claude-context indexer uses)"""
+
+    def __init__(self, api_key: str, model: str = "text-embedding-3-small", dim: int = 1536, batch_size: int = 128):
+        self.api_key = api_key
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+        self.name = f"openai-{model}"
+        self.client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+
+    async def embed(self, texts: List[str]) -> "np.ndarray":
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = await self.client.post(
+                "https://api.openai.com/v1/embeddings",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={"model": self.model, "input": texts[start:start + self.batch_size]}
+            )
+            response.raise_for_status()
+            vectors.extend(item["embedding"] for item in response.json()["data"])
+
+        if not vectors:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        self.dim = matrix.shape[1]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+# ===== BACKEND =====
+
+class _LoadedIndex:
+    """In-memory view of a repository index (vectors are memory-mapped)"""
+
+    def __init__(self, vectors: "np.ndarray", files: List[str], chunk_files: "np.ndarray",
+                 chunk_lines: "np.ndarray", chunk_contents: List[str], meta: Dict[str, Any]):
+        self.vectors = vectors
+        self.files = files
+        self.chunk_files = chunk_files
+        self.chunk_lines = chunk_lines
+        self.chunk_contents = chunk_contents
+        self.meta = meta
+        self.file_exts = np.array([os.path.splitext(f)[1] for f in files] or [""], dtype=object)
+
+
+class LocalVectorBackend(SearchBackend):
+    """
+    Embedded vector search backend
+
+    Layout per repository (under CONTEXT2TASK_CACHE_DIR/vectors/<hash>/):
+    - vectors.npy: float32 [chunks × dim], opened with mmap_mode="r"
+    - chunks.json: file list plus (file index, start line, content) per chunk
+    - meta.json: embedder, dimension, counts, indexed_at
+
+    Each file is written to a temp file and moved into place, meta.json
+    last; an index whose files disagree (e.g. after a crash mid-write) is
+    treated as not indexed and rebuilt. Disk I/O runs in worker threads.
+
+    Search is a single matrix-vector product plus argpartition top-k.
+    """
+
+    def __init__(self, embedder: Embedder):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy package not installed")
+        self.embedder = embedder
+        self._loaded: Dict[str, _LoadedIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        logger.info(f"LocalVectorBackend initialized with embedder: {embedder.name}")
+
+    def _lock(self, path: str) -> asyncio.Lock:
+        return self._locks.setdefault(os.path.abspath(path), asyncio.Lock())
+
+    def _read(self, path: str) -> Optional[_LoadedIndex]:
+        index_dir = repo_index_dir("vectors", path)
+        if not (index_dir / "meta.json").exists():
+            return None
+
+        try:
+            meta = json.loads((index_dir / "meta.json").read_text())
+            data = json.loads((index_dir / "chunks.json").read_text())
+            vectors = np.load(index_dir / "vectors.npy", mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable local index for {path}: {e}")
+            return None
+        chunks = data["chunks"]
+        if not (meta["chunk_count"] == len(chunks) == vectors.shape[0]):
+            logger.warning(f"Ignoring inconsistent local index for {path} (interrupted write?)")
+            return None
+
+        return _LoadedIndex(
+            vectors=vectors,
+            files=data["files"],
+            chunk_files=np.array([c[0] for c in chunks], dtype=np.int32),
+            chunk_lines=np.array([c[1] for c in chunks], dtype=np.int32),
+            chunk_contents=[c[2] for c in chunks],
+            meta=meta
+        )
+
+    async def _load(self, path: str) -> Optional[_LoadedIndex]:
+        key = os.path.abspath(path)
+        if key in self._loaded:
+            return self._loaded[key]
+
+        loaded = await asyncio.to_thread(self._read, path)
+        if loaded is None:
+            return None
+        return self._loaded.setdefault(key, loaded)
+
+    @staticmethod
+    def _replace_json(target: Path, payload: Dict[str, Any]):
+        tmp = target.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, target)
+
+    def _write(self, path: str, files: List[str], chunks: List[list], vectors: "np.ndarray"):
+        index_dir = repo_index_dir("vectors", path)
+        tmp = index_dir / "vectors.tmp.npy"
+        np.save(tmp, vectors.astype(np.float32, copy=False))
+        os.replace(tmp, index_dir / "vectors.npy")
+        self._replace_json(index_dir / "chunks.json", {"files": files, "chunks": chunks})
+        self._replace_json(index_dir / "meta.json", {
+            "embedder": self.embedder.name,
+            "dim": self.embedder.dim,
+            "file_count": len(files),
+            "chunk_count": len(chunks),
+            "indexed_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    async def _store(self, path: str, files: List[str], chunks: List[list], vectors: "np.ndarray"):
+        await asyncio.to_thread(self._write, path, files, chunks, vectors)
+        self._loaded.pop(os.path.abspath(path), None)
+
+    async def _embed_files(self, path: str, rel_files: List[str]) -> Tuple[List[str], List[list], "np.ndarray"]:
+        files, chunks = [], []
+        for rel in rel_files:
+            text = await asyncio.to_thread(read_text_file, os.path.join(path, rel))
+            if text is None:
+                continue
+            file_idx = len(files)
+            files.append(rel)
+            chunks.extend([file_idx, line, content] for line, content in chunk_text(text))
+
+        vectors = await self.embedder.embed([f"{files[c[0]]}\n{c[2]}" for c in chunks])
+        return files, chunks, vectors
+
+    async def index_codebase(
+        self,
+        path: str,
+        force: bool = False,
+        custom_extensions: Optional[List[str]] = None,
+        ignore_patterns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        async with self._lock(path):
+            existing = await self._load(path)
+            if existing is not None and not force:
+                return {"status": "already_indexed", "file_count": existing.meta["file_count"]}
+
+            rel_files = await asyncio.to_thread(
+                lambda: list(iter_repository_files(path, custom_extensions, ignore_patterns))
+            )
+            files, chunks, vectors = await self._embed_files(path, rel_files)
+            await self._store(path, files, chunks, vectors)
+
+        logger.info(f"Local index built for {path}: {len(files)} files, {len(chunks)} chunks")
+        return {"status": "success", "file_count": len(files), "chunk_count": len(chunks)}
+
+    async def update_files(self, path: str, modified: List[str], deleted: List[str]) -> Dict[str, Any]:
+        async with self._lock(path):
+            existing = await self._load(path)
+            if existing is None:
+                raise RuntimeError(f"Codebase not indexed: {path}")
+
+            # Keep rows of untouched files, then append re-embedded chunks for modified files
+            dropped = set(modified) | set(deleted)
+            remap = {}
+            keep_files = []
+            for old_idx, f in enumerate(existing.files):
+                if f not in dropped:
+                    remap[old_idx] = len(keep_files)
+                    keep_files.append(f)
+            keep_rows = np.array(
+                [i for i, f in enumerate(existing.chunk_files.tolist()) if f in remap],
+                dtype=np.int64
+            )
+            kept_chunks = [
+                [remap[int(existing.chunk_files[i])], int(existing.chunk_lines[i]), existing.chunk_contents[i]]
+                for i in keep_rows
+            ]
+
+            new_files, new_chunks, new_vectors = await self._embed_files(path, modified)
+            offset = len(keep_files)
+            files = keep_files + new_files
+            chunks = kept_chunks + [[c[0] + offset, c[1], c[2]] for c in new_chunks]
+            vectors = np.concatenate([np.asarray(existing.vectors[keep_rows]), new_vectors])
+            await self._store(path, files, chunks, vectors)
+
+        logger.info(f"Local index updated for {path}: {len(modified)} modified, {len(deleted)} deleted")
+        return {"status": "success", "file_count": len(files), "chunk_count": len(chunks)}
+
+    async def search_code(
+        self,
+        path: str,
+        query: str,
+        limit: int = 10,
+        extension_filter: Optional[List[str]] = None
+    ) -> List[CodeSearchResult]:
+        index = await self._load(path)
+        if index is None:
+            raise RuntimeError(f"Codebase not indexed: {path}")
+        if index.meta["embedder"] != self.embedder.name:
+            raise RuntimeError(
+                f"Index for {path} was built with {index.meta['embedder']}; re-index with force=True"
+            )
+        if len(index.chunk_contents) == 0:
+            return []
+
+        query_vector = (await self.embedder.embed([query]))[0]
+        scores = index.vectors @ query_vector
+
+        if extension_filter:
+            allowed_files = np.isin(index.file_exts, extension_filter)
+            scores = np.where(allowed_files[index.chunk_files], scores, -np.inf)
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            CodeSearchResult(
+                file=index.files[index.chunk_files[i]],
+                line=int(index.chunk_lines[i]),
+                content=index.chunk_contents[i],
+                score=float(scores[i])
+            )
+            for i in top
+            if np.isfinite(scores[i])
+        ]
+
+    async def clear_index(self, path: str) -> Dict[str, Any]:
+        async with self._lock(path):
+            self._loaded.pop(os.path.abspath(path), None)
+            shutil.rmtree(repo_index_dir("vectors", path), ignore_errors=True)
+        return {"status": "cleared", "path": path}
+
+    async def get_indexing_status(self, path: str) -> IndexingStatus:
+        if self._lock(path).locked():
+            return IndexingStatus(path=path, status="indexing")
+
+        index = await self._load(path)
+        if index is None:
+            return IndexingStatus(path=path, status="not_indexed")
+        return IndexingStatus(path=path, status="indexed", progress=100, file_count=index.meta["file_count"])
+
+
+def create_local_backend() -> LocalVectorBackend:
+    """
+    Build the local backend from environment variables
+
+    - LOCAL_EMBEDDINGS: "openai" (needs OPENAI_API_KEY) or "hashing" (default:
+      openai when OPENAI_API_KEY is set, hashing otherwise)
+    - LOCAL_EMBEDDING_MODEL: OpenAI embedding model (default text-embedding-3-small)
+    """
+    openai_key = os.getenv("OPENAI_API_KEY")
+    kind = os.getenv("LOCAL_EMBEDDINGS", "openai" if openai_key else "hashing")
+
+    if kind == "openai":
+        if not openai_key:
+            raise ValueError("LOCAL_EMBEDDINGS=openai requires OPENAI_API_KEY")
+        embedder = OpenAIEmbedder(openai_key, model=os.getenv("LOCAL_EMBEDDING_MODEL", "text-embedding-3-small"))
+    else:
+        embedder = HashingEmbedder()
+
+    return LocalVectorBackend(embedder)
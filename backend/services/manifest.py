@@ -0,0 +1,210 @@
+"""
+Repository Manifest - Change detection for incremental re-indexing
+Tracks file sizes, mtimes and content hashes per repository
+"""
+import os
+import fnmatch
+import hashlib
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Iterator, Set, Tuple
+from pydantic import BaseModel
+
+from services.cache import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Same defaults as the claude-context indexer
+DEFAULT_EXTENSIONS = {
+    ".ts", ".tsx", ".js", ".jsx", ".py", ".java", ".cpp", ".c", ".h", ".hpp",
+    ".cs", ".go", ".rs", ".php", ".rb", ".swift", ".kt", ".scala", ".m", ".mm",
+    ".md", ".markdown", ".ipynb",
+}
+
+# Config and text files: tracked for exact/regex search, never embedded
+TEXT_EXTENSIONS = {
+    ".json", ".yaml", ".yml", ".toml", ".ini", ".env", ".cfg", ".conf",
+    ".properties", ".xml", ".sql", ".sh", ".txt",
+}
+
+DEFAULT_IGNORED_DIRS = {
+    ".git", ".svn", ".hg", ".vscode", ".idea", "node_modules", "dist", "build", "out",
+    "target", "__pycache__", ".pytest_cache", ".mypy_cache", ".ruff_cache", "coverage",
+    ".nyc_output", "htmlcov", ".venv", "venv", "env", ".next", ".nuxt", "logs", "tmp", "temp",
+}
+
+
+class FileEntry(BaseModel):
+    """Fingerprint of an indexed file"""
+    size: int
+    mtime: float
+    sha1: str
+
+
+class RepositoryManifest(BaseModel):
+    """What was sent to the indexer the last time a repository was indexed"""
+    path: str
+    indexed_at: Optional[datetime] = None
+    files: Dict[str, FileEntry] = {}  # Relative path -> fingerprint
+
+
+class ManifestChanges(BaseModel):
+    """Difference between the manifest and the working tree"""
+    added: List[str] = []
+    changed: List[str] = []
+    deleted: List[str] = []
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.deleted)
+
+    @property
+    def modified(self) -> List[str]:
+        """Files whose content must be (re-)sent to the indexer"""
+        return self.added + self.changed
+
+    def matching(self, extensions: Set[str]) -> "ManifestChanges":
+        """Changes restricted to files with one of `extensions`"""
+        def keep(paths: List[str]) -> List[str]:
+            return [rel for rel in paths if os.path.splitext(rel)[1] in extensions]
+        return ManifestChanges(added=keep(self.added), changed=keep(self.changed), deleted=keep(self.deleted))
+
+
+def get_head_commit(repo_path: str) -> Optional[str]:
+    """Resolve HEAD by reading .git directly (no git subprocess)"""
+    git_dir = Path(repo_path) / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head  # Detached HEAD
+
+        ref = head[5:]
+        ref_file = git_dir / ref
+        if ref_file.exists():
+            return ref_file.read_text().strip()
+
+        packed = git_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text().splitlines():
+                if line.endswith(f" {ref}"):
+                    return line.split(" ", 1)[0]
+    except OSError:
+        pass
+    return None
+
+
+def iter_repository_files(
+    repo_path: str,
+    extensions: Optional[List[str]] = None,
+    ignore_patterns: Optional[List[str]] = None
+) -> Iterator[str]:
+    """
+    Yield indexable files as paths relative to `repo_path`
+
+    Args:
+        repo_path: Repository root
+        extensions: Extra extensions on top of DEFAULT_EXTENSIONS
+        ignore_patterns: Extra fnmatch patterns matched against relative paths
+    """
+    allowed = DEFAULT_EXTENSIONS | set(extensions or [])
+    patterns = ignore_patterns or []
+
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if d not in DEFAULT_IGNORED_DIRS and not d.startswith(".")]
+        for name in files:
+            if os.path.splitext(name)[1] not in allowed:
+                continue
+            rel = os.path.relpath(os.path.join(root, name), repo_path)
+            if any(fnmatch.fnmatch(rel, p) for p in patterns):
+                continue
+            yield rel
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _manifest_file(repo_path: str) -> Path:
+    key = hashlib.sha1(os.path.abspath(repo_path).encode()).hexdigest()[:16]
+    return get_cache_dir("manifests") / f"{key}.json"
+
+
+def load_manifest(repo_path: str) -> Optional[RepositoryManifest]:
+    """Load the stored manifest, or None if the repository was never indexed"""
+    path = _manifest_file(repo_path)
+    if not path.exists():
+        return None
+    try:
+        return RepositoryManifest.model_validate_json(path.read_text())
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable manifest for {repo_path}: {e}")
+        return None
+
+
+def save_manifest(manifest: RepositoryManifest):
+    path = _manifest_file(manifest.path)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(manifest.model_dump_json())
+    tmp.replace(path)
+
+
+def delete_manifest(repo_path: str):
+    _manifest_file(repo_path).unlink(missing_ok=True)
+
+
+def scan_repository(
+    repo_path: str,
+    previous: Optional[RepositoryManifest] = None,
+    extensions: Optional[List[str]] = None,
+    ignore_patterns: Optional[List[str]] = None
+) -> Tuple[RepositoryManifest, ManifestChanges]:
+    """
+    Fingerprint the working tree and diff it against `previous`
+
+    Files whose size and mtime match the previous manifest keep their stored
+    hash without being read; only touched files are hashed, and a touched file
+    whose hash is unchanged is not reported as changed.
+
+    Returns:
+        (new manifest, changes relative to `previous`)
+    """
+    old_files = previous.files if previous else {}
+    files: Dict[str, FileEntry] = {}
+    changes = ManifestChanges()
+
+    for rel in iter_repository_files(repo_path, extensions, ignore_patterns):
+        full = os.path.join(repo_path, rel)
+        try:
+            stat = os.stat(full)
+        except OSError:
+            continue
+
+        old = old_files.get(rel)
+        if old and old.size == stat.st_size and old.mtime == stat.st_mtime:
+            files[rel] = old
+            continue
+
+        try:
+            entry = FileEntry(size=stat.st_size, mtime=stat.st_mtime, sha1=_hash_file(full))
+        except OSError:
+            continue
+        files[rel] = entry
+
+        if old is None:
+            changes.added.append(rel)
+        elif old.sha1 != entry.sha1:
+            changes.changed.append(rel)
+
+    changes.deleted = [rel for rel in old_files if rel not in files]
+
+    manifest = RepositoryManifest(
+        path=repo_path,
+        indexed_at=datetime.now(timezone.utc),
+        files=files
+    )
+    return manifest, changes
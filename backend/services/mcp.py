@@ -6,11 +6,39 @@ import os
 import json
 import asyncio
 import logging
+from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
+from services.mcp_pool import MCPWorkerPool, parse_tool_result
+from services.cache import TTLCache
+from services.single_flight import SingleFlight
+from services.lexical_index import LexicalIndexManager, reciprocal_rank_fusion
+from services.trigram_index import TrigramIndexManager
+from services.manifest import (
+    DEFAULT_EXTENSIONS,
+    TEXT_EXTENSIONS,
+    ManifestChanges,
+    load_manifest,
+    save_manifest,
+    delete_manifest,
+    scan_repository,
+)
+
 logger = logging.getLogger(__name__)
 
+MCP_PACKAGE = "@zilliztech/claude-context"
+
+# CLI command -> (MCP tool name, positional argument names)
+MCP_TOOLS = {
+    "index-codebase": ("index_codebase", ["path"]),
+    "search-code": ("search_code", ["path", "query", "limit"]),
+    "clear-index": ("clear_index", ["path"]),
+    "get-indexing-status": ("get_indexing_status", ["path"]),
+}
+
+SEARCH_MODES = ("semantic", "lexical", "hybrid")
+
 
 class CodeSearchResult(BaseModel):
     """Code search result from MCP"""
@@ -28,6 +56,53 @@ class IndexingStatus(BaseModel):
     file_count: Optional[int] = None
 
 
+class SearchBackend(ABC):
+    """
+    Abstract base class for pluggable search backends
+    
+    MCPService talks to zilliztech/claude-context by default; a backend
+    replaces that transport while MCPService keeps caching, invalidation
+    and manifest handling.
+    """
+    
+    @abstractmethod
+    async def index_codebase(
+        self,
+        path: str,
+        force: bool = False,
+        custom_extensions: Optional[List[str]] = None,
+        ignore_patterns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Index a codebase"""
+        pass
+    
+    @abstractmethod
+    async def update_files(self, path: str, modified: List[str], deleted: List[str]) -> Dict[str, Any]:
+        """Re-index only the given files (paths relative to the codebase root)"""
+        pass
+    
+    @abstractmethod
+    async def search_code(
+        self,
+        path: str,
+        query: str,
+        limit: int = 10,
+        extension_filter: Optional[List[str]] = None
+    ) -> List[CodeSearchResult]:
+        """Search an indexed codebase"""
+        pass
+    
+    @abstractmethod
+    async def clear_index(self, path: str) -> Dict[str, Any]:
+        """Remove a codebase's index"""
+        pass
+    
+    @abstractmethod
+    async def get_indexing_status(self, path: str) -> IndexingStatus:
+        """Indexing status of a codebase"""
+        pass
+
+
 class MCPService:
     """
     Model Context Protocol Service
@@ -43,9 +118,58 @@ class MCPService:
     - npx available
     - OPENAI_API_KEY (for embeddings)
     - ZILLIZ_CLOUD_URI + API_KEY (for vector storage)
+    
+    Search backend (MCP_SEARCH_BACKEND):
+    - "claude-context" (default): Zilliz Cloud via npx, requirements above
+    - "local": embedded NumPy vector index (no Node.js or Zilliz needed),
+      see services/local_index.py
+    
+    Worker pool (optional env vars):
+    - MCP_POOL_SIZE: persistent MCP server processes (default 2, 0 = spawn npx per call)
+    - MCP_REQUEST_TIMEOUT: seconds per MCP call (default 300)
+    - MCP_HEALTH_CHECK_INTERVAL: seconds between worker pings (default 30)
+    - MCP_MAX_INFLIGHT: concurrent requests multiplexed per worker (default 8)
+    
+    Search cache (optional env vars):
+    - MCP_SEARCH_CACHE_SIZE: max cached searches (default 512, 0 = disabled)
+    - MCP_SEARCH_CACHE_TTL: seconds a cached search stays valid (default 600)
+    Cache misses are coalesced: identical searches in flight share one call.
+    
+    Search mode (MCP_SEARCH_MODE, or per call via `mode`):
+    - "semantic" (default): vector search through the backend
+    - "lexical": local BM25 index only (no embedding round-trip)
+    - "hybrid": both, fused with Reciprocal Rank Fusion
+    The BM25 index is kept in sync by `sync_codebase`, see services/lexical_index.py
+    
+    Exact/regex lookups (`grep_code`) use a local trigram index, also kept in
+    sync by `sync_codebase`, see services/trigram_index.py
     """
     
     def __init__(self):
+        # Search results keyed by repo index generation; bumped on (re)index/clear
+        self.search_cache = TTLCache(
+            maxsize=int(os.getenv("MCP_SEARCH_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("MCP_SEARCH_CACHE_TTL", "600"))
+        )
+        self._index_generations: Dict[str, int] = {}
+        self.search_flights = SingleFlight("mcp-search")
+        
+        self.lexical = LexicalIndexManager()
+        self.trigram = TrigramIndexManager()
+        self.search_mode = os.getenv("MCP_SEARCH_MODE", "semantic")
+        if self.search_mode not in SEARCH_MODES:
+            raise ValueError(f"Invalid MCP_SEARCH_MODE: {self.search_mode} (expected one of {', '.join(SEARCH_MODES)})")
+        
+        self.backend_name = os.getenv("MCP_SEARCH_BACKEND", "claude-context")
+        self.backend: Optional[SearchBackend] = None
+        self.pool: Optional[MCPWorkerPool] = None
+        
+        if self.backend_name == "local":
+            from services.local_index import create_local_backend
+            self.backend = create_local_backend()
+            logger.info("MCPService initialized with local vector backend")
+            return
+        
         # Validate required env vars
         required_vars = ["OPENAI_API_KEY", "ZILLIZ_CLOUD_URI", "ZILLIZ_CLOUD_API_KEY"]
         missing = [v for v in required_vars if not os.getenv(v)]
@@ -56,7 +180,89 @@ class MCPService:
         self.zilliz_uri = os.getenv("ZILLIZ_CLOUD_URI")
         self.zilliz_key = os.getenv("ZILLIZ_CLOUD_API_KEY")
         
-        logger.info("MCPService initialized with Zilliz Cloud backend")
+        self.pool_size = int(os.getenv("MCP_POOL_SIZE", "2"))
+        self.request_timeout = float(os.getenv("MCP_REQUEST_TIMEOUT", "300"))
+        if self.pool_size > 0:
+            self.pool = MCPWorkerPool(
+                command=["npx", MCP_PACKAGE],
+                env=self._build_env(),
+                size=self.pool_size,
+                request_timeout=self.request_timeout,
+                health_check_interval=float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30")),
+                max_inflight=int(os.getenv("MCP_MAX_INFLIGHT", "8"))
+            )
+        
+        logger.info(f"MCPService initialized with Zilliz Cloud backend (pool size: {self.pool_size})")
+    
+    def _build_env(self) -> Dict[str, str]:
+        """Environment for MCP processes (credentials injected explicitly)"""
+        env = os.environ.copy()
+        env["OPENAI_API_KEY"] = self.openai_key
+        env["ZILLIZ_CLOUD_URI"] = self.zilliz_uri
+        env["ZILLIZ_CLOUD_API_KEY"] = self.zilliz_key
+        return env
+    
+    @staticmethod
+    def _to_tool_arguments(command: str, args: List[str]) -> tuple:
+        """
+        Translate CLI-style args into an MCP tool call
+        
+        Positional args map to the tool's parameter names, `--some-flag value`
+        becomes `someFlag: [values]` and a bare `--flag` becomes `flag: True`.
+        """
+        tool_name, positional_names = MCP_TOOLS[command]
+        arguments: Dict[str, Any] = {}
+        
+        positional = []
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg.startswith("--"):
+                head, *rest = arg[2:].split("-")
+                key = head + "".join(part.capitalize() for part in rest)
+                if i + 1 < len(args) and not args[i + 1].startswith("--"):
+                    arguments[key] = args[i + 1].split(",")
+                    i += 2
+                else:
+                    arguments[key] = True
+                    i += 1
+            else:
+                positional.append(arg)
+                i += 1
+        
+        for name, value in zip(positional_names, positional):
+            arguments[name] = int(value) if name == "limit" else value
+        
+        return tool_name, arguments
+    
+    @staticmethod
+    def _parse_pooled_result(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return parse_tool_result(result or {})
+    
+    def _search_cache_key(
+        self,
+        path: str,
+        query: str,
+        limit: int,
+        extension_filter: Optional[List[str]],
+        mode: str = "semantic"
+    ) -> tuple:
+        path = os.path.normpath(path)
+        return (
+            path,
+            self._index_generations.get(path, 0),
+            query,
+            limit,
+            tuple(sorted(extension_filter or [])),
+            mode
+        )
+    
+    def _invalidate_search_cache(self, path: str):
+        """Start a new index generation for `path` and drop its cached searches"""
+        path = os.path.normpath(path)
+        self._index_generations[path] = self._index_generations.get(path, 0) + 1
+        dropped = self.search_cache.invalidate(lambda key: key[0] == path)
+        logger.debug(f"Search cache invalidated for {path} ({dropped} entries)")
     
     async def _run_npx_command(self, command: str, args: List[str]) -> Dict[str, Any]:
         """
@@ -69,14 +275,21 @@ class MCPService:
         Returns:
             Parsed JSON response
         """
+        if self.pool is not None:
+            tool_name, arguments = self._to_tool_arguments(command, args)
+            try:
+                result = await self.pool.call_tool(tool_name, arguments)
+                logger.info(f"MCP command succeeded: {command} (pooled)")
+                return self._parse_pooled_result(result)
+            except Exception as e:
+                logger.error(f"MCP command error: {str(e)}")
+                raise
+        
         # Build full command
-        cmd = ["npx", "@zilliztech/claude-context", command] + args
+        cmd = ["npx", MCP_PACKAGE, command] + args
         
         # Set environment
-        env = os.environ.copy()
-        env["OPENAI_API_KEY"] = self.openai_key
-        env["ZILLIZ_CLOUD_URI"] = self.zilliz_uri
-        env["ZILLIZ_CLOUD_API_KEY"] = self.zilliz_key
+        env = self._build_env()
         
         try:
             logger.debug(f"Running MCP command: {' '.join(cmd[:3])}... (args hidden)")
@@ -137,6 +350,12 @@ class MCPService:
             )
             ```
         """
+        if self.backend is not None:
+            result = await self.backend.index_codebase(path, force, custom_extensions, ignore_patterns)
+            self._invalidate_search_cache(path)
+            logger.info(f"Indexed codebase: {path}")
+            return result
+        
         args = [path]
         
         if force:
@@ -149,16 +368,120 @@ class MCPService:
             args.extend(["--ignore-patterns", ",".join(ignore_patterns)])
         
         result = await self._run_npx_command("index-codebase", args)
+        self._invalidate_search_cache(path)
         
         logger.info(f"Indexed codebase: {path}")
         return result
     
+    async def sync_codebase(
+        self,
+        path: str,
+        force: bool = False,
+        custom_extensions: Optional[List[str]] = None,
+        ignore_patterns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Incrementally re-index a codebase using its local manifest
+        
+        The working tree is diffed against the manifest recorded at the last
+        index (file sizes/mtimes, content hashes). Untouched files
+        are never re-read; if nothing changed, the indexer is not called at
+        all. The manifest is only updated after the indexer succeeds.
+        
+        The manifest also tracks config/text files (TEXT_EXTENSIONS): those
+        only go to the trigram index, so changing one never re-indexes the
+        semantic backend.
+        
+        Args:
+            path: Absolute path to codebase directory
+            force: Ignore the manifest and re-index everything
+            custom_extensions: Additional file extensions (e.g. ['.vue', '.svelte'])
+            ignore_patterns: Additional ignore patterns
+        
+        Returns:
+            Indexing result plus added/changed/deleted file counts
+        """
+        previous = None if force else load_manifest(path)
+        manifest, changes = await asyncio.to_thread(
+            scan_repository, path, previous, [*(custom_extensions or []), *TEXT_EXTENSIONS], ignore_patterns
+        )
+        code_extensions = DEFAULT_EXTENSIONS | set(custom_extensions or [])
+        code_changes = changes.matching(code_extensions)
+        
+        summary = {
+            "added": len(changes.added),
+            "changed": len(changes.changed),
+            "deleted": len(changes.deleted),
+            "file_count": len(manifest.files),
+        }
+        
+        if previous is not None and not changes.has_changes:
+            logger.info(f"Codebase up to date, skipping re-index: {path}")
+            return {"status": "up_to_date", **summary}
+        
+        if previous is None:
+            result = await self.index_codebase(
+                path, force=True, custom_extensions=custom_extensions, ignore_patterns=ignore_patterns
+            )
+        elif code_changes.has_changes:
+            result = await self._apply_changes(path, code_changes, custom_extensions, ignore_patterns)
+        else:
+            result = {"status": "success", "message": "Only config/text files changed"}
+        
+        code_files = [rel for rel in manifest.files if os.path.splitext(rel)[1] in code_extensions]
+        for local_index, files, diff in (
+            (self.lexical, code_files, code_changes),
+            (self.trigram, list(manifest.files), changes),
+        ):
+            try:
+                if previous is None:
+                    await local_index.rebuild(path, files)
+                elif diff.has_changes:
+                    await local_index.update(path, diff.modified, diff.deleted)
+            except Exception as e:
+                # Local indexes rebuild lazily on next use; never fail indexing over them
+                logger.warning(f"{local_index.kind} index update failed for {path}: {e}")
+        # Searches run while the local indexes were updating cached old hits under the current generation
+        self._invalidate_search_cache(path)
+        
+        save_manifest(manifest)
+        logger.info(
+            f"Synced codebase {path}: +{summary['added']} ~{summary['changed']} -{summary['deleted']}"
+        )
+        return {**result, **summary, "mode": "full" if previous is None else "incremental"}
+    
+    async def _apply_changes(
+        self,
+        path: str,
+        changes: ManifestChanges,
+        custom_extensions: Optional[List[str]] = None,
+        ignore_patterns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send only the changed files to the indexer
+        
+        Backends re-index exactly `changes.modified` and drop `changes.deleted`.
+        claude-context exposes no per-file or sync tool over MCP, and a
+        non-forced index of an indexed codebase is rejected as "already
+        indexed"; it gets an explicit forced re-index instead (only when
+        the manifest found changes).
+        """
+        if self.backend is not None:
+            result = await self.backend.update_files(path, changes.modified, changes.deleted)
+            self._invalidate_search_cache(path)
+            return result
+        
+        return await self.index_codebase(
+            path, force=True, custom_extensions=custom_extensions, ignore_patterns=ignore_patterns
+        )
+    
     async def search_code(
         self,
         path: str,
         query: str,
         limit: int = 10,
-        extension_filter: Optional[List[str]] = None
+        extension_filter: Optional[List[str]] = None,
+        mode: Optional[str] = None
     ) -> List[CodeSearchResult]:
         """
         Search codebase using natural language query
@@ -168,6 +491,7 @@ class MCPService:
             query: Natural language search query
             limit: Maximum results to return (1-50)
             extension_filter: Filter by file extensions (e.g. ['.ts', '.py'])
+            mode: "semantic", "lexical" or "hybrid" (default: MCP_SEARCH_MODE)
         
         Returns:
             List of code search results
@@ -183,26 +507,159 @@ class MCPService:
                 print(f"{r.file}:{r.line} - {r.content[:50]}")
             ```
         """
-        args = [path, query, str(limit)]
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Invalid search mode: {mode}")
+        
+        cache_key = self._search_cache_key(path, query, limit, extension_filter, mode)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Search cache hit for query: {query}")
+            return list(cached)
+        
+        # Identical searches already in flight (other sessions, double submits) share one backend call
+        search_results = await self.search_flights.do(
+            cache_key, lambda: self._search_uncached(path, query, limit, extension_filter, mode, cache_key)
+        )
+        return list(search_results)
+    
+    async def _search_uncached(
+        self,
+        path: str,
+        query: str,
+        limit: int,
+        extension_filter: Optional[List[str]],
+        mode: str,
+        cache_key: tuple
+    ) -> List[CodeSearchResult]:
+        if mode == "lexical":
+            search_results = await self._lexical_search(path, query, limit, extension_filter)
+        elif mode == "hybrid":
+            semantic, lexical = await asyncio.gather(
+                self._semantic_search(path, query, limit, extension_filter),
+                self._lexical_search(path, query, limit, extension_filter)
+            )
+            search_results = [
+                result.model_copy(update={"score": round(score, 6)})
+                for result, score in reciprocal_rank_fusion([semantic, lexical], limit=limit)
+            ]
+        else:
+            search_results = await self._semantic_search(path, query, limit, extension_filter)
+        
+        self.search_cache.set(cache_key, search_results)
+        
+        logger.info(f"Found {len(search_results)} results for query: {query} ({mode})")
+        return search_results
+    
+    async def _lexical_search(
+        self,
+        path: str,
+        query: str,
+        limit: int,
+        extension_filter: Optional[List[str]]
+    ) -> List[CodeSearchResult]:
+        hits = await self.lexical.search(path, query, limit, extension_filter)
+        return [
+            CodeSearchResult(file=file, line=line, content=content, score=score)
+            for file, line, content, score in hits
+        ]
+    
+    async def _semantic_search(
+        self,
+        path: str,
+        query: str,
+        limit: int,
+        extension_filter: Optional[List[str]]
+    ) -> List[CodeSearchResult]:
+        if self.backend is not None:
+            search_results = await self.backend.search_code(path, query, limit, extension_filter)
+        else:
+            args = [path, query, str(limit)]
+            
+            if extension_filter:
+                args.extend(["--extension-filter", ",".join(extension_filter)])
+            
+            result = await self._run_npx_command("search-code", args)
+            
+            # Parse results
+            search_results = [
+                CodeSearchResult(
+                    file=r["file"],
+                    line=r["line"],
+                    content=r["content"],
+                    score=r.get("score")
+                )
+                for r in result.get("results", [])
+            ]
+        return search_results
+    
+    async def grep_code(
+        self,
+        path: str,
+        pattern: str,
+        regex: bool = False,
+        case_sensitive: bool = True,
+        limit: int = 50,
+        extension_filter: Optional[List[str]] = None
+    ) -> List[CodeSearchResult]:
+        """
+        Exact or regex search over a codebase (one result per matching line)
+        
+        Answered locally from the trigram index; no embeddings involved.
+        
+        Args:
+            path: Absolute path to codebase
+            pattern: Literal text, or a regular expression if `regex` is set
+            regex: Treat `pattern` as a Python regular expression
+            case_sensitive: Match case exactly
+            limit: Maximum matching lines to return
+            extension_filter: Filter by file extensions (e.g. ['.ts', '.py'])
         
-        if extension_filter:
-            args.extend(["--extension-filter", ",".join(extension_filter)])
+        Returns:
+            List of code search results (`content` is the matching line)
         
-        result = await self._run_npx_command("search-code", args)
+        Raises:
+            ValueError: If `regex` is set and the pattern is invalid
         
-        # Parse results
-        search_results = [
-            CodeSearchResult(
-                file=r["file"],
-                line=r["line"],
-                content=r["content"],
-                score=r.get("score")
+        Example:
+            ```python
+            results = await mcp.grep_code(
+                path="/path/to/repo",
+                pattern=r"def \\w+_handler",
+                regex=True
             )
-            for r in result.get("results", [])
+            ```
+        """
+        mode = f"grep:{'regex' if regex else 'literal'}:{'cs' if case_sensitive else 'ci'}"
+        cache_key = self._search_cache_key(path, pattern, limit, extension_filter, mode)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
+        hits = await self.trigram.search(path, pattern, regex, case_sensitive, limit, extension_filter)
+        results = [
+            CodeSearchResult(file=file, line=line, content=content)
+            for file, line, content in hits
         ]
+        self.search_cache.set(cache_key, results)
         
-        logger.info(f"Found {len(search_results)} results for query: {query}")
-        return search_results
+        logger.info(f"Found {len(results)} matches for pattern: {pattern}")
+        return list(results)
+    
+    async def find_files(self, path: str, fragment: str, limit: int = 10) -> List[CodeSearchResult]:
+        """
+        Find files by (partial) path, e.g. "auth/service.py" or "docker-compose"
+        
+        Args:
+            path: Absolute path to codebase
+            fragment: Case-insensitive substring of the relative file path
+            limit: Maximum files to return
+        
+        Returns:
+            List of code search results (`content` is the head of the file)
+        """
+        hits = await self.trigram.find_files(path, fragment, limit)
+        return [CodeSearchResult(file=file, line=line, content=content) for file, line, content in hits]
     
     async def clear_index(self, path: str) -> Dict[str, Any]:
         """
@@ -214,7 +671,14 @@ class MCPService:
         Returns:
             Clearance status
         """
-        result = await self._run_npx_command("clear-index", [path])
+        if self.backend is not None:
+            result = await self.backend.clear_index(path)
+        else:
+            result = await self._run_npx_command("clear-index", [path])
+        self._invalidate_search_cache(path)
+        self.lexical.clear(path)
+        self.trigram.clear(path)
+        delete_manifest(path)
         
         logger.info(f"Cleared index for: {path}")
         return result
@@ -229,17 +693,91 @@ class MCPService:
         Returns:
             IndexingStatus with status, progress, file_count
         """
-        result = await self._run_npx_command("get-indexing-status", [path])
-        
-        status = IndexingStatus(
-            path=path,
-            status=result.get("status", "unknown"),
-            progress=result.get("progress"),
-            file_count=result.get("file_count")
-        )
+        if self.backend is not None:
+            status = await self.backend.get_indexing_status(path)
+        else:
+            result = await self._run_npx_command("get-indexing-status", [path])
+            
+            status = IndexingStatus(
+                path=path,
+                status=result.get("status", "unknown"),
+                progress=result.get("progress"),
+                file_count=result.get("file_count")
+            )
         
         logger.info(f"Indexing status for {path}: {status.status}")
         return status
+    
+    async def get_indexing_statuses(self, paths: List[str]) -> Dict[str, IndexingStatus]:
+        """
+        Get indexing status for many codebases at once
+        
+        With the worker pool the lookups are multiplexed as concurrent
+        requests over the persistent workers; otherwise they run as
+        concurrent npx calls. Paths whose lookup fails
+        are reported with status "unknown".
+        
+        Args:
+            paths: Absolute paths to codebases
+        
+        Returns:
+            Mapping of path -> IndexingStatus
+        """
+        if not paths:
+            return {}
+        
+        if self.backend is not None:
+            results = await asyncio.gather(
+                *(self.backend.get_indexing_status(p) for p in paths),
+                return_exceptions=True
+            )
+            results = [r if isinstance(r, Exception) else r.model_dump() for r in results]
+        elif self.pool is not None:
+            calls = [self._to_tool_arguments("get-indexing-status", [p]) for p in paths]
+            try:
+                raw = await self.pool.call_tools(calls)
+                results = [
+                    r if isinstance(r, Exception) else self._parse_pooled_result(r)
+                    for r in raw
+                ]
+            except Exception as e:
+                logger.error(f"Bulk indexing status failed: {e}")
+                results = [e] * len(paths)
+        else:
+            results = await asyncio.gather(
+                *(self._run_npx_command("get-indexing-status", [p]) for p in paths),
+                return_exceptions=True
+            )
+        
+        statuses = {}
+        for path, result in zip(paths, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not check indexing status for {path}: {result}")
+                result = {"status": "unknown"}
+            statuses[path] = IndexingStatus(
+                path=path,
+                status=result.get("status", "unknown"),
+                progress=result.get("progress"),
+                file_count=result.get("file_count")
+            )
+        
+        logger.info(f"Indexing status for {len(paths)} codebases (bulk)")
+        return statuses
+    
+    def stats(self) -> Dict[str, Any]:
+        """Runtime metrics for health/ops endpoints"""
+        return {
+            "backend": self.backend_name,
+            "pool": self.pool.stats() if self.pool else None,
+            "search_cache": self.search_cache.stats(),
+            "single_flight": self.search_flights.stats(),
+        }
+    
+    async def close(self):
+        """Shut down persistent MCP workers"""
+        if self.pool is not None:
+            await self.pool.close()
+        logger.info("MCPService closed")
 
 
 # Global instance (optional pattern)
@@ -253,3 +791,14 @@ def get_mcp_service() -> MCPService:
     return _mcp_service
 
 
+def get_mcp_stats() -> Optional[Dict[str, Any]]:
+    """MCP metrics if the service has been initialized (never creates it)"""
+    return _mcp_service.stats() if _mcp_service is not None else None
+
+
+async def close_mcp_service():
+    """Close the MCP service singleton if it was created"""
+    global _mcp_service
+    if _mcp_service is not None:
+        await _mcp_service.close()
+        _mcp_service = None
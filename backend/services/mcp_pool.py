@@ -0,0 +1,411 @@
+"""
+MCP Worker Pool - Persistent stdio JSON-RPC workers
+Keeps long-lived zilliztech/claude-context MCP servers instead of spawning npx per call
+"""
+import json
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MCP_PROTOCOL_VERSION = "2025-03-26"
+CLIENT_INFO = {"name": "context2task-backend", "version": "1.0.0"}
+
+# Tool results can carry large code snippets; the default 64KB line limit is too small
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class MCPWorkerError(RuntimeError):
+    """Raised when a worker crashes or returns a JSON-RPC error"""
+    pass
+
+
+class MCPWorker:
+    """
+    Single long-lived MCP server process speaking newline-delimited JSON-RPC over stdio.
+
+    Requests are multiplexed: each request gets its own id and future, and a
+    background reader task resolves futures as responses arrive in any order.
+    """
+
+    def __init__(self, worker_id: int, command: List[str], env: Dict[str, str], max_inflight: int = 8):
+        self.worker_id = worker_id
+        self.command = command
+        self.env = env
+        self.max_inflight = max_inflight
+
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.restarts = 0
+        self.started_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_inflight)
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.process is not None
+            and self.process.returncode is None
+            and self._reader_task is not None
+            and not self._reader_task.done()
+        )
+
+    @property
+    def inflight(self) -> int:
+        return len(self._pending)
+
+    async def start(self, timeout: float = 60.0):
+        """Spawn the server process and perform the MCP initialize handshake"""
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self.env,
+            limit=STREAM_LIMIT
+        )
+        self._reader_task = asyncio.create_task(self._read_loop())
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        self.started_at = time.monotonic()
+
+        await self.request(
+            "initialize",
+            {
+                "protocolVersion": MCP_PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": CLIENT_INFO,
+            },
+            timeout=timeout
+        )
+        await self.notify("notifications/initialized")
+        logger.info(f"MCP worker {self.worker_id} started (pid={self.process.pid})")
+
+    async def request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Send a JSON-RPC request and wait for its response"""
+        async with self._slots:
+            return await self._call(method, params, timeout)
+
+    async def ping(self, timeout: float):
+        """Liveness check; bypasses the in-flight slots so it never queues behind long calls"""
+        await self._call("ping", None, timeout)
+
+    async def _call(self, method: str, params: Optional[Dict[str, Any]], timeout: Optional[float]) -> Any:
+        if not self.alive:
+            raise MCPWorkerError(f"MCP worker {self.worker_id} is not running")
+
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+
+        try:
+            await self._send(message)
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None):
+        """Send a JSON-RPC notification (no response expected)"""
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send(message)
+
+    async def _send(self, message: Any):
+        data = (json.dumps(message) + "\n").encode()
+        async with self._write_lock:
+            self.process.stdin.write(data)
+            await self.process.stdin.drain()
+
+    async def _read_loop(self):
+        """Dispatch responses to pending futures until the process exits"""
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+
+                try:
+                    payload = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.debug(f"MCP worker {self.worker_id} non-JSON output: {line[:200]!r}")
+                    continue
+
+                for message in payload if isinstance(payload, list) else [payload]:
+                    self._dispatch(message)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"MCP worker {self.worker_id} reader error: {e}")
+        finally:
+            self._fail_pending(MCPWorkerError(f"MCP worker {self.worker_id} exited"))
+
+    def _dispatch(self, message: Dict[str, Any]):
+        future = self._pending.get(message.get("id"))
+        if future is None or future.done():
+            # Server-initiated notifications and late responses are ignored
+            return
+
+        if "error" in message:
+            error = message["error"]
+            future.set_exception(MCPWorkerError(f"MCP error {error.get('code')}: {error.get('message')}"))
+        else:
+            future.set_result(message.get("result"))
+
+    def _fail_pending(self, error: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _drain_stderr(self):
+        while True:
+            line = await self.process.stderr.readline()
+            if not line:
+                break
+            logger.debug(f"MCP worker {self.worker_id} stderr: {line.decode(errors='replace').rstrip()}")
+
+    async def stop(self):
+        """Terminate the process and fail any in-flight requests"""
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+
+        for task in (self._reader_task, self._stderr_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+        self._fail_pending(MCPWorkerError(f"MCP worker {self.worker_id} stopped"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.alive,
+            "inflight": self.inflight,
+            "restarts": self.restarts,
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1) if self.started_at else None,
+            "last_error": self.last_error,
+        }
+
+
+class MCPWorkerPool:
+    """
+    Pool of persistent MCP workers
+
+    - Fixed size, workers started lazily on first use
+    - Requests routed to the healthy worker with the fewest in-flight calls
+    - Periodic `ping` health checks; dead or unresponsive workers are restarted
+
+    Example:
+        ```python
+        pool = MCPWorkerPool(["npx", "@zilliztech/claude-context"], env, size=2)
+        result = await pool.call_tool("search_code", {"path": "/repo", "query": "auth"})
+        ```
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        env: Dict[str, str],
+        size: int = 2,
+        request_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        max_inflight: int = 8
+    ):
+        if size < 1:
+            raise ValueError("MCP pool size must be at least 1")
+
+        self.command = command
+        self.env = env
+        self.size = size
+        self.request_timeout = request_timeout
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = min(10.0, health_check_interval) if health_check_interval > 0 else 10.0
+
+        self.workers = [MCPWorker(i, command, env, max_inflight) for i in range(size)]
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self._restart_locks = [asyncio.Lock() for _ in range(size)]
+        self._health_task: Optional[asyncio.Task] = None
+
+        self.total_requests = 0
+        self.failed_requests = 0
+
+    async def start(self):
+        """Start all workers and the health check loop (idempotent)"""
+        async with self._start_lock:
+            if self._started:
+                return
+
+            results = await asyncio.gather(
+                *(worker.start() for worker in self.workers),
+                return_exceptions=True
+            )
+            for worker, result in zip(self.workers, results):
+                if isinstance(result, Exception):
+                    worker.last_error = str(result)
+                    logger.warning(f"MCP worker {worker.worker_id} failed to start: {result}")
+
+            if not any(worker.alive for worker in self.workers):
+                await asyncio.gather(*(worker.stop() for worker in self.workers))
+                raise MCPWorkerError("No MCP workers could be started")
+
+            if self.health_check_interval > 0:
+                self._health_task = asyncio.create_task(self._health_loop())
+
+            self._started = True
+            logger.info(f"MCP worker pool started with {self.size} worker(s)")
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Call an MCP tool on the least-loaded healthy worker"""
+        if not self._started:
+            await self.start()
+
+        worker = await self._acquire_worker()
+        self.total_requests += 1
+
+        try:
+            return await worker.request(
+                "tools/call",
+                {"name": name, "arguments": arguments},
+                timeout=timeout or self.request_timeout
+            )
+        except Exception:
+            self.failed_requests += 1
+            raise
+
+    async def call_tools(
+        self,
+        calls: List[tuple],
+        timeout: Optional[float] = None
+    ) -> List[Any]:
+        """
+        Call several MCP tools concurrently (multiplexed across the workers)
+
+        JSON-RPC array batches are not used: batching was removed from the
+        MCP spec and servers built on the SDK reject them. Returns results
+        in call order; failed calls are returned as exceptions.
+        """
+        return await asyncio.gather(
+            *(self.call_tool(name, arguments, timeout=timeout) for name, arguments in calls),
+            return_exceptions=True
+        )
+
+    async def _acquire_worker(self) -> MCPWorker:
+        alive = [w for w in self.workers if w.alive]
+        if alive:
+            return min(alive, key=lambda w: w.inflight)
+
+        # Every worker crashed: restart one synchronously so the caller can proceed
+        worker = self.workers[0]
+        await self._restart(worker)
+        return worker
+
+    async def _restart(self, worker: MCPWorker):
+        async with self._restart_locks[worker.worker_id]:
+            if worker.alive:
+                return
+
+            logger.warning(f"Restarting MCP worker {worker.worker_id} (last error: {worker.last_error})")
+            await worker.stop()
+            worker.restarts += 1
+            await worker.start()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for worker in self.workers:
+                try:
+                    if worker.alive:
+                        await worker.ping(self.ping_timeout)
+                        continue
+                except Exception as e:
+                    worker.last_error = f"health check failed: {e}"
+                    await worker.stop()
+
+                try:
+                    await self._restart(worker)
+                except Exception as e:
+                    worker.last_error = str(e)
+                    logger.error(f"Failed to restart MCP worker {worker.worker_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "started": self._started,
+            "alive": sum(1 for w in self.workers if w.alive),
+            "total_requests": self.total_requests,
+            "failed_requests": self.failed_requests,
+            "workers": [w.stats() for w in self.workers],
+        }
+
+    async def close(self):
+        """Stop health checks and terminate all workers"""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+        self._started = False
+        logger.info("MCP worker pool closed")
+
+
+def parse_tool_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert an MCP `tools/call` result into the JSON dict the CLI used to print
+
+    Prefers `structuredContent`; otherwise parses the text content as JSON and
+    falls back to `{"text": ...}` for plain-text tool output.
+    """
+    text = "\n".join(
+        item.get("text", "")
+        for item in result.get("content", [])
+        if item.get("type") == "text"
+    )
+
+    if result.get("isError"):
+        raise MCPWorkerError(f"MCP tool error: {text}")
+
+    if isinstance(result.get("structuredContent"), dict):
+        return result["structuredContent"]
+
+    try:
+        parsed = json.loads(text)
+        if isinstance(parsed, dict):
+            return parsed
+    except json.JSONDecodeError:
+        pass
+
+    return {"text": text}
@@ -0,0 +1,201 @@
+"""
+Provider Health - Latency/error tracking and circuit breaking for LLM providers
+EWMA latency and error rate per provider decide call order; failing providers are skipped
+"""
+import time
+import logging
+from enum import Enum
+from typing import List, Dict, Any, Optional, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"  # Healthy: calls go through
+    OPEN = "open"  # Failing: skipped until the cooldown elapses
+    HALF_OPEN = "half_open"  # Cooldown over: one probe call decides
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider is skipped because its circuit is open"""
+    pass
+
+
+class ProviderHealth:
+    """Health of one provider (EWMA latency, EWMA error rate, circuit state)"""
+
+    def __init__(self, name: str, alpha: float):
+        self.name = name
+        self.alpha = alpha
+        self.state = CircuitState.CLOSED
+        self.ewma_latency: Optional[float] = None  # Seconds, successful calls only
+        self.error_rate = 0.0  # EWMA of failures (1) vs successes (0)
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.last_error: Optional[str] = None
+
+    def _observe(self, failed: bool):
+        self.calls += 1
+        self.error_rate = self.alpha * (1.0 if failed else 0.0) + (1 - self.alpha) * self.error_rate
+
+    def record_success(self, latency: float):
+        self._observe(False)
+        self.ewma_latency = latency if self.ewma_latency is None else (
+            self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        )
+        self.consecutive_failures = 0
+        self.probing = False
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit for {self.name} closed after a successful probe")
+        self.state = CircuitState.CLOSED
+        self.opened_at = None
+
+    def record_failure(self, error: BaseException):
+        self._observe(True)
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"[:200]
+        self.probing = False
+
+    def score(self) -> float:
+        """Expected cost of a call: latency inflated by the error rate (lower is better)"""
+        return (self.ewma_latency or 0.0) * (1 + 2 * self.error_rate)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "calls": self.calls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for_s": round(now - self.opened_at, 1) if self.opened_at is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderHealthTracker:
+    """
+    Per-provider health with a circuit breaker and latency-aware ordering
+
+    - A circuit opens after `failure_threshold` consecutive failures, or
+      when the error-rate EWMA exceeds `error_rate_threshold` (after
+      `min_samples` calls); open providers are skipped
+    - After `cooldown` seconds the circuit is half-open: a single probe
+      call is let through and closes or re-opens it
+    - With `reorder`, available providers with `min_samples` calls are
+      ordered by EWMA latency × (1 + 2·error rate); the others keep their
+      configured position after them
+
+    Configuration via environment variables (read by `LLMService`):
+    - LLM_HEALTH_EWMA_ALPHA (weight of the newest call, default 0.2)
+    - LLM_BREAKER_FAILURES (consecutive failures that open, default 3)
+    - LLM_BREAKER_ERROR_RATE (error-rate EWMA that opens, default 0.5)
+    - LLM_BREAKER_COOLDOWN (seconds before a probe, default 30)
+    - LLM_PROVIDER_REORDER (default true)
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        cooldown: float = 30.0,
+        min_samples: int = 5,
+        reorder: bool = True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.reorder = reorder
+        self.clock = clock
+        self.providers: Dict[str, ProviderHealth] = {}
+        self.skipped = 0
+
+    def get(self, name: str) -> ProviderHealth:
+        health = self.providers.get(name)
+        if health is None:
+            health = self.providers[name] = ProviderHealth(name, self.alpha)
+        return health
+
+    def available(self, name: str) -> bool:
+        """Whether a call may be sent now (non-mutating)"""
+        health = self.get(name)
+        if health.state == CircuitState.CLOSED:
+            return True
+        if health.state == CircuitState.OPEN:
+            return self.clock() - health.opened_at >= self.cooldown
+        return not health.probing
+
+    def order(self, items: List[T], name_of: Callable[[T], str]) -> List[T]:
+        """Items (providers) in the order they should be tried"""
+        indexed = list(enumerate(items))
+        usable = [(i, item) for i, item in indexed if self.available(name_of(item))]
+        if not usable:
+            logger.warning("Every provider circuit is open")
+            return []
+
+        if self.reorder:
+            def key(entry):
+                i, item = entry
+                health = self.get(name_of(item))
+                known = health.calls >= self.min_samples and health.ewma_latency is not None
+                return (0 if known else 1, health.score() if known else 0.0, i)
+            usable.sort(key=key)
+        return [item for _, item in usable]
+
+    def acquire(self, name: str):
+        """
+        Claim a call slot; raises CircuitOpenError if the circuit forbids it
+
+        Moves an open circuit whose cooldown elapsed to half-open and lets
+        exactly one probe through.
+        """
+        health = self.get(name)
+        if health.state == CircuitState.OPEN and self.clock() - health.opened_at >= self.cooldown:
+            health.state = CircuitState.HALF_OPEN
+            logger.info(f"Circuit for {name} half-open, sending a probe")
+        if health.state == CircuitState.OPEN or (health.state == CircuitState.HALF_OPEN and health.probing):
+            self.skipped += 1
+            raise CircuitOpenError(f"{name} circuit is {health.state.value}")
+        if health.state == CircuitState.HALF_OPEN:
+            health.probing = True
+
+    def release(self, name: str):
+        """Give back a slot without an outcome (cancelled call)"""
+        self.get(name).probing = False
+
+    def record_success(self, name: str, latency: float):
+        self.get(name).record_success(latency)
+
+    def record_failure(self, name: str, error: BaseException):
+        health = self.get(name)
+        health.record_failure(error)
+        should_open = (
+            health.state == CircuitState.HALF_OPEN
+            or health.consecutive_failures >= self.failure_threshold
+            or (health.calls >= self.min_samples and health.error_rate >= self.error_rate_threshold)
+        )
+        if should_open and health.state != CircuitState.OPEN:
+            logger.warning(
+                f"Circuit for {name} opened ({health.consecutive_failures} consecutive failures, "
+                f"error rate {health.error_rate:.2f}); skipping it for {self.cooldown:.0f}s"
+            )
+        if should_open:
+            health.state = CircuitState.OPEN
+            health.opened_at = self.clock()
+
+    def stats(self) -> Dict[str, Any]:
+        now = self.clock()
+        return {
+            "skipped_calls": self.skipped,
+            "providers": {name: health.stats(now) for name, health in self.providers.items()},
+        }
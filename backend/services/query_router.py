@@ -0,0 +1,226 @@
+"""
+Query Router - Send each codebase query to the cheapest index that can answer it
+Identifier/path queries go to exact indexes, natural language to vector search
+"""
+import os
+import re
+import time
+import logging
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.manifest import DEFAULT_EXTENSIONS, TEXT_EXTENSIONS
+from services.mcp import CodeSearchResult, get_mcp_service
+
+logger = logging.getLogger(__name__)
+
+ROUTES = ("exact", "path", "lexical", "semantic", "hybrid")
+
+# File names the path route can answer: exactly what the trigram index covers
+_PATH_EXTENSIONS = {ext.lstrip(".") for ext in DEFAULT_EXTENSIONS | TEXT_EXTENSIONS}
+_QUOTED = re.compile(r"""^(["'`])(.+)\1$""")
+_FILENAME = re.compile(r"^[\w.-]+\.(\w+)$")
+_IDENTIFIER = re.compile(
+    r"^(?:"
+    r"[A-Za-z_$][\w$]*_[\w$]*"          # snake_case, SCREAMING_CASE, _private
+    r"|[a-z$][a-z0-9$]*[A-Z][\w$]*"     # camelCase
+    r"|[A-Z][a-z0-9]+[A-Z][\w$]*"       # PascalCase (at least two humps)
+    r"|[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)+"  # dotted.access
+    r"|[A-Za-z_$][\w$]*\(\)"            # call()
+    r")$"
+)
+
+
+def _is_path(token: str) -> bool:
+    if "/" in token or "\\" in token:
+        return True
+    match = _FILENAME.match(token)
+    return bool(match) and match.group(1).lower() in _PATH_EXTENSIONS
+
+
+def classify_query(query: str) -> Tuple[str, Optional[str]]:
+    """
+    Decide which index should answer a query
+
+    - "path": a single file name or path ("auth/service.py")
+    - "exact": a single identifier or quoted literal ("getUserById", "MAX_RETRIES")
+    - "semantic": natural language without identifiers (3+ words)
+    - "hybrid": anything in between (identifiers mixed with words, 1-2 plain words)
+
+    Returns:
+        (route, literal) where literal is the text to look up for path/exact routes
+    """
+    query = query.strip()
+    quoted = _QUOTED.match(query)
+    if quoted:
+        return "exact", quoted.group(2)
+
+    tokens = query.split()
+    if len(tokens) == 1:
+        token = tokens[0]
+        if _is_path(token):
+            return "path", token
+        if _IDENTIFIER.match(token):
+            return "exact", token[:-2] if token.endswith("()") else token
+
+    has_code_tokens = any(_is_path(t) or _IDENTIFIER.match(t.strip(",.;:?!")) for t in tokens)
+    if len(tokens) >= 3 and not has_code_tokens:
+        return "semantic", None
+    return "hybrid", None
+
+
+def normalize_scores(results: List[CodeSearchResult]) -> List[CodeSearchResult]:
+    """
+    Scale a result list's scores into (0, 1] by its best score
+
+    Keeps the native spread (vector similarity, BM25, fused RRF) so a weak
+    list stays weak relative to its best hit. Unscored results (exact and
+    path matches) all get 1.0; lists with non-positive scores are returned
+    as they are.
+    """
+    scores = [result.score for result in results]
+    if all(score is None for score in scores):
+        return [result.model_copy(update={"score": 1.0}) for result in results]
+    if not all(score is not None and score > 0 for score in scores):
+        return results
+    top = max(scores)
+    return [result.model_copy(update={"score": round(result.score / top, 6)}) for result in results]
+
+
+class RouteStats:
+    """Latency and hit-rate counters for one route"""
+
+    def __init__(self, window: int = 256):
+        self.queries = 0
+        self.hits = 0  # Queries that returned at least one result
+        self.fallbacks = 0  # Queries handed to the next route after an empty answer
+        self.latencies_ms = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, hit: bool):
+        self.queries += 1
+        self.hits += int(hit)
+        self.latencies_ms.append(elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1) if latencies else 0.0
+
+        return {
+            "queries": self.queries,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.queries, 3) if self.queries else 0.0,
+            "fallbacks": self.fallbacks,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+        }
+
+
+class QueryRouter:
+    """
+    Routes codebase queries between the trigram, BM25 and vector indexes
+
+    Identifier and path queries are answered by the local exact indexes
+    (milliseconds, no embedding call); when those come back empty the query
+    falls back to BM25 and then to vector search. Natural-language queries go
+    straight to vector search and mixed ones use hybrid (vector + BM25 fused).
+
+    Single-index routes keep their native scores and only hybrid fuses
+    (reciprocal rank fusion); every list is then scaled into (0, 1] by its
+    best score (see normalize_scores), so results from different routes can
+    be merged by score in the search scheduler.
+
+    Configuration via environment variables:
+    - QUERY_ROUTER_ENABLED (default true; false = every query uses the
+      default MCP_SEARCH_MODE, as before)
+    """
+
+    # Next route to try when a route finds nothing
+    FALLBACKS = {"exact": "lexical", "path": "lexical", "lexical": "semantic"}
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.route_stats: Dict[str, RouteStats] = {route: RouteStats() for route in ROUTES}
+
+    async def _run_route(
+        self,
+        route: str,
+        path: str,
+        query: str,
+        literal: Optional[str],
+        limit: int,
+        extension_filter: Optional[List[str]]
+    ) -> List[CodeSearchResult]:
+        mcp_service = get_mcp_service()
+        if route == "exact":
+            return await mcp_service.grep_code(path, literal, limit=limit, extension_filter=extension_filter)
+        if route == "path":
+            return await mcp_service.find_files(path, literal, limit=limit)
+        return await mcp_service.search_code(path, query, limit, extension_filter, mode=route)
+
+    async def search(
+        self,
+        path: str,
+        query: str,
+        limit: int = 10,
+        extension_filter: Optional[List[str]] = None
+    ) -> List[CodeSearchResult]:
+        """
+        Search a codebase through the route chosen for `query`
+
+        Args:
+            path: Absolute path to indexed codebase
+            query: Identifier, path or natural language query
+            limit: Maximum results to return
+            extension_filter: Filter by file extensions (e.g. ['.ts', '.py'])
+
+        Returns:
+            List of code search results with scores scaled into (0, 1]
+        """
+        if not self.enabled:
+            return await get_mcp_service().search_code(path, query, limit, extension_filter)
+
+        route, literal = classify_query(query)
+        while True:
+            started = time.perf_counter()
+            try:
+                results = await self._run_route(route, path, query, literal, limit, extension_filter)
+            except Exception as e:
+                if route not in self.FALLBACKS:
+                    raise
+                logger.warning(f"Route {route} failed for query {query!r}: {e}")
+                results = []
+            self.route_stats[route].record((time.perf_counter() - started) * 1000, bool(results))
+
+            if results or route not in self.FALLBACKS:
+                break
+            self.route_stats[route].fallbacks += 1
+            route = self.FALLBACKS[route]
+
+        logger.debug(f"Query routed to {route}: {query!r} ({len(results)} results)")
+        return normalize_scores(results)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "routes": {route: stats.snapshot() for route, stats in self.route_stats.items()},
+        }
+
+
+# Global instance (optional pattern)
+_query_router = None
+
+def get_query_router() -> QueryRouter:
+    """Get or create QueryRouter singleton"""
+    global _query_router
+    if _query_router is None:
+        _query_router = QueryRouter(
+            enabled=os.getenv("QUERY_ROUTER_ENABLED", "true").lower() == "true"
+        )
+    return _query_router
+
+
+def get_query_router_stats() -> Optional[Dict[str, Any]]:
+    """Router metrics if the router has been created (never creates it)"""
+    return _query_router.stats() if _query_router is not None else None
@@ -0,0 +1,246 @@
+"""
+Rate Limiter - Token buckets per LLM provider/model for requests and tokens per minute
+Callers queue (FIFO, with a deadline) instead of hitting provider 429s
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot get quota before its deadline"""
+    pass
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` units, refilled at `rate` units/second"""
+
+    def __init__(self, capacity: float, rate: float, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = rate
+        self.clock = clock
+        self.level = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if now)"""
+        self._refill()
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket, not forever
+        return max(0.0, (amount - self.level) / self.rate) if self.rate > 0 else 0.0
+
+    def take(self, amount: float):
+        """Consume units (may go negative when settling actual usage)"""
+        self._refill()
+        self.level -= min(amount, self.capacity) if amount > 0 else amount
+
+    def give(self, amount: float):
+        """Return units taken for a call that never ran (capped at capacity)"""
+        self._refill()
+        self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+    def drain(self):
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+
+class LimitState:
+    """Buckets, FIFO queue and counters of one limit key"""
+
+    def __init__(self, rpm: int, tpm: int, clock=time.monotonic):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, rpm / 60.0, clock) if rpm else None
+        self.tokens = TokenBucket(tpm, tpm / 60.0, clock) if tpm else None
+        self.lock = asyncio.Lock()  # FIFO: waiters are served in arrival order
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.throttled = 0  # 429s reported by the provider despite the limiter
+        self.refunded = 0  # Admitted calls cancelled before they settled
+        self.wait_seconds = 0.0
+
+    def wait_time(self, tokens: int) -> float:
+        waits = [0.0]
+        if self.requests is not None:
+            waits.append(self.requests.wait_time(1))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_time(tokens))
+        return max(waits)
+
+    def take(self, tokens: int):
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+    def give(self, tokens: int):
+        if self.requests is not None:
+            self.requests.give(1)
+        if self.tokens is not None:
+            self.tokens.give(tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rpm": self.rpm or None,
+            "tpm": self.tpm or None,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "admitted": self.admitted,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+            "throttled_by_provider": self.throttled,
+            "refunded": self.refunded,
+            "avg_wait_ms": round(self.wait_seconds / self.delayed * 1000, 1) if self.delayed else 0.0,
+        }
+
+
+class ProviderRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits per provider and model
+
+    Limits are looked up as "<Provider>:<model>", then "<Provider>", then the
+    defaults; each matched key has its own buckets, so a per-model quota
+    is shared by every caller of that model. Callers wait in FIFO order;
+    one that would wait past its deadline gets RateLimitExceeded (and the
+    service moves on to the next provider). Token costs are estimated up
+    front and corrected with the reported usage afterwards.
+
+    Configuration via environment variables:
+    - LLM_RATE_LIMITS (JSON, e.g. {"GoogleGeminiProvider:gemini-2.5-pro": {"rpm": 5, "tpm": 250000}})
+    - LLM_RATE_LIMIT_RPM / LLM_RATE_LIMIT_TPM (defaults for every provider, 0 = unlimited)
+    - LLM_RATE_LIMIT_MAX_WAIT (longest a call queues, seconds, default 10)
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, int]]] = None,
+        default_rpm: int = 0,
+        default_tpm: int = 0,
+        max_wait: float = 10.0,
+        clock=time.monotonic
+    ):
+        self.limits = limits or {}
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.max_wait = max_wait
+        self.clock = clock
+        self._states: Dict[str, LimitState] = {}
+
+    def _resolve(self, provider: str, model: Optional[str]) -> Optional[Tuple[str, int, int]]:
+        for key in (f"{provider}:{model}", provider):
+            if key in self.limits:
+                config = self.limits[key]
+                return key, int(config.get("rpm", 0)), int(config.get("tpm", 0))
+        if self.default_rpm or self.default_tpm:
+            return provider, self.default_rpm, self.default_tpm
+        return None
+
+    def _state(self, provider: str, model: Optional[str]) -> Optional[LimitState]:
+        resolved = self._resolve(provider, model)
+        if resolved is None:
+            return None
+        key, rpm, tpm = resolved
+        if not rpm and not tpm:
+            return None
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = LimitState(rpm, tpm, self.clock)
+        return state
+
+    async def acquire(self, provider: str, model: Optional[str], tokens: int, max_wait: Optional[float] = None) -> float:
+        """
+        Wait for quota for one call of about `tokens` tokens
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: quota would not be available within `max_wait`
+        """
+        state = self._state(provider, model)
+        if state is None:
+            return 0.0
+
+        started = self.clock()
+        deadline = started + (self.max_wait if max_wait is None else max_wait)
+        state.queued += 1
+        state.max_queued = max(state.max_queued, state.queued)
+        try:
+            async with state.lock:
+                while True:
+                    wait = state.wait_time(tokens)
+                    if wait <= 0:
+                        state.take(tokens)
+                        break
+                    if self.clock() + wait > deadline:
+                        state.rejected += 1
+                        raise RateLimitExceeded(
+                            f"{provider} ({model}) quota unavailable for {wait:.1f}s "
+                            f"({state.queued - 1} other call(s) queued)"
+                        )
+                    await asyncio.sleep(wait)
+        finally:
+            state.queued -= 1
+
+        waited = self.clock() - started
+        state.admitted += 1
+        if waited > 0:
+            state.delayed += 1
+            state.wait_seconds += waited
+        return waited
+
+    def settle(self, provider: str, model: Optional[str], estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token bucket once the real usage is known"""
+        state = self._state(provider, model)
+        if state is None or state.tokens is None or not actual_tokens:
+            return
+        state.tokens.take(actual_tokens - estimated_tokens)
+
+    def refund(self, provider: str, model: Optional[str], estimated_tokens: int):
+        """Give back the quota reserved by acquire() for a call that was cancelled before settling"""
+        state = self._state(provider, model)
+        if state is None:
+            return
+        state.refunded += 1
+        state.give(estimated_tokens)
+
+    def throttled(self, provider: str, model: Optional[str]):
+        """Provider answered 429: empty the request bucket so callers back off"""
+        state = self._state(provider, model)
+        if state is None:
+            return
+        state.throttled += 1
+        if state.requests is not None:
+            state.requests.drain()
+
+    def stats(self) -> Dict[str, Any]:
+        return {key: state.stats() for key, state in self._states.items()}
+
+
+def rate_limiter_from_env() -> ProviderRateLimiter:
+    """ProviderRateLimiter configured from LLM_RATE_LIMIT* environment variables"""
+    raw = os.getenv("LLM_RATE_LIMITS", "").strip()
+    limits = {}
+    if raw:
+        try:
+            limits = json.loads(raw)
+        except ValueError as e:
+            logger.warning(f"Ignoring invalid LLM_RATE_LIMITS: {e}")
+    return ProviderRateLimiter(
+        limits=limits,
+        default_rpm=int(os.getenv("LLM_RATE_LIMIT_RPM", "0")),
+        default_tpm=int(os.getenv("LLM_RATE_LIMIT_TPM", "0")),
+        max_wait=float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "10"))
+    )
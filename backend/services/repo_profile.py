@@ -0,0 +1,258 @@
+"""
+Repository Profile - Compact stack/layout summary per repository
+Computed once per HEAD commit and persisted, then injected into agent prompts
+"""
+import os
+import re
+import json
+import asyncio
+import logging
+import tomllib
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from pydantic import BaseModel
+
+from services.cache import TTLCache, repo_index_dir
+from services.manifest import DEFAULT_IGNORED_DIRS, get_head_commit, iter_repository_files
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_BY_EXTENSION = {
+    ".py": "Python", ".ipynb": "Python", ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".js": "JavaScript", ".jsx": "JavaScript", ".java": "Java", ".kt": "Kotlin", ".scala": "Scala",
+    ".go": "Go", ".rs": "Rust", ".rb": "Ruby", ".php": "PHP", ".cs": "C#", ".swift": "Swift",
+    ".c": "C", ".h": "C", ".cpp": "C++", ".hpp": "C++", ".m": "Objective-C", ".mm": "Objective-C",
+    ".md": "Markdown", ".markdown": "Markdown",
+}
+
+MANIFEST_FILES = {
+    "package.json", "pyproject.toml", "requirements.txt", "setup.py", "Pipfile", "go.mod",
+    "Cargo.toml", "pom.xml", "build.gradle", "build.gradle.kts", "Gemfile", "composer.json",
+}
+
+# Dependency name (as it appears in a manifest) -> framework label
+FRAMEWORK_MARKERS = {
+    "fastapi": "FastAPI", "django": "Django", "flask": "Flask", "langgraph": "LangGraph",
+    "langchain": "LangChain", "sqlalchemy": "SQLAlchemy", "celery": "Celery", "pydantic": "Pydantic",
+    "react": "React", "next": "Next.js", "vue": "Vue", "nuxt": "Nuxt", "svelte": "Svelte",
+    "@angular/core": "Angular", "express": "Express", "@nestjs/core": "NestJS", "fastify": "Fastify",
+    "vite": "Vite", "tailwindcss": "Tailwind CSS", "prisma": "Prisma",
+    "github.com/gin-gonic/gin": "Gin", "github.com/labstack/echo": "Echo", "github.com/gofiber/fiber": "Fiber",
+    "actix-web": "Actix Web", "axum": "Axum", "rocket": "Rocket", "tokio": "Tokio",
+    "spring-boot": "Spring Boot", "rails": "Rails", "laravel/framework": "Laravel",
+}
+
+ENTRY_POINT_NAMES = {
+    "main.py", "app.py", "manage.py", "wsgi.py", "asgi.py", "__main__.py", "main.go", "main.rs",
+    "server.js", "server.ts", "index.js", "index.ts", "main.ts", "main.tsx", "main.js", "Program.cs",
+}
+
+
+class RepositoryProfile(BaseModel):
+    """Compact summary of a repository's stack and layout"""
+    path: str
+    name: str
+    commit: Optional[str] = None
+    generated_at: datetime
+    file_count: int
+    languages: Dict[str, int]  # Language -> file count, largest first
+    modules: Dict[str, int]  # Top-level directory -> file count, largest first
+    frameworks: List[str]
+    manifests: List[str]
+    entry_points: List[str]
+
+    def render(self) -> str:
+        """One compact prompt block for this repository"""
+        total = sum(self.languages.values()) or 1
+        languages = ", ".join(f"{lang} {count * 100 // total}%" for lang, count in list(self.languages.items())[:4])
+        modules = ", ".join(f"{name}/ ({count})" for name, count in list(self.modules.items())[:8])
+        commit = f" @ {self.commit[:7]}" if self.commit else ""
+        lines = [
+            f"{self.name}{commit} ({self.path}): {self.file_count} files",
+            f"  languages: {languages or 'unknown'}",
+            f"  frameworks: {', '.join(self.frameworks) or 'none detected'}",
+            f"  modules: {modules or '(flat)'}",
+        ]
+        if self.entry_points:
+            lines.append(f"  entry points: {', '.join(self.entry_points[:6])}")
+        return "\n".join(lines)
+
+
+def _dependency_names(path: Path) -> List[str]:
+    """Dependency names declared in one manifest file (best effort)"""
+    try:
+        text = path.read_text(errors="replace")
+    except OSError:
+        return []
+
+    if path.name in ("package.json", "composer.json"):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return []
+        names = []
+        for key in ("dependencies", "devDependencies", "peerDependencies", "require", "require-dev"):
+            names.extend((data.get(key) or {}).keys())
+        return [n.lower() for n in names]
+
+    if path.suffix == ".toml":
+        try:
+            data = tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            return []
+        project = data.get("project", {})
+        poetry = data.get("tool", {}).get("poetry", {})
+        names = list(project.get("dependencies", []))  # PEP 508 strings, normalized later
+        names += list(poetry.get("dependencies", {}).keys())
+        names += list(data.get("dependencies", {}).keys())  # Cargo.toml
+        return [n.strip().lower() for n in names]
+
+    # requirements.txt, go.mod, Gemfile, pom.xml, gradle, setup.py: plain-text scan
+    return text.lower().replace("'", " ").replace('"', " ").split()
+
+
+def _detect_frameworks(dependency_names: List[str]) -> List[str]:
+    found = []
+    for raw in dependency_names:
+        name = re.split(r"[=<>~!;,\[\s]", raw.strip())[0]
+        for marker, label in FRAMEWORK_MARKERS.items():
+            matches = (
+                name == marker
+                or ("/" in marker and name.startswith(marker))  # Go module paths
+                or (marker == "spring-boot" and marker in name)  # spring-boot-starter-*
+            )
+            if matches and label not in found:
+                found.append(label)
+    return found
+
+
+def build_profile(repo_path: str, commit: Optional[str] = None) -> RepositoryProfile:
+    """Walk a repository once and summarize it (blocking)"""
+    root = Path(repo_path)
+    languages: Counter = Counter()
+    modules: Counter = Counter()
+    entry_points = []
+    file_count = 0
+
+    for rel in iter_repository_files(repo_path):
+        file_count += 1
+        parts = Path(rel).parts
+        language = LANGUAGE_BY_EXTENSION.get(os.path.splitext(rel)[1])
+        if language:
+            languages[language] += 1
+        if len(parts) > 1:
+            modules[parts[0]] += 1
+        if parts[-1] in ENTRY_POINT_NAMES and len(parts) <= 3:
+            entry_points.append(rel.replace(os.sep, "/"))
+
+    # Manifests at the root and one level down (monorepos: backend/, frontend/, ...)
+    manifests = []
+    dependency_names: List[str] = []
+    directories = [root]
+    if root.is_dir():
+        directories += sorted(
+            d for d in root.iterdir()
+            if d.is_dir() and not d.name.startswith(".") and d.name not in DEFAULT_IGNORED_DIRS
+        )
+    for directory in directories:
+        for name in sorted(MANIFEST_FILES):
+            manifest = directory / name
+            if manifest.is_file():
+                manifests.append(str(manifest.relative_to(root)).replace(os.sep, "/"))
+                dependency_names.extend(_dependency_names(manifest))
+
+    return RepositoryProfile(
+        path=repo_path,
+        name=root.name,
+        commit=commit,
+        generated_at=datetime.now(timezone.utc),
+        file_count=file_count,
+        languages=dict(languages.most_common()),
+        modules=dict(modules.most_common()),
+        frameworks=_detect_frameworks(dependency_names),
+        manifests=manifests,
+        entry_points=sorted(entry_points, key=lambda p: (p.count("/"), p)),
+    )
+
+
+class RepositoryProfiler:
+    """
+    Repository profiles cached per HEAD commit
+
+    - Profiles of git repositories are persisted under
+      CONTEXT2TASK_CACHE_DIR/profiles/<hash>/ and reused until HEAD moves
+    - Non-git directories are only cached in memory, for `ttl` seconds
+
+    Configuration via environment variables:
+    - REPO_PROFILE_TTL (seconds a profile without a commit stays valid, default 600)
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self._memory = TTLCache(maxsize=256, ttl=ttl)
+
+    def _profile_file(self, repo_path: str) -> Path:
+        return repo_index_dir("profiles", repo_path) / "profile.json"
+
+    def _load_or_build(self, repo_path: str, commit: Optional[str]) -> RepositoryProfile:
+        profile_file = self._profile_file(repo_path)
+        if commit and profile_file.exists():
+            try:
+                stored = RepositoryProfile.model_validate_json(profile_file.read_text())
+                if stored.commit == commit:
+                    return stored
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable profile for {repo_path}: {e}")
+
+        profile = build_profile(repo_path, commit)
+        if commit:
+            tmp = profile_file.with_suffix(".tmp")
+            tmp.write_text(profile.model_dump_json())
+            tmp.replace(profile_file)
+
+        logger.info(f"Repository profile built for {repo_path} (commit {commit}): {profile.file_count} files")
+        return profile
+
+    async def get_profile(self, repo_path: str) -> Optional[RepositoryProfile]:
+        """Profile for a repository, or None if it cannot be read"""
+        if not os.path.isdir(repo_path):
+            return None
+        commit = get_head_commit(repo_path)
+        key = (os.path.abspath(repo_path), commit)
+        cached = self._memory.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            profile = await asyncio.to_thread(self._load_or_build, repo_path, commit)
+        except Exception as e:
+            logger.warning(f"Could not profile repository {repo_path}: {e}")
+            return None
+
+        # Commit-pinned profiles never go stale; others expire after `ttl`
+        self._memory.set(key, profile, ttl=float("inf") if commit else None)
+        return profile
+
+    async def describe(self, repo_paths: List[str]) -> str:
+        """Rendered profiles of several repositories (falls back to the bare paths)"""
+        profiles = await asyncio.gather(*(self.get_profile(p) for p in repo_paths))
+        blocks = [
+            profile.render() if profile is not None else f"{path}: (profile unavailable)"
+            for path, profile in zip(repo_paths, profiles)
+        ]
+        return "\n".join(blocks) if blocks else "No repositories selected."
+
+
+# Global instance (optional pattern)
+_repository_profiler = None
+
+def get_repository_profiler() -> RepositoryProfiler:
+    """Get or create RepositoryProfiler singleton"""
+    global _repository_profiler
+    if _repository_profiler is None:
+        _repository_profiler = RepositoryProfiler(
+            ttl=float(os.getenv("REPO_PROFILE_TTL", "600"))
+        )
+    return _repository_profiler
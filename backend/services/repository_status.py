@@ -0,0 +1,134 @@
+"""
+Repository Status Cache - In-memory indexing status for discovery endpoints
+Serves statuses from memory and refreshes stale ones in the background
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from services.mcp import IndexingStatus, get_mcp_service
+
+logger = logging.getLogger(__name__)
+
+
+class RepositoryStatusCache:
+    """
+    Stale-while-revalidate cache of MCP indexing statuses
+
+    - Unknown paths are fetched with a single bulk MCP lookup
+    - Entries older than `ttl` are still served, and refreshed in one background bulk lookup
+    - `invalidate()` / `set_status()` keep it coherent with indexing requests
+    - The discovered repository list itself is kept for `discovery_ttl`
+      seconds, so discovery endpoints don't rescan the filesystem per request
+
+    Configuration via environment variables:
+    - REPO_STATUS_CACHE_TTL (seconds before an entry is refreshed, default 60)
+    - REPO_DISCOVERY_TTL (seconds before repositories are rediscovered, default 300)
+    """
+
+    def __init__(self, ttl: float = 60.0, discovery_ttl: float = 300.0):
+        self.ttl = ttl
+        self.discovery_ttl = discovery_ttl
+        self._discovered: Optional[tuple] = None  # (paths, discovered_at)
+        self._discovery_lock = asyncio.Lock()
+        self._entries: Dict[str, tuple] = {}  # absolute path -> (IndexingStatus, fetched_at)
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.bulk_lookups = 0
+        self.background_refreshes = 0
+        self.discovery_scans = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    async def get_statuses(self, paths: List[str]) -> Dict[str, IndexingStatus]:
+        """
+        Return statuses for `paths`, fetching only those never seen before
+
+        Args:
+            paths: Repository paths
+
+        Returns:
+            Mapping of path -> IndexingStatus
+        """
+        known = {p: self._entries[self._key(p)] for p in paths if self._key(p) in self._entries}
+        missing = [p for p in paths if p not in known]
+        fetched = await self._refresh(missing) if missing else {}
+
+        now = time.monotonic()
+        result: Dict[str, IndexingStatus] = {}
+        stale = []
+        for p in paths:
+            entry = self._entries.get(self._key(p))
+            if entry is None:
+                # Invalidated while the lookup was in flight (e.g. a job finished):
+                # answer with what we had and refetch it in the background
+                previous = known.get(p)
+                result[p] = fetched.get(p) or (previous[0] if previous else IndexingStatus(path=p, status="unknown"))
+                stale.append(p)
+                continue
+            status, fetched_at = entry
+            result[p] = status
+            if now - fetched_at > self.ttl:
+                stale.append(p)
+
+        if stale and (self._refresh_task is None or self._refresh_task.done()):
+            self.background_refreshes += 1
+            self._refresh_task = asyncio.create_task(self._refresh(stale))
+
+        return result
+
+    async def _refresh(self, paths: List[str]) -> Dict[str, IndexingStatus]:
+        try:
+            statuses = await get_mcp_service().get_indexing_statuses(paths)
+        except Exception as e:
+            logger.warning(f"Repository status refresh failed: {e}")
+            statuses = {p: IndexingStatus(path=p, status="unknown") for p in paths}
+
+        self.bulk_lookups += 1
+        fetched_at = time.monotonic()
+        for path, status in statuses.items():
+            self._entries[self._key(path)] = (status, fetched_at)
+        return statuses
+
+    def set_status(self, status: IndexingStatus):
+        """Record a status observed elsewhere (e.g. single-repo status endpoint)"""
+        self._entries[self._key(status.path)] = (status, time.monotonic())
+
+    def invalidate(self, path: str):
+        """Forget a path so the next lookup fetches it fresh"""
+        self._entries.pop(self._key(path), None)
+
+    async def get_discovered(self, discover: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        """Repository paths from `discover()`, rescanned at most every `discovery_ttl` seconds"""
+        async with self._discovery_lock:  # Concurrent requests share one scan
+            if self._discovered is None or time.monotonic() - self._discovered[1] > self.discovery_ttl:
+                self._discovered = (await discover(), time.monotonic())
+                self.discovery_scans += 1
+            return list(self._discovered[0])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl,
+            "bulk_lookups": self.bulk_lookups,
+            "background_refreshes": self.background_refreshes,
+            "discovery_scans": self.discovery_scans,
+        }
+
+
+# Global instance (optional pattern)
+_status_cache = None
+
+def get_repository_status_cache() -> RepositoryStatusCache:
+    """Get or create RepositoryStatusCache singleton"""
+    global _status_cache
+    if _status_cache is None:
+        _status_cache = RepositoryStatusCache(
+            ttl=float(os.getenv("REPO_STATUS_CACHE_TTL", "60")),
+            discovery_ttl=float(os.getenv("REPO_DISCOVERY_TTL", "300"))
+        )
+    return _status_cache
@@ -0,0 +1,126 @@
+"""
+Search Scheduler - Bounded-concurrency fan-out for codebase search
+Runs repo × query searches concurrently with global and per-repository limits
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Tuple, Callable, Awaitable, Optional
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+SearchFn = Callable[[str, str], Awaitable[List[Any]]]
+
+
+class SearchBatchResult(BaseModel):
+    """Merged results of a search fan-out"""
+    results: List[Dict[str, Any]]
+    searches: int
+    failures: int
+    wall_ms: float  # Actual latency with concurrency
+    serial_ms: float  # Sum of individual latencies (what a serial loop would cost)
+
+
+class SearchScheduler:
+    """
+    Bounded-concurrency scheduler for codebase searches
+
+    - Global limit caps total in-flight searches across all turns/sessions
+    - Per-repo limit stops a single repository from monopolizing the MCP workers
+    - Results are merged by score (highest first), not by arrival order
+
+    Configuration via environment variables:
+    - MCP_SEARCH_CONCURRENCY (global limit, default 8)
+    - MCP_SEARCH_PER_REPO_CONCURRENCY (default 3)
+    """
+
+    def __init__(self, max_concurrency: int = 8, per_repo_concurrency: int = 3):
+        self.max_concurrency = max_concurrency
+        self.per_repo_concurrency = per_repo_concurrency
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._per_repo: Dict[str, asyncio.Semaphore] = {}
+
+    def _repo_semaphore(self, repo: str) -> asyncio.Semaphore:
+        if repo not in self._per_repo:
+            self._per_repo[repo] = asyncio.Semaphore(self.per_repo_concurrency)
+        return self._per_repo[repo]
+
+    async def _run_one(
+        self,
+        search_fn: SearchFn,
+        repo: str,
+        query: str
+    ) -> Tuple[Optional[List[Any]], float]:
+        async with self._repo_semaphore(repo), self._global:
+            started = time.perf_counter()
+            try:
+                results = await search_fn(repo, query)
+            except Exception as e:
+                logger.warning(f"MCP search failed for {repo}: {e}")
+                results = None
+            return results, (time.perf_counter() - started) * 1000
+
+    async def run(
+        self,
+        search_fn: SearchFn,
+        requests: List[Tuple[str, str]]
+    ) -> SearchBatchResult:
+        """
+        Execute (repo, query) searches concurrently and merge by score
+
+        Args:
+            search_fn: Coroutine `(repo, query) -> List[CodeSearchResult]`
+            requests: (repo, query) pairs to search
+
+        Returns:
+            SearchBatchResult with score-ordered result dicts (tagged with repository)
+        """
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(self._run_one(search_fn, repo, query) for repo, query in requests)
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        merged = []
+        failures = 0
+        for (repo, _query), (results, _elapsed) in zip(requests, outcomes):
+            if results is None:
+                failures += 1
+                continue
+            for r in results:
+                item = r.model_dump() if isinstance(r, BaseModel) else dict(r)
+                item.setdefault("repository", repo)
+                merged.append(item)
+
+        # Stable sort keeps per-query rank order for ties and unscored results
+        merged.sort(key=lambda r: r.get("score") if r.get("score") is not None else float("-inf"), reverse=True)
+
+        batch = SearchBatchResult(
+            results=merged,
+            searches=len(requests),
+            failures=failures,
+            wall_ms=round(wall_ms, 1),
+            serial_ms=round(sum(elapsed for _, elapsed in outcomes), 1)
+        )
+
+        logger.info(
+            f"Search fan-out: {batch.searches} searches, {len(merged)} results in "
+            f"{batch.wall_ms}ms (serial estimate {batch.serial_ms}ms, {failures} failed)"
+        )
+        return batch
+
+
+# Global instance (optional pattern)
+_search_scheduler = None
+
+def get_search_scheduler() -> SearchScheduler:
+    """Get or create SearchScheduler singleton"""
+    global _search_scheduler
+    if _search_scheduler is None:
+        _search_scheduler = SearchScheduler(
+            max_concurrency=int(os.getenv("MCP_SEARCH_CONCURRENCY", "8")),
+            per_repo_concurrency=int(os.getenv("MCP_SEARCH_PER_REPO_CONCURRENCY", "3"))
+        )
+    return _search_scheduler
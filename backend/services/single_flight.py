@@ -0,0 +1,64 @@
+"""
+Single Flight - Coalesce identical in-flight async calls
+Concurrent callers with the same key share one running task and its result
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Hashable, Callable, Awaitable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Per-key deduplication of concurrent async work
+
+    The first caller for a key (the leader) starts the work as a task;
+    callers arriving while it runs await the same task. Every caller gets
+    the same result object (or exception) - treat it as read-only. The
+    task is shielded: one caller being cancelled does not cancel the work
+    for the others. Keys are forgotten as soon as the task finishes, so
+    this never serves stale results (that is the caches' job).
+
+    Example:
+        ```python
+        flights = SingleFlight("search")
+        results = await flights.do(cache_key, lambda: backend.search(...))
+        ```
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn()` unless an identical call is already in flight, then share its outcome"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f"{self.name}: joined in-flight call ({len(self._inflight)} in flight)")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved: every waiter may have been cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / calls, 3) if calls else 0.0,
+        }
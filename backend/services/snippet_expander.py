@@ -0,0 +1,307 @@
+"""
+Snippet Expander - Widen search hits to the enclosing function or class
+Files are read through an mmap-backed LRU cache; line offsets and parsed spans are cached per file hash
+"""
+import os
+import re
+import ast
+import mmap
+import hashlib
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from services.cache import TTLCache
+from services.chunking import MAX_FILE_BYTES
+
+logger = logging.getLogger(__name__)
+
+Span = Tuple[int, int]  # 1-based inclusive (start line, end line)
+Buffer = Union[mmap.mmap, bytes]
+
+# Declaration lines for the non-Python heuristic
+_DECLARATION = re.compile(
+    r"\b(class|def|function|func|fn|interface|struct|enum|impl|trait|module|object)\b"
+    r"|^\s*(public|private|protected|internal|static|override)\b.*\("
+    r"|=>\s*\{?\s*$"
+)
+
+
+class MappedFileCache:
+    """
+    LRU cache of memory-mapped source files
+
+    Entries are revalidated by (mtime, size) on every access, so edits on disk
+    are picked up. Callers get the map itself, not a copy, so evicted maps
+    are only dropped (they close once no caller holds them). Thread-safe
+    (expansion runs in worker threads).
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[int, int, Optional[mmap.mmap], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> Optional[Tuple[str, Buffer]]:
+        """Return (sha1, mapped content) for a file, or None if unreadable/too large"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_size > MAX_FILE_BYTES:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                mapped, digest = entry[2], entry[3]
+                return digest, mapped if mapped is not None else b""
+
+            self.misses += 1
+            try:
+                with open(path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else None
+            except (OSError, ValueError):
+                return None
+            digest = hashlib.sha1(mapped if mapped is not None else b"").hexdigest()
+
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, mapped, digest)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+            return digest, mapped if mapped is not None else b""
+
+    def close(self):
+        with self._lock:
+            for _, _, mapped, _ in self._entries.values():
+                if mapped is not None:
+                    mapped.close()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def line_offsets(data: Buffer) -> array:
+    """Byte offset of every line start, followed by the end of the data"""
+    if not data:
+        return array("Q", [0])
+    offsets = array("Q", [0])
+    pos = data.find(b"\n")
+    while pos != -1 and pos + 1 < len(data):
+        offsets.append(pos + 1)
+        pos = data.find(b"\n", pos + 1)
+    offsets.append(len(data))
+    return offsets
+
+
+def read_lines(data: Buffer, offsets: array, first: int, last: int) -> List[str]:
+    """Lines first..last (1-based, inclusive), decoding only their byte range"""
+    chunk = data[offsets[first - 1]:offsets[last]].decode("utf-8", errors="replace")
+    return [line.rstrip("\r") for line in chunk.split("\n")][:last - first + 1]
+
+
+def python_spans(text: str) -> Optional[List[Span]]:
+    """Function/class spans (decorators included) of a Python module, or None if it doesn't parse"""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    spans = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            spans.append((start, node.end_lineno))
+    return sorted(spans)
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def heuristic_span(lines: List[str], start: int, end: int, max_lines: int) -> Optional[Span]:
+    """
+    Enclosing block for lines start..end of a non-Python file
+
+    Scans up for the nearest declaration line indented no deeper than the hit,
+    then finds the block end by brace balance (or indentation when the
+    declaration opens no brace).
+    """
+    hit_indent = min((_indent(hit_line) for hit_line in lines[start - 1:end] if hit_line.strip()), default=0)
+
+    decl = None
+    for number in range(start, max(0, start - max_lines), -1):
+        line = lines[number - 1]
+        if line.strip() and _indent(line) <= hit_indent and _DECLARATION.search(line):
+            decl = number
+            break
+    if decl is None:
+        return None
+
+    header = "\n".join(lines[decl - 1:decl + 2])
+    block_end = None
+    if "{" in header:
+        depth = 0
+        opened = False
+        for number in range(decl, min(len(lines), decl + max_lines) + 1):
+            for char in lines[number - 1]:
+                if char == "{":
+                    depth += 1
+                    opened = True
+                elif char == "}":
+                    depth -= 1
+            if opened and depth <= 0:
+                block_end = number
+                break
+    else:
+        base = _indent(lines[decl - 1])
+        block_end = decl
+        for number in range(decl + 1, min(len(lines), decl + max_lines) + 1):
+            line = lines[number - 1]
+            if not line.strip():
+                continue
+            if _indent(line) <= base:
+                if line.strip() == "end":
+                    block_end = number  # Ruby/Lua-style terminator
+                break
+            block_end = number
+
+    if block_end is None or block_end < end:
+        return None
+    return decl, block_end
+
+
+class SnippetExpander:
+    """
+    Widens search hits to whole functions/classes from the local checkout
+
+    - Python: innermost `def`/`class` enclosing the hit, via `ast`
+    - Other languages: declaration + brace/indent heuristic
+    - Spans larger than `max_lines` keep the original snippet
+
+    Line offsets and Python span lists are cached per file content hash (and
+    heuristic spans per hash + hit range), so unchanged files are parsed once
+    across turns and a hit only decodes the lines around it.
+
+    Configuration via environment variables:
+    - SNIPPET_EXPANSION_ENABLED (default true)
+    - SNIPPET_MAX_LINES (largest expanded snippet, default 80)
+    - SNIPPET_FILE_CACHE_SIZE (memory-mapped files kept open, default 128)
+    """
+
+    def __init__(self, max_lines: int = 80, file_cache_size: int = 128, span_cache_size: int = 2048):
+        self.max_lines = max_lines
+        self.files = MappedFileCache(file_cache_size)
+        self.spans = TTLCache(maxsize=span_cache_size, ttl=24 * 3600)
+        self._spans_lock = threading.Lock()  # TTLCache itself is not thread-safe
+        self.expanded = 0
+        self.unchanged = 0
+
+    def _resolve(self, result: Dict[str, Any]) -> Optional[str]:
+        file = result.get("file")
+        if not file:
+            return None
+        if os.path.isabs(file):
+            return file
+        repo = result.get("repository")
+        return os.path.join(repo, file) if repo else None
+
+    def _cached(self, key: tuple, compute):
+        with self._spans_lock:
+            value = self.spans.get(key)
+        if value is None:
+            value = compute()
+            with self._spans_lock:
+                self.spans.set(key, value)
+        return value
+
+    def _heuristic_span(self, data: Buffer, offsets: array, start: int, end: int) -> Optional[Span]:
+        # The heuristic never looks further than max_lines around the hit
+        first = max(1, start - self.max_lines)
+        window = read_lines(data, offsets, first, min(len(offsets) - 1, end + self.max_lines))
+        span = heuristic_span(window, start - first + 1, end - first + 1, self.max_lines)
+        return (span[0] + first - 1, span[1] + first - 1) if span else None
+
+    def _enclosing_span(self, path: str, digest: str, data: Buffer, offsets: array, start: int, end: int) -> Optional[Span]:
+        if path.endswith(".py"):
+            spans = self._cached(
+                ("py", digest), lambda: python_spans(data[:].decode("utf-8", errors="replace")) or []
+            )
+            if spans:
+                enclosing = [s for s in spans if s[0] <= start and s[1] >= end]
+                if enclosing:
+                    return min(enclosing, key=lambda s: s[1] - s[0])
+                return None
+
+        span = self._cached(
+            ("heuristic", digest, start, end),
+            lambda: self._heuristic_span(data, offsets, start, end) or ()
+        )
+        return span or None
+
+    def expand_one(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Return `result` widened to its enclosing block (or unchanged)"""
+        path = self._resolve(result)
+        loaded = self.files.get(path) if path else None
+        if loaded is None:
+            self.unchanged += 1
+            return result
+
+        digest, data = loaded
+        offsets = self._cached(("lines", digest), lambda: line_offsets(data))
+        line_count = len(offsets) - 1
+        start = max(1, int(result.get("line") or 1))
+        end = min(line_count, start + len(result.get("content", "").split("\n")) - 1)
+        if start > line_count:
+            self.unchanged += 1
+            return result
+
+        span = self._enclosing_span(path, digest, data, offsets, start, end)
+        if span is None or span[1] - span[0] + 1 > self.max_lines or span == (start, end):
+            self.unchanged += 1
+            return result
+
+        self.expanded += 1
+        return {**result, "line": span[0], "content": "\n".join(read_lines(data, offsets, span[0], span[1]))}
+
+    def expand(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Expand every result (blocking: run via asyncio.to_thread)"""
+        return [self.expand_one(r) for r in results]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "expanded": self.expanded,
+            "unchanged": self.unchanged,
+            "file_cache": self.files.stats(),
+            "span_cache": self.spans.stats(),
+        }
+
+
+# Global instance (optional pattern)
+_snippet_expander = None
+
+def get_snippet_expander() -> Optional[SnippetExpander]:
+    """Get or create SnippetExpander singleton (None when disabled)"""
+    global _snippet_expander
+    if os.getenv("SNIPPET_EXPANSION_ENABLED", "true").lower() != "true":
+        return None
+    if _snippet_expander is None:
+        _snippet_expander = SnippetExpander(
+            max_lines=int(os.getenv("SNIPPET_MAX_LINES", "80")),
+            file_cache_size=int(os.getenv("SNIPPET_FILE_CACHE_SIZE", "128"))
+        )
+    return _snippet_expander
@@ -0,0 +1,256 @@
+"""
+Trigram Index - Exact and regex code search
+Zoekt-style trigram postings narrow candidate files before the pattern is matched
+"""
+import os
+import re
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from services.chunking import CHUNK_LINES, read_text_file
+from services.lexical_index import RepositoryIndexManager
+from services.manifest import TEXT_EXTENSIONS
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """
+    Literal substrings every match of `pattern` must contain
+
+    Walks the parsed regex: runs of literal characters in a concatenation are
+    required, as are literals inside groups and `+`/`{n,}` repeats. Anything
+    under an alternation or optional repeat is ignored, so the result is
+    always safe to use as a pre-filter (possibly empty).
+
+    Raises:
+        ValueError: If the pattern is not a valid regular expression
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression: {e}") from e
+
+    literals: List[str] = []
+
+    def walk(items):
+        current: List[str] = []
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                current.append(chr(av))
+                continue
+            literals.append("".join(current))
+            current = []
+            if op is sre_parse.SUBPATTERN:
+                walk(av[-1])
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                walk(av[2])
+        literals.append("".join(current))
+
+    walk(parsed)
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+class TrigramIndex:
+    """
+    Trigram -> file postings over one repository
+
+    Trigrams are case-folded so one index serves case-sensitive and
+    insensitive queries. Candidate files are read from disk and matched line
+    by line. Removed files become tombstones (their ids leave `files`) and the
+    postings are compacted once tombstones outnumber live files.
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self.files: Dict[int, str] = {}  # id -> relative path
+        self.file_ids: Dict[str, int] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        self.next_id = 0
+
+    def add_file(self, rel: str, text: str):
+        self.remove_file(rel)
+        file_id = self.next_id
+        self.next_id += 1
+        self.files[file_id] = rel
+        self.file_ids[rel] = file_id
+        for trigram in _trigrams(text):
+            self.postings.setdefault(trigram, set()).add(file_id)
+
+    def remove_file(self, rel: str):
+        file_id = self.file_ids.pop(rel, None)
+        if file_id is not None:
+            del self.files[file_id]
+
+    def compact(self):
+        """Drop tombstoned ids from the postings"""
+        live = self.files.keys()
+        self.postings = {
+            trigram: ids & live
+            for trigram, ids in self.postings.items()
+            if not ids.isdisjoint(live)
+        }
+
+    def update(self, modified: List[str], deleted: List[str]):
+        """Re-read modified files and drop deleted ones"""
+        for rel in deleted:
+            self.remove_file(rel)
+        for rel in modified:
+            text = read_text_file(os.path.join(self.repo_path, rel))
+            if text is None:
+                self.remove_file(rel)
+            else:
+                self.add_file(rel, text)
+
+        if self.next_id - len(self.files) > len(self.files):
+            self.compact()
+
+    def build(self, files: List[str]):
+        self.__init__(self.repo_path)
+        self.update(files, [])
+
+    def copy(self) -> "TrigramIndex":
+        """Independent copy (postings included) that can be updated while this one is searched"""
+        index = TrigramIndex(self.repo_path)
+        index.files = dict(self.files)
+        index.file_ids = dict(self.file_ids)
+        index.postings = {trigram: set(ids) for trigram, ids in self.postings.items()}
+        index.next_id = self.next_id
+        return index
+
+    def candidates(self, literals: List[str]) -> List[int]:
+        """Live file ids containing every trigram of every literal"""
+        ids: Optional[Set[int]] = None
+        for literal in literals:
+            for trigram in _trigrams(literal):
+                postings = self.postings.get(trigram, set())
+                ids = set(postings) if ids is None else ids & postings
+                if not ids:
+                    return []
+        live = self.files.keys() if ids is None else ids & self.files.keys()
+        return sorted(live, key=lambda i: self.files[i])
+
+    def search(
+        self,
+        pattern: str,
+        regex: bool = False,
+        case_sensitive: bool = True,
+        limit: int = 50,
+        extension_filter: Optional[List[str]] = None
+    ) -> List[Tuple[str, int, str]]:
+        """
+        Return matching (file, line number, line text) triples
+
+        Raises:
+            ValueError: If `regex` is set and the pattern is invalid
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if regex:
+            literals = required_literals(pattern, flags)
+            compiled = re.compile(pattern, flags | re.MULTILINE)
+        else:
+            literals = [pattern] if len(pattern) >= 3 else []
+            compiled = re.compile(re.escape(pattern), flags)
+
+        allowed = tuple(extension_filter) if extension_filter else None
+        matches: List[Tuple[str, int, str]] = []
+
+        for file_id in self.candidates(literals):
+            rel = self.files[file_id]
+            if allowed and not rel.endswith(allowed):
+                continue
+            text = read_text_file(os.path.join(self.repo_path, rel))
+            if text is None or not compiled.search(text):
+                continue
+            for number, line in enumerate(text.splitlines(), start=1):
+                if compiled.search(line):
+                    matches.append((rel, number, line))
+                    if len(matches) >= limit:
+                        return matches
+        return matches
+
+    def find_files(self, fragment: str, limit: int = 10) -> List[Tuple[str, int, str]]:
+        """
+        Files whose relative path contains `fragment` (case-insensitive)
+
+        Basename matches rank before directory matches, shorter paths first.
+        Returns (file, 1, first lines of the file) triples.
+        """
+        needle = fragment.strip().strip("/").replace("\\", "/").lower()
+        if not needle:
+            return []
+
+        matches = []
+        for rel in self.file_ids:
+            normalized = rel.replace(os.sep, "/").lower()
+            if needle in normalized:
+                in_basename = needle in normalized.rsplit("/", 1)[-1]
+                matches.append((not in_basename, len(normalized), rel))
+
+        results = []
+        for _, _, rel in sorted(matches)[:limit]:
+            text = read_text_file(os.path.join(self.repo_path, rel)) or ""
+            results.append((rel, 1, "\n".join(text.splitlines()[:CHUNK_LINES])))
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form with tombstones left out (does not mutate the index)"""
+        live = self.files.keys()
+        return {
+            "next_id": self.next_id,
+            "files": self.files,
+            "postings": {
+                trigram: sorted(ids & live)
+                for trigram, ids in self.postings.items()
+                if not ids.isdisjoint(live)
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, repo_path: str, data: Dict[str, Any]) -> "TrigramIndex":
+        index = cls(repo_path)
+        index.next_id = data["next_id"]
+        index.files = {int(k): v for k, v in data["files"].items()}
+        index.file_ids = {rel: file_id for file_id, rel in index.files.items()}
+        index.postings = {trigram: set(ids) for trigram, ids in data["postings"].items()}
+        return index
+
+
+class TrigramIndexManager(RepositoryIndexManager):
+    """
+    Trigram indexes per repository (CONTEXT2TASK_CACHE_DIR/trigram/<hash>/)
+
+    Covers config and text files (TEXT_EXTENSIONS) as well as code, so keys
+    in e.g. docker-compose.yml or config.json can be grepped.
+    """
+
+    kind = "trigram"
+    index_class = TrigramIndex
+    extensions = sorted(TEXT_EXTENSIONS)
+
+    async def search(
+        self,
+        path: str,
+        pattern: str,
+        regex: bool = False,
+        case_sensitive: bool = True,
+        limit: int = 50,
+        extension_filter: Optional[List[str]] = None
+    ) -> List[Tuple[str, int, str]]:
+        index = await self.get(path)
+        return await asyncio.to_thread(index.search, pattern, regex, case_sensitive, limit, extension_filter)
+
+    async def find_files(self, path: str, fragment: str, limit: int = 10) -> List[Tuple[str, int, str]]:
+        index = await self.get(path)
+        return await asyncio.to_thread(index.find_files, fragment, limit)
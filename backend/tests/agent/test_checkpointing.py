@@ -0,0 +1,60 @@
+"""
+Tests for Session Management
+"""
+import pytest
+from typing import TypedDict, List
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.memory import MemorySaver
+
+from agent.checkpointing import SessionManager
+from agent.nodes.core import stream_writer
+
+
+class ToyState(TypedDict, total=False):
+    session_id: str
+    messages: List[dict]
+    completion_percentage: int
+
+
+async def think(state: ToyState):
+    return {"completion_percentage": 40}
+
+
+async def answer(state: ToyState):
+    stream_writer()({"type": "token", "node": "answer", "content": "Olá"})
+    return {"messages": state["messages"] + [{"role": "assistant", "content": "Olá"}]}
+
+
+def toy_graph():
+    builder = StateGraph(ToyState)
+    builder.add_node("think", think)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "think")
+    builder.add_edge("think", "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+
+@pytest.mark.asyncio
+async def test_stream_agent_yields_node_progress_tokens_and_state():
+    """Test node start/end and token events arrive in order before the final state"""
+    manager = SessionManager()
+    manager.graph = toy_graph()
+
+    events = [e async for e in manager.stream_agent("s-1", "Quero login")]
+
+    names = [(event, data.get("node")) for event, data in events[:-1]]
+    assert names == [
+        ("node_start", "think"), ("node_end", "think"),
+        ("node_start", "answer"), ("token", "answer"), ("node_end", "answer"),
+    ]
+    assert all(data["elapsed_ms"] >= 0 for event, data in events if event == "node_end")
+    event, state = events[-1]
+    assert event == "state"
+    assert state["completion_percentage"] == 40
+    assert state["messages"][-1]["content"] == "Olá"
+
+
+def test_stream_writer_is_noop_outside_graph():
+    """Test nodes can still be called directly"""
+    assert stream_writer()({"type": "token", "content": "x"}) is None
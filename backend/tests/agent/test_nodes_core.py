@@ -1,14 +1,21 @@
 """
 Tests for Core Graph Nodes
 """
+import json
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
 from agent.nodes.core import (
     analyze_feature_node,
+    search_codebase_node,
+    llm_response_node,
+    update_spec_node,
     check_completion_node,
-    format_codebase_context
+    format_codebase_context,
+    merge_spec_updates
 )
 from agent.state import AgentState
+from agent.prompts.profiles import get_system_prompt
+from services.llm import GoogleGeminiProvider
 
 
 @pytest.fixture
@@ -54,6 +61,175 @@ async def test_analyze_feature_node(base_state):
         assert "messages" in result
 
 
+@pytest.mark.asyncio
+async def test_search_codebase_node_dedups_results(base_state):
+    """Test duplicate hits from different queries are collapsed before truncation"""
+    hit = {"file": "auth.py", "line": 1, "content": "def login(): pass", "score": 0.9}
+    with patch("agent.nodes.core.get_query_router") as mock_router:
+        mock_router.return_value.search = AsyncMock(return_value=[hit])
+        
+        result = await search_codebase_node({**base_state, "feature_summary": "login"})
+    
+    assert result["codebase_context"] == [{**hit, "repository": "/repo1"}]
+    assert result["context_stats"]["duplicates"] == 2
+    assert result["context_stats"]["tokens_saved"] > 0
+
+
+def fake_genai(genai):
+    """Gemini SDK mock: contents as (role, parts) tuples and streamed "ok" replies"""
+    class Reply:
+        usage_metadata = None
+        
+        async def __aiter__(self):
+            yield Mock(text="ok")
+    
+    genai.protos.Content.side_effect = lambda role, parts: (role, tuple(parts))
+    genai.protos.Part.side_effect = lambda text: text
+    chat = genai.GenerativeModel.return_value.start_chat.return_value
+    chat.send_message_async = AsyncMock(return_value=Reply())
+    return chat
+
+
+async def gemini_prompt_for(state):
+    """Run llm_response_node on a Gemini provider; returns (system instruction, contents) it sent"""
+    with patch("agent.nodes.core.get_llm_service") as mock_llm, patch("services.llm.genai") as genai:
+        chat = fake_genai(genai)
+        mock_llm.return_value = GoogleGeminiProvider("key")
+        await llm_response_node(state)
+    
+    history = genai.GenerativeModel.return_value.start_chat.call_args.kwargs["history"]
+    return genai.GenerativeModel.call_args.kwargs["system_instruction"], [*history, chat.send_message_async.call_args.args[0]]
+
+
+@pytest.mark.asyncio
+async def test_llm_response_keeps_profile_prompt_with_history_summary(base_state):
+    """Test the history summary joins the persona prompt instead of replacing it on Gemini"""
+    state = {
+        **base_state,
+        "messages": [
+            {"role": "user", "content": "u1"}, {"role": "assistant", "content": "a1"},
+            {"role": "user", "content": "u2"},
+        ],
+        "history_summary": "Login via Okta was agreed",
+        "summarized_count": 2,
+    }
+    
+    system, contents = await gemini_prompt_for(state)
+    
+    assert system.startswith(get_system_prompt("technical"))
+    assert system.endswith("Summary of the earlier conversation:\nLogin via Okta was agreed")
+    assert contents == [("user", ("u2",))]
+
+
+@pytest.mark.asyncio
+async def test_llm_response_context_reaches_gemini(base_state):
+    """Test repository profiles and code context survive the Gemini conversion"""
+    state = {
+        **base_state,
+        "codebase_context": [{"file": "auth.py", "line": 42, "content": "def authenticate():"}],
+    }
+    
+    system, contents = await gemini_prompt_for(state)
+    
+    assert "Repositories:\n/repo1" in system
+    assert "auth.py:42" in system and "def authenticate():" in system
+    assert contents == [("user", ("Add user authentication",))]
+
+
+@pytest.mark.asyncio
+async def test_llm_response_reuses_gemini_session_across_turns(base_state):
+    """Test a turn with new code context still reuses the session's converted history"""
+    with patch("agent.nodes.core.get_llm_service") as mock_llm, patch("services.llm.genai") as genai:
+        chat = fake_genai(genai)
+        provider = GoogleGeminiProvider("key")
+        mock_llm.return_value = provider
+        
+        first = await llm_response_node({
+            **base_state,
+            "codebase_context": [{"file": "auth.py", "line": 1, "content": "def login():"}],
+        })
+        assert provider.stats()["turns_reused"] == 0
+        
+        await llm_response_node({
+            **base_state,
+            "messages": [*base_state["messages"], *first["messages"], {"role": "user", "content": "Use Okta"}],
+            "codebase_context": [{"file": "sso.py", "line": 7, "content": "def okta_callback():"}],
+        })
+    
+    assert provider.stats()["turns_reused"] == 2
+    assert provider.stats()["turns_converted"] == 1 + 1
+    history = genai.GenerativeModel.return_value.start_chat.call_args.kwargs["history"]
+    assert history == [("user", ("Add user authentication",)), ("model", ("ok",))]
+    chat.send_message_async.assert_awaited_with(("user", ("Use Okta",)), stream=True)
+    assert "sso.py:7" in genai.GenerativeModel.call_args.kwargs["system_instruction"]
+
+
+@pytest.mark.asyncio
+async def test_update_spec_node_sends_only_new_messages(base_state):
+    """Test extraction covers messages since the last run and merges replace/append results"""
+    state = {
+        **base_state,
+        "messages": [
+            {"role": "user", "content": "Add user authentication"},
+            {"role": "assistant", "content": "Which provider?"},
+            {"role": "user", "content": "Use Okta SSO, not passwords"},
+        ],
+        "spec_sections": {
+            "descricao_contexto": "Users need to log in with corporate accounts.",
+            "detalhes_tecnicos": "Password login with bcrypt.",
+        },
+        "spec_extracted_count": 2,
+    }
+    extraction = {
+        "replace": {"detalhes_tecnicos": "SAML via Okta", "made_up_section": "ignored"},
+        "append": {"descricao_contexto": "Okta is the IdP.", "riscos_limitacoes": "Okta outage blocks login."},
+    }
+    with patch("agent.nodes.core.get_llm_service") as mock_llm:
+        mock_service = Mock()
+        mock_service.chat_completion = AsyncMock(return_value=Mock(
+            choices=[{"message": {"content": json.dumps(extraction)}}]
+        ))
+        mock_llm.return_value = mock_service
+        
+        result = await update_spec_node(state)
+    
+    prompt = mock_service.chat_completion.call_args.kwargs["messages"][0]["content"]
+    assert "user: Use Okta SSO, not passwords" in prompt
+    assert "Which provider?" not in prompt
+    assert "- descricao_contexto: Users need to log in" in prompt
+    assert result["spec_sections"] == {
+        "descricao_contexto": "Users need to log in with corporate accounts.\nOkta is the IdP.",
+        "detalhes_tecnicos": "SAML via Okta",
+        "riscos_limitacoes": "Okta outage blocks login.",
+    }
+    assert result["spec_extracted_count"] == 3
+
+
+def test_merge_spec_updates_replaces_and_skips_repeated_additions():
+    """Test a replacement revises a filled section and a repeated addition does not grow it"""
+    sections = {"user_story": "As a user, I want SSO.", "observacoes": "Okta chosen."}
+    
+    merged = merge_spec_updates(sections, {
+        "replace": {"user_story": "As an employee, I want SSO."},
+        "append": {"observacoes": "Okta chosen.", "referencias": "   "},
+    })
+    
+    assert merged == {"user_story": "As an employee, I want SSO.", "observacoes": "Okta chosen."}
+    assert merge_spec_updates(sections, {"user_story": "flat output"}) == sections
+
+
+@pytest.mark.asyncio
+async def test_update_spec_node_skips_without_new_messages(base_state):
+    """Test no LLM call when every message was already extracted"""
+    with patch("agent.nodes.core.get_llm_service") as mock_llm:
+        mock_llm.return_value.chat_completion = AsyncMock()
+        
+        result = await update_spec_node({**base_state, "spec_extracted_count": 1})
+    
+    mock_llm.return_value.chat_completion.assert_not_called()
+    assert result == {"current_node": "update_spec"}
+
+
 @pytest.mark.asyncio
 async def test_check_completion_node():
     """Test completion percentage calculation"""
@@ -32,3 +32,28 @@ def test_api_info():
     assert "mcp" in data
 
 
+def test_chat_stream_sse_events():
+    """Test streaming chat emits node/token events and a final done event"""
+    from unittest.mock import Mock, patch
+
+    async def fake_stream(**kwargs):
+        yield "node_start", {"node": "llm_response"}
+        yield "token", {"node": "llm_response", "content": "Oi"}
+        yield "node_end", {"node": "llm_response", "elapsed_ms": 12.0, "error": None}
+        yield "state", {
+            "session_id": kwargs["session_id"],
+            "messages": [{"role": "assistant", "content": "Oi"}],
+            "completion_percentage": 90,
+            "spec_sections": {},
+        }
+
+    manager = Mock()
+    manager.stream_agent = fake_stream
+    with patch("api.agent.get_session_manager", return_value=manager):
+        response = client.post("/api/chat/stream", json={"session_id": "s-1", "message": "Oi"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n")[0] for block in response.text.strip().split("\n\n")]
+    assert events == ["event: node_start", "event: token", "event: node_end", "event: done"]
+    assert '"is_complete":true' in response.text
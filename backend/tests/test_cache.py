@@ -0,0 +1,57 @@
+"""
+Tests for TTL + LRU cache
+"""
+import time
+from services.cache import TTLCache
+
+
+def test_get_set_counts_hits_and_misses():
+    """Test hit/miss counters"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    """Test least recently used entry is evicted first"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" becomes least recently used
+    cache.set("c", 3)
+    
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiration():
+    """Test expired entries are misses"""
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_by_predicate():
+    """Test selective invalidation"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(("/repo1", "q"), 1)
+    cache.set(("/repo2", "q"), 2)
+    
+    assert cache.invalidate(lambda key: key[0] == "/repo1") == 1
+    assert len(cache) == 1
+
+
+def test_disabled_cache_stores_nothing():
+    """Test maxsize=0 disables caching"""
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    
+    assert len(cache) == 0
@@ -0,0 +1,92 @@
+"""
+Tests for Context Packer
+"""
+from services.context_packer import (
+    ContextPacker,
+    compact_snippet,
+    estimate_tokens,
+    merge_line_ranges,
+    merge_search_results,
+    render_snippet,
+)
+
+
+def test_merge_line_ranges_overlapping_and_adjacent():
+    """Test overlapping/adjacent ranges of one file merge, distant ones don't"""
+    results = [
+        {"file": "a.py", "line": 1, "content": "l1\nl2\nl3", "score": 0.5},
+        {"file": "b.py", "line": 1, "content": "x", "score": 0.9},
+        {"file": "a.py", "line": 3, "content": "l3\nl4", "score": 0.8},
+        {"file": "a.py", "line": 5, "content": "l5"},
+        {"file": "a.py", "line": 40, "content": "l40"},
+    ]
+
+    merged = merge_line_ranges(results)
+
+    assert [(m["file"], m["line"]) for m in merged] == [("a.py", 1), ("a.py", 40), ("b.py", 1)]
+    assert merged[0]["content"] == "l1\nl2\nl3\nl4\nl5"
+    assert merged[0]["score"] == 0.8
+
+
+def test_merge_line_ranges_keeps_repositories_apart():
+    """Test the same path in two repositories is not merged"""
+    results = [
+        {"repository": "/r1", "file": "a.py", "line": 1, "content": "x"},
+        {"repository": "/r2", "file": "a.py", "line": 1, "content": "x"},
+    ]
+
+    assert len(merge_line_ranges(results)) == 2
+
+
+def test_compact_snippet_strips_comments_and_blank_runs():
+    """Test full-line comments and blank-line runs go, code and docstrings stay"""
+    content = '    # helper\n    def f():\n        """Doc."""\n\n\n        return 1  # inline   \n'
+
+    assert compact_snippet(content, "x.py") == 'def f():\n    """Doc."""\n\n    return 1  # inline'
+    assert compact_snippet("# Title\ntext", "README.md") == "# Title\ntext"
+
+
+def test_pack_respects_budget_and_caps_huge_snippets():
+    """Test a huge snippet is truncated so smaller relevant ones still fit"""
+    huge = {"file": "big.py", "line": 1, "content": "\n".join(f"value_{i} = {i}" for i in range(500)), "score": 0.9}
+    small = {"file": "auth.py", "line": 10, "content": "def login(user):\n    return session.create(user)", "score": 0.8}
+
+    packed = ContextPacker(token_budget=300).pack([huge, small])
+
+    assert {s["file"] for s in packed.snippets} == {"big.py", "auth.py"}
+    assert packed.tokens_used <= 300
+    assert packed.tokens_used == sum(estimate_tokens(render_snippet(s)) for s in packed.snippets)
+    assert next(s for s in packed.snippets if s["file"] == "big.py")["content"].endswith("...")
+
+
+def test_pack_prefers_diverse_snippets():
+    """Test a near-duplicate of a chosen snippet loses to a distinct one"""
+    results = [
+        {"file": "a.py", "line": 1, "content": "def charge_invoice(invoice): return gateway.charge(invoice)", "score": 1.0},
+        {"file": "b.py", "line": 1, "content": "def charge_invoice(invoice): return gateway.charge(invoice.total)", "score": 0.95},
+        {"file": "c.py", "line": 1, "content": "def refund_order(order): return ledger.refund(order)", "score": 0.7},
+    ]
+    budget = estimate_tokens(render_snippet(results[0])) * 2 + 2
+
+    packed = ContextPacker(token_budget=budget).pack(results)
+
+    assert [s["file"] for s in packed.snippets] == ["a.py", "c.py"]
+    assert packed.dropped == 1
+
+
+def test_merge_search_results_dedups_and_reports_savings():
+    """Test identical content is dropped, ranges merge and savings are reported"""
+    results = [
+        {"repository": "/r1", "file": "a.py", "line": 1, "content": "def f():\n    return 1", "score": 0.9},
+        {"repository": "/r2", "file": "vendor/a.py", "line": 7, "content": "def f():\n  return 1", "score": 0.8},
+        {"repository": "/r1", "file": "a.py", "line": 2, "content": "    return 1\nx = f()", "score": 0.95},
+        {"repository": "/r1", "file": "b.py", "line": 1, "content": "y = 2", "score": 0.1},
+    ]
+
+    report = merge_search_results(results)
+
+    assert report.duplicates == 1
+    assert report.merged == 1
+    assert [(r["file"], r["line"]) for r in report.results] == [("a.py", 1), ("b.py", 1)]
+    assert report.results[0]["content"] == "def f():\n    return 1\nx = f()"
+    assert report.tokens_saved == report.tokens_before - report.tokens_after > 0
@@ -0,0 +1,102 @@
+"""
+Tests for Conversation History (transcripts and compaction)
+"""
+import pytest
+from unittest.mock import Mock, AsyncMock
+from langchain_core.messages import HumanMessage, AIMessage
+
+from services.conversation_history import HistoryCompactor, TranscriptRenderer
+
+
+def conversation(turns: int):
+    """`turns` user/assistant pairs, as LangChain messages (what the graph state holds)"""
+    messages = []
+    for i in range(turns):
+        messages += [HumanMessage(content=f"question {i}"), AIMessage(content=f"answer {i}")]
+    return messages
+
+
+def summarizer(text: str):
+    service = Mock()
+    service.chat_completion = AsyncMock(return_value=Mock(choices=[{"message": {"content": text}}]))
+    return service
+
+
+@pytest.mark.asyncio
+async def test_fold_waits_for_a_batch_then_keeps_last_turns():
+    """Test nothing is folded until keep+fold turns exist, then only the evicted turns are"""
+    compactor = HistoryCompactor(keep_turns=2, fold_turns=2)
+    service = summarizer("S1")
+
+    assert await compactor.fold(service, conversation(3)) is None
+    service.chat_completion.assert_not_called()
+
+    update = await compactor.fold(service, conversation(4))
+
+    assert update == {"history_summary": "S1", "summarized_count": 4}
+    prompt = service.chat_completion.call_args.kwargs["messages"][0]["content"]
+    assert "user: question 1\nassistant: answer 1" in prompt
+    assert "question 2" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_fold_extends_existing_summary_incrementally():
+    """Test a later fold sends the previous summary plus only the newly evicted turns"""
+    compactor = HistoryCompactor(keep_turns=2, fold_turns=2)
+    service = summarizer("S2")
+
+    update = await compactor.fold(service, conversation(6), summary="S1", summarized_count=4)
+
+    assert update == {"history_summary": "S2", "summarized_count": 8}
+    prompt = service.chat_completion.call_args.kwargs["messages"][0]["content"]
+    assert "S1" in prompt
+    assert "question 1" not in prompt
+    assert "question 2" in prompt and "answer 3" in prompt
+    assert "question 4" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_fold_failure_keeps_turns_verbatim():
+    """Test a failed summary call leaves the state untouched"""
+    compactor = HistoryCompactor(keep_turns=1, fold_turns=1)
+    service = Mock()
+    service.chat_completion = AsyncMock(side_effect=RuntimeError("quota"))
+
+    assert await compactor.fold(service, conversation(3)) is None
+
+
+def test_prompt_messages_bounded_by_summary():
+    """Test prompts carry the summary and only the unsummarized messages"""
+    compactor = HistoryCompactor(keep_turns=2, fold_turns=2)
+    messages = conversation(5) + [HumanMessage(content="latest")]
+
+    prompt = compactor.prompt_messages(messages, summary="S", summarized_count=6)
+
+    assert prompt[0] == {"role": "system", "content": "Summary of the earlier conversation:\nS"}
+    assert [m["content"] for m in prompt[1:]] == ["question 3", "answer 3", "question 4", "answer 4", "latest"]
+    assert compactor.prompt_messages([{"role": "user", "content": "hi"}]) == [{"role": "user", "content": "hi"}]
+
+
+def test_transcript_renderer_emits_role_and_content_only():
+    """Test LangChain metadata stays out of the transcript and whitespace is tidied"""
+    renderer = TranscriptRenderer()
+    messages = [
+        HumanMessage(content="Add login  \r\n\n\n\nwith SSO", id="m1", additional_kwargs={"x": 1}),
+        AIMessage(content=[{"type": "text", "text": "Which IdP?"}], id="m2"),
+        {"role": "user", "content": "Okta"},
+    ]
+
+    assert renderer.render(messages) == "user: Add login\n\nwith SSO\nassistant: Which IdP?\nuser: Okta"
+
+
+def test_transcript_renderer_caches_per_message_id():
+    """Test a message is rendered once per id, and again if its content changes"""
+    renderer = TranscriptRenderer(max_message_chars=40)
+    message = HumanMessage(content="x" * 100, id="m1")
+
+    first = renderer.line(message)
+    assert renderer.line(message) is first
+    assert renderer.cache.hits == 1
+    assert "[... 60 chars omitted ...]" in first
+
+    assert renderer.line(HumanMessage(content="short", id="m1")) == "user: short"
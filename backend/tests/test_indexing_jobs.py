@@ -0,0 +1,107 @@
+"""
+Tests for Indexing Job Queue
+"""
+import asyncio
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+from services.mcp import IndexingStatus
+from services.indexing_jobs import IndexingJobQueue, JobStatus
+
+
+@pytest.fixture
+def mcp_service():
+    """MCP service whose indexing waits on an event"""
+    service = Mock()
+    service.release = asyncio.Event()
+    
+    async def sync_codebase(path, force=False):
+        await service.release.wait()
+        return {"status": "success", "file_count": 42}
+    
+    service.sync_codebase = AsyncMock(side_effect=sync_codebase)
+    service.get_indexing_status = AsyncMock(
+        return_value=IndexingStatus(path="/repo", status="indexing", progress=50)
+    )
+    with patch("services.indexing_jobs.get_mcp_service", return_value=service):
+        yield service
+
+
+@pytest.mark.asyncio
+async def test_submit_runs_job_to_completion(mcp_service):
+    """Test a job moves queued → running → completed with progress updates"""
+    queue = IndexingJobQueue(workers=1, progress_interval=0.01)
+    try:
+        job = await queue.submit("/repo")
+        updates = []
+        
+        async def collect():
+            async for snapshot in queue.subscribe(job.job_id):
+                updates.append(snapshot)
+        
+        collector = asyncio.create_task(collect())
+        await asyncio.sleep(0.05)
+        mcp_service.release.set()
+        await asyncio.wait_for(collector, timeout=1)
+        
+        statuses = [u.status for u in updates]
+        assert statuses[-1] == JobStatus.COMPLETED
+        assert JobStatus.RUNNING in statuses
+        assert any(u.progress == 50 for u in updates)
+        assert queue.get(job.job_id).file_count == 42
+    finally:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_submit_dedups_same_path(mcp_service):
+    """Test concurrent requests for one path share a job"""
+    queue = IndexingJobQueue(workers=1)
+    try:
+        first = await queue.submit("/repo")
+        second = await queue.submit("/repo/", force=True)
+        
+        assert first.job_id == second.job_id
+        assert len(queue.list_jobs()) == 1
+    finally:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_priority_order(mcp_service):
+    """Test higher priority queued jobs run first"""
+    queue = IndexingJobQueue(workers=1)
+    try:
+        blocker = await queue.submit("/blocker")
+        await asyncio.sleep(0)  # Worker picks up the blocker
+        low = await queue.submit("/low", priority=0)
+        high = await queue.submit("/high", priority=10)
+        
+        mcp_service.release.set()
+        await asyncio.sleep(0.05)
+        
+        called = [c.kwargs["path"] for c in mcp_service.sync_codebase.call_args_list]
+        assert called == ["/blocker", "/high", "/low"]
+        assert all(queue.get(job.job_id).status == JobStatus.COMPLETED for job in (blocker, high, low))
+    finally:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_job(mcp_service):
+    """Test cancelling a running job"""
+    queue = IndexingJobQueue(workers=1)
+    try:
+        job = await queue.submit("/repo")
+        await asyncio.sleep(0.01)
+        
+        cancelled = await queue.cancel(job.job_id)
+        await asyncio.sleep(0.01)
+        
+        assert cancelled.status == JobStatus.CANCELLED
+        assert queue.get(job.job_id).status == JobStatus.CANCELLED
+        
+        # Path is free again after cancellation
+        again = await queue.submit("/repo")
+        assert again.job_id != job.job_id
+    finally:
+        await queue.close()
@@ -0,0 +1,101 @@
+"""
+Tests for BM25 lexical index and rank fusion
+"""
+import pytest
+
+from services.lexical_index import BM25Index, LexicalIndexManager, reciprocal_rank_fusion
+from services.mcp import CodeSearchResult, MCPService
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Repository with a few source files and an isolated cache dir"""
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "auth.py").write_text("def authenticate_user(username, password):\n    return check_password(password)\n")
+    (root / "billing.py").write_text("def charge_invoice(invoice):\n    return payment_gateway.charge(invoice.total)\n")
+    (root / "ui.ts").write_text("export function renderLoginForm() {\n  return authenticateUser();\n}\n")
+    return root
+
+
+def test_bm25_ranks_identifier_matches(repo):
+    """Test exact identifier parts rank the defining file first"""
+    index = BM25Index(str(repo))
+    index.build(["auth.py", "billing.py", "ui.ts"])
+
+    results = index.search("charge_invoice", limit=3)
+
+    assert results[0][0] == "billing.py"
+    assert all(file != "auth.py" for file, _, _, _ in results)
+    assert index.search("the of and") == []
+
+
+def test_bm25_incremental_update(repo):
+    """Test changed files replace their postings and deleted files disappear"""
+    index = BM25Index(str(repo))
+    index.build(["auth.py", "billing.py", "ui.ts"])
+
+    (repo / "billing.py").write_text("def refund_order(order):\n    return order.amount\n")
+    (repo / "auth.py").unlink()
+    index.update(modified=["billing.py"], deleted=["auth.py"])
+
+    assert index.search("charge_invoice") == []
+    assert index.search("refund_order")[0][0] == "billing.py"
+    assert "auth.py" not in index.file_docs
+    assert "password" not in index.postings
+
+
+@pytest.mark.asyncio
+async def test_manager_persists_index(repo):
+    """Test an index built by one manager is loaded from disk by another"""
+    await LexicalIndexManager().rebuild(str(repo))
+    (repo / "ui.ts").unlink()  # Not re-scanned: the stored index is used
+
+    results = await LexicalIndexManager().search(str(repo), "renderLoginForm", extension_filter=[".ts"])
+
+    assert [r[0] for r in results] == ["ui.ts"]
+
+
+@pytest.mark.asyncio
+async def test_manager_update_swaps_in_a_copy(repo):
+    """Test an update never mutates the index that concurrent searches are reading"""
+    manager = LexicalIndexManager()
+    before = await manager.get(str(repo))
+    (repo / "billing.py").write_text("def refund_order(order):\n    return order.amount\n")
+
+    await manager.update(str(repo), modified=["billing.py"], deleted=[])
+
+    assert before.search("refund_order") == []
+    assert before.search("charge_invoice")[0][0] == "billing.py"
+    assert (await manager.get(str(repo))) is not before
+    assert (await manager.search(str(repo), "refund_order"))[0][0] == "billing.py"
+
+
+def test_reciprocal_rank_fusion():
+    """Test items ranked well in both lists win and duplicates are merged"""
+    a = CodeSearchResult(file="a.py", line=1, content="a")
+    b = CodeSearchResult(file="b.py", line=1, content="b")
+    c = CodeSearchResult(file="c.py", line=1, content="c")
+
+    fused = reciprocal_rank_fusion([[a, b], [b, c]], k=60, limit=2)
+
+    assert [item.file for item, _ in fused] == ["b.py", "a.py"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+@pytest.mark.asyncio
+async def test_mcp_service_hybrid_search(repo, monkeypatch):
+    """Test hybrid mode fuses semantic and BM25 results"""
+    monkeypatch.setenv("MCP_SEARCH_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_EMBEDDINGS", "hashing")
+    pytest.importorskip("numpy")
+    service = MCPService()
+    await service.sync_codebase(str(repo))
+
+    lexical = await service.search_code(str(repo), "authenticate_user", limit=2, mode="lexical")
+    hybrid = await service.search_code(str(repo), "authenticate_user", limit=2, mode="hybrid")
+
+    assert lexical[0].file == "auth.py"
+    assert hybrid[0].file == "auth.py"
+    assert len(service.search_cache) == 2
@@ -1,9 +1,12 @@
 """
 Tests for LLM Service (OpenRouter Integration)
 """
+import asyncio
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
-from services.llm import LLMService, LLMResponse
+from services.llm import (
+    LLMService, LLMResponse, LLMProvider, LLMStreamChunk, OpenRouterProvider, collect_stream
+)
 
 
 @pytest.fixture
@@ -108,3 +111,251 @@ async def test_chat_completion_with_json_mode(mock_env):
     await service.close()
 
 
+# ===== STREAMING =====
+
+
+class FakeStreamProvider(LLMProvider):
+    """Provider streaming fixed deltas, optionally failing after `fail_after` chunks"""
+
+    def __init__(self, deltas, fail_after=None, usage=None):
+        self.deltas = deltas
+        self.fail_after = fail_after
+        self.usage = usage
+
+    async def chat_completion(self, messages, model=None, temperature=0.7, max_tokens=4000, response_format=None, session_id=None):
+        raise NotImplementedError
+
+    async def stream_completion(self, messages, model=None, temperature=0.7, max_tokens=4000, response_format=None, session_id=None):
+        for i, delta in enumerate(self.deltas):
+            if i == self.fail_after:
+                raise RuntimeError("provider down")
+            yield LLMStreamChunk(id="s", model="m", provider="fake", delta=delta)
+        if self.fail_after == len(self.deltas):
+            raise RuntimeError("provider down")
+        yield LLMStreamChunk(id="s", model="m", provider="fake", finish_reason="stop", usage=self.usage)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def streaming_service(mock_env, monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    return LLMService()
+
+
+@pytest.mark.asyncio
+async def test_openrouter_stream_parses_sse(mock_env):
+    """Test OpenRouter SSE deltas, keep-alive comments, [DONE] and final usage"""
+    import httpx
+
+    body = (
+        ": OPENROUTER PROCESSING\n\n"
+        'data: {"id":"gen-1","model":"m","choices":[{"delta":{"content":"Ol"}}]}\n\n'
+        'data: {"id":"gen-1","model":"m","choices":[{"delta":{"content":"á"},"finish_reason":"stop"}]}\n\n'
+        'data: {"id":"gen-1","model":"m","choices":[],"usage":{"prompt_tokens":3,"completion_tokens":2,"total_tokens":5}}\n\n'
+        "data: [DONE]\n\n"
+    )
+
+    def handler(request):
+        assert b'"stream":true' in request.content.replace(b" ", b"")
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    provider = OpenRouterProvider("key")
+    provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    chunks = [c async for c in provider.stream_completion([{"role": "user", "content": "Oi"}])]
+
+    assert [c.delta for c in chunks] == ["Ol", "á", ""]
+    assert chunks[-1].finish_reason == "stop"
+    assert chunks[-1].usage["total_tokens"] == 5
+    await provider.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_before_first_token(streaming_service):
+    """Test a provider failing before any text is replaced by the next one"""
+    streaming_service.providers = [FakeStreamProvider(["x"], fail_after=0), FakeStreamProvider(["Oi", "!"])]
+
+    chunks = [c async for c in streaming_service.stream_completion([{"role": "user", "content": "Oi"}])]
+
+    assert "".join(c.delta for c in chunks) == "Oi!"
+    assert chunks[-1].usage["estimated"] is True
+
+
+@pytest.mark.asyncio
+async def test_stream_does_not_fall_back_after_first_token(streaming_service):
+    """Test a mid-stream failure after text was yielded propagates"""
+    fallback = FakeStreamProvider(["never"])
+    streaming_service.providers = [FakeStreamProvider(["Oi", "!"], fail_after=1), fallback]
+
+    received = []
+    with pytest.raises(RuntimeError, match="provider down"):
+        async for chunk in streaming_service.stream_completion([{"role": "user", "content": "Oi"}]):
+            received.append(chunk.delta)
+
+    assert received == ["Oi"]
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_stream_flag_collects_chunks(streaming_service):
+    """Test stream=True goes through the streaming API and returns one response"""
+    usage = {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}
+    streaming_service.providers = [FakeStreamProvider(["Hel", "lo"], usage=usage)]
+
+    response = await streaming_service.chat_completion([{"role": "user", "content": "Hi"}], stream=True)
+
+    assert response.choices[0]["message"]["content"] == "Hello"
+    assert response.usage == usage
+
+
+@pytest.mark.asyncio
+async def test_collect_stream_rejects_empty_stream():
+    """Test an empty chunk stream is an error, not an empty answer"""
+    async def empty():
+        return
+        yield
+
+    with pytest.raises(ValueError, match="Empty completion stream"):
+        await collect_stream(empty())
+
+
+@pytest.mark.asyncio
+async def test_gemini_stream_yields_text_then_usage():
+    """Test Gemini stream=True chunks are normalized and usage comes last"""
+    from services.llm import GoogleGeminiProvider
+
+    class FakeStream:
+        usage_metadata = Mock(prompt_token_count=4, candidates_token_count=2, total_token_count=6)
+
+        def __aiter__(self):
+            async def parts():
+                for text in ("Bom ", "dia"):
+                    yield Mock(text=text)
+            return parts()
+
+    with patch("services.llm.genai") as genai:
+        chat = genai.GenerativeModel.return_value.start_chat.return_value
+        chat.send_message_async = AsyncMock(return_value=FakeStream())
+        provider = GoogleGeminiProvider("key")
+
+        chunks = [c async for c in provider.stream_completion([{"role": "user", "content": "Oi"}])]
+
+    chat.send_message_async.assert_awaited_once_with(genai.protos.Content.return_value, stream=True)
+    genai.protos.Part.assert_called_once_with(text="Oi")
+    assert [c.delta for c in chunks] == ["Bom ", "dia", ""]
+    assert chunks[-1].usage == {"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6}
+
+
+@pytest.mark.asyncio
+async def test_gemini_reuses_models_and_session_history():
+    """Test model instances are cached and a session only converts new turns"""
+    from services.llm import GoogleGeminiProvider
+
+    with patch("services.llm.genai") as genai:
+        genai.protos.Content.side_effect = lambda role, parts: (role, tuple(parts))
+        genai.protos.Part.side_effect = lambda text: text
+        chat = genai.GenerativeModel.return_value.start_chat.return_value
+        chat.send_message_async = AsyncMock(return_value=Mock(text="A1"))
+        provider = GoogleGeminiProvider("key")
+
+        first = [{"role": "system", "content": "S"}, {"role": "user", "content": "U1"}]
+        await provider.chat_completion(first, session_id="s-1")
+        second = first + [{"role": "assistant", "content": "A1"}, {"role": "user", "content": "U2"}]
+        await provider.chat_completion(second, session_id="s-1")
+        await provider.chat_completion(second, temperature=0.1)
+
+    assert genai.GenerativeModel.call_count == 2  # Default and temperature=0.1 configs
+    assert genai.GenerativeModel.call_args.kwargs["system_instruction"] == "S"
+    history = genai.GenerativeModel.return_value.start_chat.call_args_list[1].kwargs["history"]
+    assert history == [("user", ("U1",)), ("model", ("A1",))]
+    chat.send_message_async.assert_awaited_with(("user", ("U2",)))
+    assert provider.stats()["turns_reused"] == 2
+    assert provider.stats()["turns_converted"] == 1 + 1 + 3
+
+
+# ===== HEDGING =====
+
+
+class DelayedProvider(LLMProvider):
+    """Provider answering `text` after `delay` seconds (or failing)"""
+
+    def __init__(self, text, delay, fail=False):
+        self.text = text
+        self.delay = delay
+        self.fail = fail
+        self.cancelled = False
+
+    async def chat_completion(self, messages, model=None, temperature=0.7, max_tokens=4000, response_format=None, session_id=None):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.text} down")
+        return LLMResponse(id=self.text, model="m", choices=[{"message": {"role": "assistant", "content": self.text}}])
+
+    async def stream_completion(self, messages, model=None, temperature=0.7, max_tokens=4000, response_format=None, session_id=None):
+        raise NotImplementedError
+        yield
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def hedging_service(streaming_service):
+    streaming_service.hedging = True
+    streaming_service.hedge_default_delay = 0.05
+    return streaming_service
+
+
+@pytest.mark.asyncio
+async def test_hedge_fires_for_slow_primary_and_cancels_loser(hedging_service):
+    """Test a slow primary is hedged, the backup wins and the primary is cancelled"""
+    slow, fast = DelayedProvider("primary", 5), DelayedProvider("backup", 0.01)
+    hedging_service.providers = [slow, fast]
+
+    response = await hedging_service.chat_completion([{"role": "user", "content": "Oi"}])
+    await asyncio.sleep(0)  # Let the cancellation reach the loser
+
+    assert response.id == "backup"
+    assert slow.cancelled
+    assert hedging_service.stats()["hedges_sent"] == 1
+    assert hedging_service.stats()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_primary_is_fast(hedging_service):
+    """Test a primary answering within the threshold is never duplicated"""
+    backup = DelayedProvider("backup", 0)
+    hedging_service.providers = [DelayedProvider("primary", 0), backup]
+
+    response = await hedging_service.chat_completion([{"role": "user", "content": "Oi"}])
+
+    assert response.id == "primary"
+    assert hedging_service.stats()["hedges_sent"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hedge_survives_one_failure_and_falls_back(hedging_service):
+    """Test a failing primary falls back, and a failing hedge waits for the primary"""
+    hedging_service.providers = [DelayedProvider("primary", 0, fail=True), DelayedProvider("backup", 0)]
+    assert (await hedging_service.chat_completion([{"role": "user", "content": "a"}])).id == "backup"
+
+    hedging_service.providers = [DelayedProvider("primary", 0.1), DelayedProvider("backup", 0, fail=True)]
+    assert (await hedging_service.chat_completion([{"role": "user", "content": "b"}])).id == "primary"
+
+
+def test_hedge_delay_uses_latency_percentile(hedging_service):
+    """Test the threshold follows the primary's observed latency once known"""
+    from services.llm import LatencyWindow
+
+    primary = DelayedProvider("primary", 0)
+    hedging_service.hedge_min_delay = 0.5
+    window = hedging_service.latency.setdefault("DelayedProvider", LatencyWindow())
+    for i in range(100):
+        window.record(i / 10)
+
+    assert hedging_service._hedge_delay(primary) == pytest.approx(9.5)
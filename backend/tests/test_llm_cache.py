@@ -0,0 +1,116 @@
+"""
+Tests for LLM Response Cache
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+import services.llm_cache as llm_cache
+from services.llm import LLMService, LLMResponse
+from services.llm_cache import LLMResponseCache, response_cache_key
+
+RESPONSE = {
+    "id": "gen-1",
+    "model": "m",
+    "choices": [{"message": {"role": "assistant", "content": '{"ok": true}'}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 4, "total_tokens": 14},
+}
+
+
+@pytest.fixture
+def mock_env(monkeypatch, tmp_path):
+    """Mock environment variables"""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test_key_123")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(llm_cache, "_llm_response_cache", None)
+
+
+def test_cache_key_ignores_formatting_only_differences():
+    """Test whitespace/line-ending noise maps to the same key, real changes don't"""
+    a = response_cache_key([{"role": "user", "content": "Analyze:\r\n  login  \n"}], "m", 0.7, {"type": "json_object"})
+    b = response_cache_key([{"role": "user", "content": "Analyze:\n  login"}], "m", 0.7, {"type": "json_object"})
+    c = response_cache_key([{"role": "user", "content": "Analyze:\n  logout"}], "m", 0.7, {"type": "json_object"})
+    d = response_cache_key([{"role": "user", "content": "Analyze:\n  login"}], "m", 0.2, {"type": "json_object"})
+
+    assert a == b
+    assert len({a, c, d}) == 3
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_new_instance(mock_env):
+    """Test entries written to disk are served (and promoted) by a fresh cache"""
+    await LLMResponseCache(disk=True).set("k" * 64, RESPONSE)
+
+    fresh = LLMResponseCache(disk=True)
+
+    assert await fresh.get("k" * 64) == RESPONSE
+    assert fresh.stats()["disk_hits"] == 1
+    assert await fresh.get("k" * 64) == RESPONSE
+    assert fresh.stats()["memory"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_disk_entries_are_dropped(mock_env):
+    """Test TTL applies to the disk tier too"""
+    cache = LLMResponseCache(disk=True)
+    await cache.set("e" * 64, RESPONSE, ttl=-1)
+
+    assert await LLMResponseCache(disk=True).get("e" * 64) is None
+    assert not cache._disk_path("e" * 64).exists()
+
+
+@pytest.mark.asyncio
+async def test_service_caches_json_mode_calls(mock_env):
+    """Test repeated JSON-mode calls hit the provider once and are flagged cached"""
+    service = LLMService()
+    service.providers[0].chat_completion = AsyncMock(return_value=LLMResponse(**RESPONSE))
+    messages = [{"role": "user", "content": "Analyze this feature"}]
+
+    first = await service.chat_completion(messages, response_format={"type": "json_object"})
+    second = await service.chat_completion(messages, response_format={"type": "json_object"})
+
+    assert service.providers[0].chat_completion.await_count == 1
+    assert not first.cached and second.cached
+    assert second.choices == first.choices
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_service_cache_per_call_opt_in_and_out(mock_env):
+    """Test free-text calls are not cached unless asked, and cache=False bypasses"""
+    service = LLMService()
+    service.providers[0].chat_completion = AsyncMock(return_value=LLMResponse(**RESPONSE))
+    messages = [{"role": "user", "content": "Hello"}]
+
+    await service.chat_completion(messages)
+    await service.chat_completion(messages)
+    await service.chat_completion(messages, cache=True)
+    await service.chat_completion(messages, cache=True)
+    await service.chat_completion(messages, response_format={"type": "json_object"}, cache=False)
+
+    assert service.providers[0].chat_completion.await_count == 4
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_service_coalesces_identical_in_flight_calls(mock_env):
+    """Test a double submit makes one provider call even before anything is cached"""
+    import asyncio
+    service = LLMService()
+
+    async def slow_answer(**kwargs):
+        await asyncio.sleep(0.01)
+        return LLMResponse(**RESPONSE)
+
+    service.providers[0].chat_completion = AsyncMock(side_effect=slow_answer)
+    messages = [{"role": "user", "content": "Analyze this feature"}]
+
+    first, second = await asyncio.gather(
+        service.chat_completion(messages),
+        service.chat_completion(messages)
+    )
+
+    assert service.providers[0].chat_completion.await_count == 1
+    assert first.choices == second.choices
+    assert service.stats()["single_flight"]["coalesced"] == 1
+    await service.close()
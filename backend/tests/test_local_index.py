@@ -0,0 +1,116 @@
+"""
+Tests for Local Vector Index backend
+"""
+import pytest
+
+from services.cache import repo_index_dir
+from services.local_index import LocalVectorBackend, HashingEmbedder
+from services.chunking import chunk_text, tokenize_code
+from services.mcp import MCPService
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Repository with a few source files and an isolated cache dir"""
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "auth.py").write_text("def authenticate_user(username, password):\n    return check_password(password)\n")
+    (root / "billing.py").write_text("def charge_invoice(invoice):\n    return payment_gateway.charge(invoice.total)\n")
+    (root / "ui.ts").write_text("export function renderLoginForm() {\n  return authenticateUser();\n}\n")
+    return root
+
+
+@pytest.fixture
+def backend():
+    return LocalVectorBackend(HashingEmbedder())
+
+
+def test_tokenize_code_splits_identifiers():
+    """Test camelCase and snake_case identifiers are split"""
+    tokens = tokenize_code("getUserById(user_id)")
+    
+    assert "getuserbyid" in tokens
+    assert "user" in tokens
+    assert "id" in tokens
+
+
+def test_chunk_text_overlapping_windows():
+    """Test chunks carry 1-based start lines"""
+    text = "\n".join(f"line {i}" for i in range(100))
+    chunks = chunk_text(text, chunk_lines=40, overlap=5)
+    
+    assert [line for line, _ in chunks] == [1, 36, 71]
+
+
+@pytest.mark.asyncio
+async def test_index_and_search(repo, backend):
+    """Test top result matches the query"""
+    result = await backend.index_codebase(str(repo))
+    results = await backend.search_code(str(repo), "authenticate user password", limit=2)
+    
+    assert result["file_count"] == 3
+    assert results[0].file == "auth.py"
+    assert results[0].line == 1
+    assert len(results) == 2
+
+
+@pytest.mark.asyncio
+async def test_search_extension_filter(repo, backend):
+    """Test extension filter restricts candidates"""
+    await backend.index_codebase(str(repo))
+    results = await backend.search_code(str(repo), "authenticate", limit=5, extension_filter=[".ts"])
+    
+    assert [r.file for r in results] == ["ui.ts"]
+
+
+@pytest.mark.asyncio
+async def test_update_files_replaces_changed_chunks(repo, backend):
+    """Test incremental update drops deleted files and re-embeds modified ones"""
+    await backend.index_codebase(str(repo))
+    
+    (repo / "billing.py").unlink()
+    (repo / "auth.py").write_text("def login_with_token(token):\n    return verify_token(token)\n")
+    result = await backend.update_files(str(repo), modified=["auth.py"], deleted=["billing.py"])
+    results = await backend.search_code(str(repo), "verify token", limit=5)
+    
+    assert result["file_count"] == 2
+    assert results[0].file == "auth.py"
+    assert "verify_token" in results[0].content
+    assert all(r.file != "billing.py" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_mcp_service_local_backend(repo, monkeypatch):
+    """Test MCPService works without Zilliz credentials on the local backend"""
+    monkeypatch.setenv("MCP_SEARCH_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_EMBEDDINGS", "hashing")
+    monkeypatch.delenv("ZILLIZ_CLOUD_URI", raising=False)
+    service = MCPService()
+    
+    await service.sync_codebase(str(repo))
+    status = await service.get_indexing_status(str(repo))
+    results = await service.search_code(str(repo), "charge invoice", limit=1)
+    
+    assert status.status == "indexed"
+    assert results[0].file == "billing.py"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_write_is_rebuilt(repo, backend):
+    """Test an index whose files disagree (crash mid-write) is treated as not indexed"""
+    await backend.index_codebase(str(repo))
+    index_dir = repo_index_dir("vectors", str(repo))
+    
+    assert sorted(p.name for p in index_dir.iterdir()) == ["chunks.json", "meta.json", "vectors.npy"]
+    
+    (index_dir / "chunks.json").write_text('{"files": [], "chunks": []}')
+    fresh = LocalVectorBackend(HashingEmbedder())
+    status = await fresh.get_indexing_status(str(repo))
+    result = await fresh.index_codebase(str(repo))
+    
+    assert status.status == "not_indexed"
+    assert result["status"] == "success"
+    assert (await fresh.search_code(str(repo), "charge invoice", limit=1))[0].file == "billing.py"
@@ -0,0 +1,67 @@
+"""
+Tests for Repository Manifest (incremental re-indexing)
+"""
+import os
+import pytest
+from services.manifest import scan_repository, save_manifest, load_manifest, get_head_commit
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Small git-like repository with an isolated cache dir"""
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "repo"
+    (root / ".git" / "refs" / "heads").mkdir(parents=True)
+    (root / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    (root / ".git" / "refs" / "heads" / "main").write_text("abc123\n")
+    (root / "src").mkdir()
+    (root / "src" / "app.py").write_text("print('app')\n")
+    (root / "src" / "util.py").write_text("def util(): pass\n")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "dep.js").write_text("module.exports = {}\n")
+    (root / "image.png").write_bytes(b"\x89PNG")
+    return root
+
+
+def test_first_scan_reports_all_files_added(repo):
+    """Test initial scan picks up indexable files only"""
+    manifest, changes = scan_repository(str(repo))
+    
+    assert sorted(changes.added) == [os.path.join("src", "app.py"), os.path.join("src", "util.py")]
+    assert sorted(manifest.files) == sorted(changes.added)
+
+
+def test_rescan_detects_added_changed_deleted(repo):
+    """Test diff against stored manifest"""
+    manifest, _ = scan_repository(str(repo))
+    save_manifest(manifest)
+    
+    (repo / "src" / "app.py").write_text("print('changed')\n")
+    os.utime(repo / "src" / "app.py", (1, 1))
+    (repo / "src" / "util.py").unlink()
+    (repo / "src" / "new.py").write_text("x = 1\n")
+    
+    _, changes = scan_repository(str(repo), load_manifest(str(repo)))
+    
+    assert changes.added == [os.path.join("src", "new.py")]
+    assert changes.changed == [os.path.join("src", "app.py")]
+    assert changes.deleted == [os.path.join("src", "util.py")]
+
+
+def test_touched_but_identical_file_is_unchanged(repo):
+    """Test mtime-only changes don't trigger re-indexing"""
+    manifest, _ = scan_repository(str(repo))
+    
+    os.utime(repo / "src" / "app.py", (1, 1))
+    _, changes = scan_repository(str(repo), manifest)
+    
+    assert not changes.has_changes
+
+
+def test_get_head_commit_packed_refs(tmp_path):
+    """Test HEAD resolution through packed-refs"""
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    (tmp_path / ".git" / "packed-refs").write_text("# pack-refs\ndef456 refs/heads/main\n")
+    
+    assert get_head_commit(str(tmp_path)) == "def456"
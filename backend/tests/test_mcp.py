@@ -114,3 +114,156 @@ async def test_get_indexing_status(mock_env):
         assert status.progress == 100
 
 
+
+
+def test_to_tool_arguments(mock_env):
+    """Test CLI-style args are translated into MCP tool arguments"""
+    tool, arguments = MCPService._to_tool_arguments(
+        "search-code",
+        ["/test/repo", "user auth", "5", "--extension-filter", ".py,.ts"]
+    )
+    
+    assert tool == "search_code"
+    assert arguments == {
+        "path": "/test/repo",
+        "query": "user auth",
+        "limit": 5,
+        "extensionFilter": [".py", ".ts"]
+    }
+    
+    tool, arguments = MCPService._to_tool_arguments("index-codebase", ["/test/repo", "--force"])
+    
+    assert tool == "index_codebase"
+    assert arguments == {"path": "/test/repo", "force": True}
+
+
+@pytest.mark.asyncio
+async def test_search_code_uses_cache(mock_env):
+    """Test identical searches hit the cache until the repo is re-indexed"""
+    service = MCPService()
+    
+    mock_result = {"results": [{"file": "src/auth.py", "line": 42, "content": "def auth():"}]}
+    
+    with patch.object(service, '_run_npx_command', new_callable=AsyncMock) as mock_run:
+        mock_run.return_value = mock_result
+        
+        await service.search_code(path="/test/repo", query="auth", limit=5)
+        results = await service.search_code(path="/test/repo", query="auth", limit=5)
+        
+        assert mock_run.call_count == 1
+        assert results[0].file == "src/auth.py"
+        assert service.stats()["search_cache"]["hits"] == 1
+        
+        # Re-indexing starts a new generation, so the next search misses
+        await service.index_codebase(path="/test/repo")
+        await service.search_code(path="/test/repo", query="auth", limit=5)
+        
+        assert mock_run.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_searches_share_one_call(mock_env):
+    """Test searches issued while an identical one is in flight are coalesced"""
+    import asyncio
+    service = MCPService()
+    release = asyncio.Event()
+    
+    async def slow_search(command, args):
+        await release.wait()
+        return {"results": [{"file": "src/auth.py", "line": 42, "content": "def auth():"}]}
+    
+    with patch.object(service, '_run_npx_command', side_effect=slow_search) as mock_run:
+        searches = [asyncio.create_task(service.search_code(path="/test/repo", query="auth", limit=5)) for _ in range(3)]
+        other = asyncio.create_task(service.search_code(path="/test/repo", query="login", limit=5))
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*searches, other)
+    
+    assert mock_run.call_count == 2
+    assert all(r[0].file == "src/auth.py" for r in results)
+    assert results[0] is not results[1]  # Callers get their own list
+    assert service.stats()["single_flight"]["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_codebase_skips_unchanged_repo(mock_env, tmp_path, monkeypatch):
+    """Test incremental sync only calls the indexer when files changed"""
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path / "cache"))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "app.py").write_text("print('app')\n")
+    service = MCPService()
+    
+    with patch.object(service, '_run_npx_command', new_callable=AsyncMock) as mock_run:
+        mock_run.return_value = {"status": "success"}
+        
+        first = await service.sync_codebase(str(repo))
+        second = await service.sync_codebase(str(repo))
+        
+        (repo / "new.py").write_text("x = 1\n")
+        third = await service.sync_codebase(str(repo))
+        
+        assert first["mode"] == "full"
+        assert second["status"] == "up_to_date"
+        assert third["mode"] == "incremental"
+        assert third["added"] == 1
+        assert [c.args for c in mock_run.call_args_list] == [
+            ("index-codebase", [str(repo), "--force"]),
+            ("index-codebase", [str(repo), "--force"]),
+        ]
+
+
+@pytest.mark.asyncio
+async def test_sync_codebase_drops_searches_cached_while_local_indexes_update(mock_env, tmp_path, monkeypatch):
+    """Test a grep run between the indexer call and the trigram update is not served afterwards"""
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path / "cache"))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "app.py").write_text("print('app')\n")
+    service = MCPService()
+    update = service.trigram.update
+    during = []
+    
+    async def update_after_search(path, modified, deleted):
+        during.append(await service.grep_code(path, "NEW_FLAG"))
+        await update(path, modified, deleted)
+    
+    with patch.object(service, '_run_npx_command', new_callable=AsyncMock) as mock_run:
+        mock_run.return_value = {"status": "success"}
+        await service.sync_codebase(str(repo))
+        (repo / "app.py").write_text("NEW_FLAG = True\n")
+        with patch.object(service.trigram, "update", side_effect=update_after_search):
+            await service.sync_codebase(str(repo))
+    
+    assert during == [[]]
+    assert [r.file for r in await service.grep_code(str(repo), "NEW_FLAG")] == ["app.py"]
+
+
+@pytest.mark.asyncio
+async def test_sync_codebase_reindexes_already_indexed_claude_context_repo(mock_env, tmp_path, monkeypatch):
+    """Test changes reach claude-context even though it rejects a non-forced re-index"""
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path / "cache"))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "app.py").write_text("print('app')\n")
+    service = MCPService()
+    indexed = set()
+    
+    async def call_tool(tool, arguments):
+        # Mimics claude-context: indexing an indexed codebase needs force
+        if arguments["path"] in indexed and not arguments.get("force"):
+            return {"isError": True, "content": [{"type": "text", "text": "Codebase is already indexed"}]}
+        indexed.add(arguments["path"])
+        return {"content": [{"type": "text", "text": '{"status": "success"}'}]}
+    
+    service.pool = Mock(call_tool=AsyncMock(side_effect=call_tool))
+    await service.sync_codebase(str(repo))
+    (repo / "app.py").write_text("print('changed')\n")
+    
+    synced = await service.sync_codebase(str(repo))
+    again = await service.sync_codebase(str(repo))
+    
+    assert synced["mode"] == "incremental"
+    assert synced["changed"] == 1
+    assert again["status"] == "up_to_date"  # Manifest was saved after the re-index
+    assert service.pool.call_tool.await_count == 2
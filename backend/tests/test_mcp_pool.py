@@ -0,0 +1,160 @@
+"""
+Tests for MCP Worker Pool (persistent stdio JSON-RPC workers)
+"""
+import os
+import sys
+import asyncio
+import pytest
+from services.mcp_pool import MCPWorkerPool, MCPWorkerError, parse_tool_result
+
+
+# Minimal MCP server: answers initialize/ping, echoes tools/call arguments,
+# sleeps for "delay" seconds, exits on the "crash" tool and ignores batches
+FAKE_SERVER = r'''
+import sys, json, threading, time
+
+lock = threading.Lock()
+
+def reply(msg_id, result):
+    with lock:
+        sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": msg_id, "result": result}) + "\n")
+        sys.stdout.flush()
+
+def handle(msg):
+    params = msg.get("params", {})
+    if msg["method"] == "tools/call":
+        args = params["arguments"]
+        if params["name"] == "crash":
+            sys.stdout.flush()
+            import os; os._exit(1)
+        time.sleep(args.get("delay", 0))
+        text = json.dumps({"tool": params["name"], "arguments": args})
+        reply(msg["id"], {"content": [{"type": "text", "text": text}]})
+    elif "id" in msg:
+        reply(msg["id"], {})
+
+for line in sys.stdin:
+    payload = json.loads(line)
+    if isinstance(payload, list):
+        continue  # Like the MCP SDK: JSON-RPC batches are not supported
+    threading.Thread(target=handle, args=(payload,)).start()
+'''
+
+
+@pytest.fixture
+def pool():
+    pool = MCPWorkerPool(
+        command=[sys.executable, "-c", FAKE_SERVER],
+        env=os.environ.copy(),
+        size=2,
+        request_timeout=10,
+        health_check_interval=0
+    )
+    yield pool
+
+
+@pytest.mark.asyncio
+async def test_pool_call_tool(pool):
+    """Test a tool call round-trips through a persistent worker"""
+    try:
+        result = await pool.call_tool("search_code", {"path": "/repo", "query": "auth"})
+        parsed = parse_tool_result(result)
+
+        assert parsed["tool"] == "search_code"
+        assert parsed["arguments"]["query"] == "auth"
+        assert pool.stats()["alive"] == 2
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_multiplexes_concurrent_requests(pool):
+    """Test concurrent requests overlap instead of running serially"""
+    try:
+        await pool.start()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        results = await asyncio.gather(*(
+            pool.call_tool("search_code", {"query": f"q{i}", "delay": 0.3})
+            for i in range(6)
+        ))
+
+        elapsed = loop.time() - started
+        queries = sorted(parse_tool_result(r)["arguments"]["query"] for r in results)
+
+        assert queries == [f"q{i}" for i in range(6)]
+        assert elapsed < 1.5  # 6 x 0.3s serially would be 1.8s
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_call_tools_concurrent(pool):
+    """Test several tool calls are multiplexed as single requests (the server rejects batches)"""
+    pool.request_timeout = 2
+    try:
+        results = await pool.call_tools([
+            ("get_indexing_status", {"path": f"/repo{i}"}) for i in range(5)
+        ])
+        paths = [parse_tool_result(r)["arguments"]["path"] for r in results]
+
+        assert paths == [f"/repo{i}" for i in range(5)]
+        assert pool.stats()["total_requests"] == 5
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_restarts_crashed_worker(pool):
+    """Test a crashed worker fails its request and is replaced"""
+    pool.size = 1
+    pool.workers = pool.workers[:1]
+    try:
+        with pytest.raises(MCPWorkerError):
+            await pool.call_tool("crash", {})
+
+        result = await pool.call_tool("search_code", {"query": "after crash"})
+
+        assert parse_tool_result(result)["arguments"]["query"] == "after crash"
+        assert pool.workers[0].restarts == 1
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_ping_does_not_queue_behind_busy_slots():
+    """Test the health ping answers while every request slot is taken by a slow call"""
+    pool = MCPWorkerPool(
+        command=[sys.executable, "-c", FAKE_SERVER],
+        env=os.environ.copy(),
+        size=1,
+        request_timeout=10,
+        health_check_interval=0,
+        max_inflight=1
+    )
+    try:
+        await pool.start()
+        worker = pool.workers[0]
+        slow = asyncio.create_task(pool.call_tool("index_codebase", {"path": "/repo", "delay": 1.0}))
+        await asyncio.sleep(0.1)
+
+        await worker.ping(timeout=0.5)  # Would time out if it waited for the slot
+
+        assert not slow.done()
+        await slow
+    finally:
+        await pool.close()
+
+
+def test_parse_tool_result_error():
+    """Test MCP tool errors are raised"""
+    with pytest.raises(MCPWorkerError, match="boom"):
+        parse_tool_result({"isError": True, "content": [{"type": "text", "text": "boom"}]})
+
+
+def test_parse_tool_result_plain_text():
+    """Test non-JSON text output is wrapped"""
+    result = parse_tool_result({"content": [{"type": "text", "text": "Indexed 10 files"}]})
+
+    assert result == {"text": "Indexed 10 files"}
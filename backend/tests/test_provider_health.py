@@ -0,0 +1,104 @@
+"""
+Tests for Provider Health
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from services.llm import LLMService, LLMResponse
+from services.provider_health import CircuitOpenError, CircuitState, ProviderHealthTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def mock_env(monkeypatch):
+    """Mock environment variables"""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test_key_123")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+
+
+def test_circuit_opens_then_half_opens_for_one_probe():
+    """Test consecutive failures open the circuit and the cooldown allows a single probe"""
+    clock = FakeClock()
+    tracker = ProviderHealthTracker(failure_threshold=2, cooldown=30, clock=clock)
+
+    for _ in range(2):
+        tracker.acquire("gemini")
+        tracker.record_failure("gemini", RuntimeError("429"))
+
+    assert tracker.get("gemini").state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        tracker.acquire("gemini")
+
+    clock.now += 30
+    tracker.acquire("gemini")  # The probe
+    assert tracker.get("gemini").state == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        tracker.acquire("gemini")
+
+    tracker.record_success("gemini", 0.5)
+    assert tracker.get("gemini").state == CircuitState.CLOSED
+    assert tracker.stats()["skipped_calls"] == 2
+
+
+def test_failed_probe_reopens_and_cancelled_probe_is_released():
+    """Test a failing probe re-opens at once; a cancelled one frees the slot"""
+    clock = FakeClock()
+    tracker = ProviderHealthTracker(failure_threshold=1, cooldown=10, clock=clock)
+    tracker.record_failure("p", RuntimeError("down"))
+    clock.now += 10
+
+    tracker.acquire("p")
+    tracker.release("p")
+    tracker.acquire("p")
+    tracker.record_failure("p", RuntimeError("still down"))
+
+    assert tracker.get("p").state == CircuitState.OPEN
+    assert tracker.stats()["providers"]["p"]["last_error"] == "RuntimeError: still down"
+
+
+def test_order_prefers_fast_reliable_providers():
+    """Test ordering by EWMA latency x error rate, unknown providers keep their place"""
+    tracker = ProviderHealthTracker(min_samples=3)
+    for _ in range(3):
+        tracker.record_success("slow", 4.0)
+        tracker.record_success("fast", 0.5)
+
+    assert tracker.order(["slow", "fresh", "fast"], str) == ["fast", "slow", "fresh"]
+    assert ProviderHealthTracker(reorder=False).order(["b", "a"], str) == ["b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_service_skips_open_circuit(mock_env, monkeypatch):
+    """Test a provider failing repeatedly stops being called until its cooldown"""
+    monkeypatch.setenv("LLM_BREAKER_FAILURES", "2")
+    service = LLMService()
+
+    class Primary:
+        chat_completion = AsyncMock(side_effect=RuntimeError("429 Too Many Requests"))
+        close = AsyncMock()
+
+    class Backup:
+        chat_completion = AsyncMock(
+            return_value=LLMResponse(id="ok", model="m", choices=[{"message": {"role": "assistant", "content": "ok"}}])
+        )
+        close = AsyncMock()
+
+    primary = Primary()
+    service.providers = [primary, Backup()]
+
+    for _ in range(4):
+        assert (await service.chat_completion([{"role": "user", "content": "Oi"}])).id == "ok"
+
+    assert primary.chat_completion.await_count == 2
+    health = service.stats()["provider_health"]["providers"]
+    assert health["Primary"]["state"] == "open"
+    assert service.stats()["provider_order"][0] != "Primary"
+    await service.close()
@@ -0,0 +1,108 @@
+"""
+Tests for Query Router
+"""
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+
+from services.mcp import CodeSearchResult
+from services.query_router import QueryRouter, classify_query
+
+
+@pytest.fixture
+def mock_mcp():
+    service = Mock()
+    service.grep_code = AsyncMock(return_value=[])
+    service.find_files = AsyncMock(return_value=[])
+    service.search_code = AsyncMock(return_value=[])
+    with patch("services.query_router.get_mcp_service", return_value=service):
+        yield service
+
+
+def _result(file: str, score: float = None) -> CodeSearchResult:
+    return CodeSearchResult(file=file, line=1, content="...", score=score)
+
+
+@pytest.mark.parametrize("query,expected", [
+    ("getUserById", ("exact", "getUserById")),
+    ("MAX_RETRIES", ("exact", "MAX_RETRIES")),
+    ("settings.DATABASE_URL", ("exact", "settings.DATABASE_URL")),
+    ("charge()", ("exact", "charge")),
+    ('"connection refused"', ("exact", "connection refused")),
+    ("services/auth.py", ("path", "services/auth.py")),
+    ("docker-compose.yml", ("path", "docker-compose.yml")),
+    ("where do we validate user passwords", ("semantic", None)),
+    ("how is fetch_user cached", ("hybrid", None)),
+    ("authentication", ("hybrid", None)),
+])
+def test_classify_query(query, expected):
+    """Test identifier, path and natural language queries are told apart"""
+    assert classify_query(query) == expected
+
+
+@pytest.mark.asyncio
+async def test_identifier_query_uses_exact_index(mock_mcp):
+    """Test identifier queries never hit vector search; exact matches score 1.0"""
+    mock_mcp.grep_code.return_value = [_result("a.py"), _result("b.py")]
+    router = QueryRouter()
+
+    results = await router.search("/repo", "getUserById", limit=5)
+
+    mock_mcp.grep_code.assert_awaited_once_with("/repo", "getUserById", limit=5, extension_filter=None)
+    mock_mcp.search_code.assert_not_called()
+    assert [r.file for r in results] == ["a.py", "b.py"]
+    assert [r.score for r in results] == [1.0, 1.0]
+    assert router.stats()["routes"]["exact"]["hit_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_empty_exact_answer_falls_back(mock_mcp):
+    """Test an empty exact lookup falls back to BM25 and then vector search"""
+    mock_mcp.search_code.side_effect = lambda path, query, limit, ext, mode: (
+        [] if mode == "lexical" else [_result("c.py", 0.9)]
+    )
+    router = QueryRouter()
+
+    results = await router.search("/repo", "legacyHandler")
+
+    modes = [call.kwargs["mode"] for call in mock_mcp.search_code.call_args_list]
+    assert modes == ["lexical", "semantic"]
+    assert results[0].file == "c.py"
+    stats = router.stats()["routes"]
+    assert stats["exact"]["fallbacks"] == 1
+    assert stats["lexical"]["fallbacks"] == 1
+    assert stats["semantic"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_query_uses_hybrid(mock_mcp):
+    """Test mixed queries go to hybrid fusion, fused scores scaled by the best one"""
+    mock_mcp.search_code.return_value = [_result("d.py", 0.032), _result("e.py", 0.016)]
+    router = QueryRouter()
+
+    results = await router.search("/repo", "how is fetch_user cached")
+
+    assert mock_mcp.search_code.call_args.kwargs["mode"] == "hybrid"
+    assert [r.score for r in results] == [1.0, 0.5]
+
+
+@pytest.mark.asyncio
+async def test_single_route_keeps_native_score_spread(mock_mcp):
+    """Test vector similarities are not flattened into rank scores"""
+    mock_mcp.search_code.return_value = [_result("a.py", 0.8), _result("b.py", 0.2)]
+    router = QueryRouter()
+
+    results = await router.search("/repo", "where do we validate user passwords")
+
+    assert mock_mcp.search_code.call_args.kwargs["mode"] == "semantic"
+    assert [r.score for r in results] == [1.0, 0.25]
+
+
+@pytest.mark.asyncio
+async def test_disabled_router_passes_through(mock_mcp):
+    """Test disabling the router keeps the default search path"""
+    router = QueryRouter(enabled=False)
+
+    await router.search("/repo", "getUserById", limit=3)
+
+    mock_mcp.search_code.assert_awaited_once_with("/repo", "getUserById", 3, None)
+    mock_mcp.grep_code.assert_not_called()
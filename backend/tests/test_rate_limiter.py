@@ -0,0 +1,153 @@
+"""
+Tests for Rate Limiter
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock
+
+from services.llm import LLMService, LLMResponse
+from services.provider_health import CircuitState
+from services.rate_limiter import ProviderRateLimiter, RateLimitExceeded, TokenBucket
+
+
+@pytest.fixture
+def mock_env(monkeypatch):
+    """Mock environment variables"""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test_key_123")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+
+
+def test_token_bucket_refill():
+    """Test waits follow the refill rate and oversized requests are capped"""
+    now = [0.0]
+    bucket = TokenBucket(capacity=10, rate=2, clock=lambda: now[0])
+
+    bucket.take(10)
+    assert bucket.wait_time(4) == pytest.approx(2.0)
+    now[0] = 1.0
+    assert bucket.wait_time(4) == pytest.approx(1.0)
+    assert bucket.wait_time(1000) == pytest.approx(4.0)  # Waits for a full bucket at most
+
+
+@pytest.mark.asyncio
+async def test_callers_queue_fifo_at_the_rpm_ceiling():
+    """Test calls beyond the burst wait their turn instead of failing"""
+    limiter = ProviderRateLimiter(limits={"Gemini": {"rpm": 600}}, max_wait=5)  # 10 req/s, burst 600
+    limiter._state("Gemini", "m").requests.level = 0
+
+    order = []
+
+    async def call(i):
+        await limiter.acquire("Gemini", "m", tokens=10)
+        order.append(i)
+
+    started = time.monotonic()
+    await asyncio.gather(*(call(i) for i in range(3)))
+
+    assert order == [0, 1, 2]
+    assert time.monotonic() - started >= 0.25
+    stats = limiter.stats()["Gemini"]
+    assert stats["delayed"] == 3 and stats["max_queue_depth"] == 3 and stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_rejects_and_limits_resolve_per_model():
+    """Test a call that would wait past its deadline is rejected; model keys win over provider keys"""
+    limiter = ProviderRateLimiter(
+        limits={"Gemini": {"rpm": 1000}, "Gemini:pro": {"rpm": 1, "tpm": 100}},
+        max_wait=0.1
+    )
+
+    await limiter.acquire("Gemini", "pro", tokens=50)
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire("Gemini", "pro", tokens=50)
+    await limiter.acquire("Gemini", "flash", tokens=50)
+
+    assert limiter.stats()["Gemini:pro"]["rejected"] == 1
+    assert limiter.stats()["Gemini"]["admitted"] == 1
+    assert await ProviderRateLimiter().acquire("Other", None, tokens=10) == 0.0
+
+
+def test_settle_and_throttle_adjust_buckets():
+    """Test actual usage corrects the TPM bucket and a provider 429 drains the RPM bucket"""
+    limiter = ProviderRateLimiter(limits={"P": {"rpm": 60, "tpm": 1000}})
+    state = limiter._state("P", None)
+
+    limiter.settle("P", None, estimated_tokens=100, actual_tokens=400)
+    limiter.throttled("P", None)
+
+    assert state.tokens.level == pytest.approx(700, abs=1)
+    assert state.requests.level <= 0.1
+    assert limiter.stats()["P"]["throttled_by_provider"] == 1
+
+
+@pytest.mark.asyncio
+async def test_service_fails_over_when_quota_is_exhausted(mock_env, monkeypatch):
+    """Test the service moves to the next provider instead of queueing past the deadline"""
+    monkeypatch.setenv("LLM_RATE_LIMITS", '{"Primary": {"rpm": 1}}')
+    monkeypatch.setenv("LLM_RATE_LIMIT_MAX_WAIT", "0.05")
+    service = LLMService()
+    answer = LLMResponse(id="ok", model="m", choices=[{"message": {"role": "assistant", "content": "ok"}}])
+
+    class Primary:
+        default_model = "m"
+        chat_completion = AsyncMock(return_value=answer)
+        close = AsyncMock()
+
+    class Backup:
+        default_model = "m"
+        chat_completion = AsyncMock(return_value=answer)
+        close = AsyncMock()
+
+    service.providers = [Primary(), Backup()]
+    for _ in range(2):
+        await service.chat_completion([{"role": "user", "content": "Oi"}])
+
+    assert Primary.chat_completion.await_count == 1
+    assert Backup.chat_completion.await_count == 1
+    assert service.stats()["rate_limits"]["Primary"]["rejected"] == 1
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_and_cancelled_calls_reserve_no_quota(mock_env, monkeypatch):
+    """Test skipped (open breaker) and cancelled calls leave the buckets as they were"""
+    monkeypatch.setenv("LLM_RATE_LIMITS", '{"Primary": {"rpm": 60, "tpm": 100000}}')
+    service = LLMService()
+    answer = LLMResponse(id="ok", model="m", choices=[{"message": {"role": "assistant", "content": "ok"}}])
+
+    async def slow(**call):
+        await asyncio.sleep(10)
+
+    class Primary:
+        default_model = "m"
+        chat_completion = AsyncMock(side_effect=slow)
+        close = AsyncMock()
+
+    class Backup:
+        default_model = "m"
+        chat_completion = AsyncMock(return_value=answer)
+        close = AsyncMock()
+
+    service.providers = [Primary(), Backup()]
+    state = service.rate_limiter._state("Primary", "m")
+    service.health.get("Primary").state = CircuitState.OPEN
+    service.health.get("Primary").opened_at = time.monotonic()
+
+    assert (await service.chat_completion([{"role": "user", "content": "Oi"}])).id == "ok"
+    assert state.requests.level == pytest.approx(60, abs=0.01)
+    assert Primary.chat_completion.await_count == 0
+
+    service.health.get("Primary").state = CircuitState.CLOSED
+    call = asyncio.create_task(service._timed_completion(Primary(), {"messages": [{"role": "user", "content": "x" * 400}]}))
+    await asyncio.sleep(0.01)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert state.requests.level == pytest.approx(60, abs=0.01)
+    assert state.tokens.level == pytest.approx(100000, abs=1)
+    assert service.stats()["rate_limits"]["Primary"]["refunded"] == 1
+    await service.close()
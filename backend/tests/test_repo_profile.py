@@ -0,0 +1,67 @@
+"""
+Tests for Repository Profile
+"""
+import json
+import pytest
+from unittest.mock import patch
+
+from services.repo_profile import RepositoryProfiler, build_profile
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Monorepo with a Python backend and a React frontend, on commit aaa111"""
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "shop"
+    (root / ".git" / "refs" / "heads").mkdir(parents=True)
+    (root / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    (root / ".git" / "refs" / "heads" / "main").write_text("aaa111\n")
+
+    (root / "backend" / "api").mkdir(parents=True)
+    (root / "backend" / "main.py").write_text("app = FastAPI()\n")
+    (root / "backend" / "api" / "orders.py").write_text("def list_orders(): ...\n")
+    (root / "backend" / "pyproject.toml").write_text(
+        '[tool.poetry.dependencies]\npython = "^3.11"\nfastapi = "^0.116"\nlanggraph = "0.6"\n'
+    )
+    (root / "frontend" / "src").mkdir(parents=True)
+    (root / "frontend" / "src" / "main.tsx").write_text("render(<App />)\n")
+    (root / "frontend" / "package.json").write_text(json.dumps({"dependencies": {"react": "^18"}, "devDependencies": {"vite": "^5"}}))
+    (root / "README.md").write_text("# Shop\n")
+    return root
+
+
+def test_build_profile(repo):
+    """Test languages, modules, frameworks and entry points are detected"""
+    profile = build_profile(str(repo), "aaa111")
+
+    assert profile.file_count == 4
+    assert profile.languages == {"Python": 2, "TypeScript": 1, "Markdown": 1}
+    assert profile.modules == {"backend": 2, "frontend": 1}
+    assert profile.frameworks == ["FastAPI", "LangGraph", "React", "Vite"]
+    assert profile.manifests == ["backend/pyproject.toml", "frontend/package.json"]
+    assert profile.entry_points == ["backend/main.py", "frontend/src/main.tsx"]
+    assert "shop @ aaa111" in profile.render()
+
+
+@pytest.mark.asyncio
+async def test_profile_cached_per_commit(repo):
+    """Test profiles are reused (also across instances) until HEAD moves"""
+    with patch("services.repo_profile.build_profile", wraps=build_profile) as build:
+        first = await RepositoryProfiler().get_profile(str(repo))
+        again = await RepositoryProfiler().get_profile(str(repo))  # Loaded from disk
+        assert build.call_count == 1
+
+        (repo / ".git" / "refs" / "heads" / "main").write_text("bbb222\n")
+        moved = await RepositoryProfiler().get_profile(str(repo))
+
+    assert again.commit == first.commit == "aaa111"
+    assert moved.commit == "bbb222"
+    assert build.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_describe_missing_repository(tmp_path):
+    """Test unreadable repositories degrade to their path"""
+    text = await RepositoryProfiler().describe([str(tmp_path / "missing")])
+
+    assert text == f"{tmp_path / 'missing'}: (profile unavailable)"
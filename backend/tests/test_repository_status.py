@@ -0,0 +1,96 @@
+"""
+Tests for Repository Status Cache
+"""
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+from services.mcp import IndexingStatus
+from services.repository_status import RepositoryStatusCache
+
+
+def make_service():
+    service = Mock()
+    service.get_indexing_statuses = AsyncMock(side_effect=lambda paths: {
+        p: IndexingStatus(path=p, status="indexed", file_count=10) for p in paths
+    })
+    return service
+
+
+@pytest.mark.asyncio
+async def test_get_statuses_bulk_fetches_only_missing():
+    """Test first lookup is one bulk call and repeats are served from memory"""
+    service = make_service()
+    cache = RepositoryStatusCache(ttl=60)
+    
+    with patch("services.repository_status.get_mcp_service", return_value=service):
+        first = await cache.get_statuses(["/a", "/b"])
+        second = await cache.get_statuses(["/a", "/b", "/c"])
+    
+    assert first["/a"].status == "indexed"
+    assert set(second) == {"/a", "/b", "/c"}
+    assert service.get_indexing_statuses.call_count == 2
+    service.get_indexing_statuses.assert_called_with(["/c"])
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_refresh_in_background():
+    """Test stale statuses are served immediately and refreshed asynchronously"""
+    service = make_service()
+    cache = RepositoryStatusCache(ttl=0)
+    
+    with patch("services.repository_status.get_mcp_service", return_value=service):
+        await cache.get_statuses(["/a"])
+        statuses = await cache.get_statuses(["/a"])
+        await cache._refresh_task
+    
+    assert statuses["/a"].status == "indexed"
+    assert cache.stats()["background_refreshes"] >= 1
+    assert service.get_indexing_statuses.call_count >= 2
+
+
+@pytest.mark.asyncio
+async def test_failed_lookup_reports_unknown():
+    """Test MCP failures degrade to status 'unknown'"""
+    service = Mock()
+    service.get_indexing_statuses = AsyncMock(side_effect=RuntimeError("MCP down"))
+    cache = RepositoryStatusCache(ttl=60)
+    
+    with patch("services.repository_status.get_mcp_service", return_value=service):
+        statuses = await cache.get_statuses(["/a"])
+    
+    assert statuses["/a"].status == "unknown"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_lookup_keeps_cached_answer():
+    """Test a cached path invalidated while another path is fetched is still answered"""
+    cache = RepositoryStatusCache(ttl=60)
+    service = make_service()
+    lookup = service.get_indexing_statuses.side_effect
+
+    async def lookup_while_job_finishes(paths):
+        cache.invalidate("/repos/a/")  # Job path spelled differently from the cached key
+        return lookup(paths)
+
+    with patch("services.repository_status.get_mcp_service", return_value=service):
+        await cache.get_statuses(["/repos/a"])
+        service.get_indexing_statuses.side_effect = lookup_while_job_finishes
+        statuses = await cache.get_statuses(["/repos/a", "/repos/b"])
+        await cache._refresh_task
+
+    assert statuses["/repos/a"].status == "indexed"
+    assert statuses["/repos/b"].status == "indexed"
+    service.get_indexing_statuses.assert_called_with(["/repos/a"])  # Background refetch
+
+
+@pytest.mark.asyncio
+async def test_discovered_repositories_are_cached():
+    """Test the filesystem scan runs once per discovery TTL"""
+    cache = RepositoryStatusCache(discovery_ttl=60)
+    discover = AsyncMock(return_value=["/repos/a", "/repos/b"])
+
+    first = await cache.get_discovered(discover)
+    second = await cache.get_discovered(discover)
+
+    assert first == second == ["/repos/a", "/repos/b"]
+    assert discover.await_count == 1
+    assert cache.stats()["discovery_scans"] == 1
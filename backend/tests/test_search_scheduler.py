@@ -0,0 +1,61 @@
+"""
+Tests for Search Scheduler (concurrent codebase search fan-out)
+"""
+import asyncio
+import pytest
+from services.mcp import CodeSearchResult
+from services.search_scheduler import SearchScheduler
+
+
+@pytest.mark.asyncio
+async def test_run_merges_by_score():
+    """Test results from all searches are merged by score, highest first"""
+    scores = {("/a", "q1"): 0.5, ("/a", "q2"): 0.9, ("/b", "q1"): 0.7}
+
+    async def search(repo, query):
+        return [CodeSearchResult(file=f"{query}.py", line=1, content="x", score=scores[(repo, query)])]
+
+    batch = await SearchScheduler().run(search, list(scores))
+
+    assert [r["score"] for r in batch.results] == [0.9, 0.7, 0.5]
+    assert batch.results[0]["repository"] == "/a"
+    assert batch.searches == 3
+    assert batch.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_run_respects_concurrency_limits():
+    """Test global and per-repo limits bound in-flight searches"""
+    inflight = {"total": 0, "max_total": 0, "/a": 0, "max_a": 0}
+
+    async def search(repo, query):
+        inflight["total"] += 1
+        inflight[repo] = inflight.get(repo, 0) + 1
+        inflight["max_total"] = max(inflight["max_total"], inflight["total"])
+        if repo == "/a":
+            inflight["max_a"] = max(inflight["max_a"], inflight["/a"])
+        await asyncio.sleep(0.01)
+        inflight["total"] -= 1
+        inflight[repo] -= 1
+        return []
+
+    requests = [(repo, f"q{i}") for repo in ("/a", "/b", "/c") for i in range(5)]
+    await SearchScheduler(max_concurrency=4, per_repo_concurrency=2).run(search, requests)
+
+    assert inflight["max_total"] <= 4
+    assert inflight["max_a"] <= 2
+
+
+@pytest.mark.asyncio
+async def test_run_counts_failures():
+    """Test a failing search doesn't drop results from the others"""
+    async def search(repo, query):
+        if repo == "/broken":
+            raise RuntimeError("MCP down")
+        return [CodeSearchResult(file="ok.py", line=1, content="x")]
+
+    batch = await SearchScheduler().run(search, [("/broken", "q"), ("/ok", "q")])
+
+    assert batch.failures == 1
+    assert len(batch.results) == 1
+    assert batch.wall_ms <= batch.serial_ms + 50
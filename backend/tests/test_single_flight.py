@@ -0,0 +1,51 @@
+"""
+Tests for Single Flight
+"""
+import asyncio
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_result_and_key_is_released():
+    """Test one execution per key while in flight, a fresh one afterwards"""
+    flights = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": len(calls)}
+
+    first = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+    second = await flights.do("k", work)
+
+    assert len(calls) == 2
+    assert all(r is first[0] for r in first)
+    assert second == {"answer": 2}
+    assert flights.stats() == {"in_flight": 0, "leaders": 2, "coalesced": 4, "coalesced_rate": 0.667}
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_cancellation_is_isolated():
+    """Test every waiter sees the failure, and cancelling one waiter spares the others"""
+    flights = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("backend down")
+
+    results = await asyncio.gather(*(flights.do("err", failing) for _ in range(2)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    leader = asyncio.create_task(flights.do("slow", slow))
+    follower = asyncio.create_task(flights.do("slow", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"
@@ -0,0 +1,136 @@
+"""
+Tests for Snippet Expander
+"""
+import os
+import pytest
+from unittest.mock import patch
+
+from services.snippet_expander import (
+    MappedFileCache, SnippetExpander, heuristic_span, line_offsets, python_spans, read_lines
+)
+
+PY_SOURCE = '''import os
+
+
+class Session:
+    @property
+    def user(self):
+        return self._user
+
+    def login(self, password):
+        if not password:
+            raise ValueError("empty")
+        self._user = check(password)
+        return True
+'''
+
+TS_SOURCE = '''import { api } from "./api";
+
+export function renderLogin(user) {
+  const form = buildForm();
+  if (user) {
+    form.fill(user);
+  }
+  return form;
+}
+'''
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "session.py").write_text(PY_SOURCE)
+    (tmp_path / "login.ts").write_text(TS_SOURCE)
+    return tmp_path
+
+
+def test_python_spans_include_decorators():
+    """Test ast spans cover decorators and nested methods"""
+    assert python_spans(PY_SOURCE) == [(4, 13), (5, 7), (9, 13)]
+    assert python_spans("def broken(:") is None
+
+
+def test_heuristic_span_brace_block():
+    """Test the brace heuristic finds the enclosing JS function"""
+    lines = TS_SOURCE.splitlines()
+
+    assert heuristic_span(lines, 6, 6, max_lines=80) == (3, 9)
+    assert heuristic_span(lines, 1, 1, max_lines=80) is None
+
+
+def test_expand_python_hit_to_innermost_function(repo):
+    """Test a hit in the middle of a method returns the whole method"""
+    expander = SnippetExpander()
+    hit = {"repository": str(repo), "file": "session.py", "line": 11, "content": '            raise ValueError("empty")'}
+
+    expanded = expander.expand_one(hit)
+
+    assert expanded["line"] == 9
+    assert expanded["content"].startswith("    def login(self, password):")
+    assert expanded["content"].endswith("return True")
+
+
+def test_expand_keeps_hits_that_cannot_be_widened(repo):
+    """Test module-level hits, oversized spans and missing files stay as they are"""
+    expander = SnippetExpander(max_lines=4)
+    top_level = {"repository": str(repo), "file": "session.py", "line": 1, "content": "import os"}
+    too_big = {"repository": str(repo), "file": "session.py", "line": 11, "content": "x"}
+    missing = {"repository": str(repo), "file": "gone.py", "line": 1, "content": "x"}
+
+    assert expander.expand([top_level, too_big, missing]) == [top_level, too_big, missing]
+    assert expander.stats()["unchanged"] == 3
+
+
+def test_spans_are_parsed_once_per_file_hash(repo):
+    """Test repeat expansions reuse the mapped file and the cached spans"""
+    expander = SnippetExpander()
+    hit = {"repository": str(repo), "file": "session.py", "line": 12, "content": "x"}
+
+    with patch("services.snippet_expander.python_spans", wraps=python_spans) as parse:
+        expander.expand_one(hit)
+        expander.expand_one({**hit, "line": 6})
+
+    assert parse.call_count == 1
+    assert expander.files.stats()["hits"] == 1
+
+
+def test_file_cache_revalidates_and_evicts(repo):
+    """Test edited files are re-read and the LRU bound holds"""
+    cache = MappedFileCache(maxsize=1)
+    path = str(repo / "login.ts")
+    digest, _ = cache.get(path)
+
+    (repo / "login.ts").write_text(TS_SOURCE + "// more\n")
+    os.utime(path, ns=(0, 10**18))
+    new_digest, data = cache.get(path)
+    cache.get(str(repo / "session.py"))
+
+    assert new_digest != digest
+    assert data[-8:] == b"// more\n"
+    assert cache.stats()["size"] == 1
+    cache.close()
+
+
+def test_file_cache_hands_out_the_map_without_copying(repo):
+    """Test hits return the cached map itself, and lines are read by byte range"""
+    cache = MappedFileCache()
+    path = str(repo / "login.ts")
+
+    _, data = cache.get(path)
+    offsets = line_offsets(data)
+
+    assert cache.get(path)[1] is data
+    assert len(offsets) - 1 == len(TS_SOURCE.splitlines())
+    assert read_lines(data, offsets, 3, 4) == TS_SOURCE.splitlines()[2:4]
+    assert read_lines(b"a\r\nb", line_offsets(b"a\r\nb"), 1, 2) == ["a", "b"]
+    cache.close()
+
+
+def test_heuristic_expansion_far_into_a_file(repo):
+    """Test a brace block deep in a long file is found from the window around the hit"""
+    (repo / "long.ts").write_text("// filler\n" * 500 + TS_SOURCE)
+    expander = SnippetExpander(max_lines=20)
+
+    expanded = expander.expand_one({"repository": str(repo), "file": "long.ts", "line": 506, "content": "form.fill(user);"})
+
+    assert expanded["line"] == 503
+    assert expanded["content"] == "\n".join(TS_SOURCE.splitlines()[2:9])
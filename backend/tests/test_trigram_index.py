@@ -0,0 +1,162 @@
+"""
+Tests for trigram index (exact and regex code search)
+"""
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from services.trigram_index import TrigramIndex, TrigramIndexManager, required_literals
+from services.mcp import MCPService
+
+
+@pytest.fixture
+def mock_env(monkeypatch):
+    """Mock MCP environment variables"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test_openai_key")
+    monkeypatch.setenv("ZILLIZ_CLOUD_URI", "https://test.zilliz.cloud")
+    monkeypatch.setenv("ZILLIZ_CLOUD_API_KEY", "test_zilliz_key")
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Repository with a few source files and an isolated cache dir"""
+    monkeypatch.setenv("CONTEXT2TASK_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "config.py").write_text("MAX_RETRIES = 3\nREQUEST_TIMEOUT = 30\n")
+    (root / "client.py").write_text("def fetch_user(user_id):\n    return retry(fetch, MAX_RETRIES)\n")
+    (root / "app.ts").write_text("export const maxRetries = 5;\n")
+    return root
+
+
+def test_required_literals():
+    """Test only literals every match must contain are extracted"""
+    assert required_literals(r"def \w+_handler\(") == ["def ", "_handler("]
+    assert required_literals(r"(foo|bar)baz") == ["baz"]
+    assert required_literals(r"(?:retry)+_count") == ["retry", "_count"]
+    assert required_literals(r"ab?c") == []
+    with pytest.raises(ValueError):
+        required_literals("unclosed(")
+
+
+def test_literal_and_regex_search(repo):
+    """Test literal, case-insensitive and regex lookups return matching lines"""
+    index = TrigramIndex(str(repo))
+    index.build(["config.py", "client.py", "app.ts"])
+
+    assert index.search("MAX_RETRIES") == [
+        ("client.py", 2, "    return retry(fetch, MAX_RETRIES)"),
+        ("config.py", 1, "MAX_RETRIES = 3"),
+    ]
+    assert [m[0] for m in index.search("maxretries", case_sensitive=False)] == ["app.ts"]
+    assert index.search(r"^[A-Z_]+ = \d+$", regex=True, extension_filter=[".py"]) == [
+        ("config.py", 1, "MAX_RETRIES = 3"),
+        ("config.py", 2, "REQUEST_TIMEOUT = 30"),
+    ]
+
+
+def test_incremental_update_and_compaction(repo):
+    """Test changed files are re-indexed and tombstones are compacted"""
+    index = TrigramIndex(str(repo))
+    index.build(["config.py", "client.py"])
+
+    (repo / "config.py").write_text("MAX_ATTEMPTS = 3\n")
+    (repo / "client.py").unlink()
+    index.update(modified=["config.py"], deleted=["client.py"])
+
+    assert index.search("MAX_RETRIES") == []
+    assert index.search("MAX_ATTEMPTS") == [("config.py", 1, "MAX_ATTEMPTS = 3")]
+    assert all(ids <= index.files.keys() for ids in index.postings.values())
+
+
+@pytest.mark.asyncio
+async def test_manager_update_leaves_published_snapshot_intact(repo):
+    """Test searches holding the previous index are unaffected by an update"""
+    manager = TrigramIndexManager()
+    before = await manager.get(str(repo))
+    postings = {trigram: set(ids) for trigram, ids in before.postings.items()}
+    (repo / "config.py").write_text("MAX_ATTEMPTS = 3\n")
+    (repo / "client.py").unlink()
+
+    await manager.update(str(repo), modified=["config.py"], deleted=["client.py"])
+
+    assert before.postings == postings
+    assert [file for file, _, _ in before.find_files("client")] == ["client.py"]
+    assert await manager.search(str(repo), "MAX_ATTEMPTS") == [("config.py", 1, "MAX_ATTEMPTS = 3")]
+    assert await manager.find_files(str(repo), "client") == []
+
+
+@pytest.mark.asyncio
+async def test_mcp_service_grep_code(repo, mock_env):
+    """Test grep_code is served from the trigram index and cached"""
+    service = MCPService()
+    await TrigramIndexManager().rebuild(str(repo))
+
+    first = await service.grep_code(str(repo), "fetch_user")
+    with patch.object(service.trigram, "search") as mock_search:
+        second = await service.grep_code(str(repo), "fetch_user")
+
+    assert first == second
+    assert first[0].file == "client.py"
+    mock_search.assert_not_called()
+
+
+def test_grep_endpoint(repo, mock_env):
+    """Test the REST endpoint returns matches and rejects invalid regexes"""
+    from main import app
+    client = TestClient(app)
+
+    with patch("api.repositories.get_mcp_service", return_value=MCPService()):
+        ok = client.post("/api/repositories/grep", json={"path": str(repo), "pattern": "REQUEST_TIMEOUT"})
+        bad = client.post("/api/repositories/grep", json={"path": str(repo), "pattern": "(", "regex": True})
+
+    assert ok.status_code == 200
+    assert ok.json()["total"] == 1
+    assert ok.json()["matches"][0]["file"] == "config.py"
+    assert bad.status_code == 400
+
+
+def test_find_files_by_path_fragment(repo):
+    """Test path lookups prefer basename matches"""
+    (repo / "config").mkdir()
+    (repo / "config" / "settings.py").write_text("DEBUG = False\n")
+    index = TrigramIndex(str(repo))
+    index.build(["config.py", "client.py", "config/settings.py"])
+
+    results = index.find_files("config")
+
+    assert [file for file, _, _ in results] == ["config.py", "config/settings.py"]
+    assert results[0][2] == "MAX_RETRIES = 3\nREQUEST_TIMEOUT = 30"
+
+
+@pytest.mark.asyncio
+async def test_manager_indexes_config_files(repo):
+    """Test keys in yml/json config files can be grepped and their paths found"""
+    (repo / "docker-compose.yml").write_text("services:\n  api:\n    environment:\n      MAX_RETRIES: 7\n")
+    (repo / "config.json").write_text('{\n  "featureFlag": true\n}\n')
+    manager = TrigramIndexManager()
+
+    matches = await manager.search(str(repo), "MAX_RETRIES")
+    flags = await manager.search(str(repo), "featureFlag")
+    compose = await manager.find_files(str(repo), "docker-compose")
+
+    assert ("docker-compose.yml", 4, "      MAX_RETRIES: 7") in matches
+    assert flags == [("config.json", 2, '  "featureFlag": true')]
+    assert [file for file, _, _ in compose] == ["docker-compose.yml"]
+
+
+@pytest.mark.asyncio
+async def test_sync_sends_config_changes_to_trigram_index_only(repo, mock_env):
+    """Test a config-only change updates grep results without re-indexing the semantic backend"""
+    service = MCPService()
+    with patch.object(service, "_run_npx_command") as mock_run:
+        mock_run.return_value = {"status": "success"}
+        await service.sync_codebase(str(repo))
+        (repo / "settings.yaml").write_text("retry_backoff: 2\n")
+
+        synced = await service.sync_codebase(str(repo))
+
+    assert synced["added"] == 1
+    assert mock_run.call_count == 1
+    assert (await service.grep_code(str(repo), "retry_backoff"))[0].file == "settings.yaml"
+    assert all(hit[0] != "settings.yaml" for hit in await service.lexical.search(str(repo), "retry_backoff"))